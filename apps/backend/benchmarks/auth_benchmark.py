@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Per-request auth cost benchmark for roomait
+Compares verify_token with and without the verified-token cache, using a
+locally generated RSA key and a file:// JWKS so no network is involved.
+Also checks that a cold start with concurrent requests does one JWKS fetch
+"""
+
+import asyncio
+import os
+import sys
+import json
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.hazmat.primitives import serialization
+from jose import jwk, jwt
+
+DOMAIN = "bench.local"
+AUDIENCE = "https://roomait-bench"
+KID = "bench-key"
+ITERATIONS = 2000
+CONCURRENT_REQUESTS = 500
+
+def build_key_material():
+    """Generate an RSA key pair, write its JWKS to a temp file and sign one token"""
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption()
+    )
+    public_pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    public_jwk = jwk.construct(public_pem, "RS256").to_dict()
+    public_jwk.update({"kid": KID, "use": "sig"})
+
+    jwks_file = tempfile.NamedTemporaryFile("w", suffix=".json", delete=False)
+    json.dump({"keys": [public_jwk]}, jwks_file)
+    jwks_file.close()
+
+    token = jwt.encode(
+        {"sub": "auth0|bench", "aud": AUDIENCE, "iss": f"https://{DOMAIN}/", "exp": int(time.time()) + 3600},
+        private_pem,
+        algorithm="RS256",
+        headers={"kid": KID}
+    )
+    return jwks_file.name, token
+
+async def time_per_call(fn, iterations=ITERATIONS) -> float:
+    """Average microseconds per awaited call"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+async def run():
+    jwks_path, token = build_key_material()
+    os.environ["AUTH0_DOMAIN"] = DOMAIN
+    os.environ["AUTH0_AUDIENCE"] = AUDIENCE
+    os.environ["AUTH0_JWKS_URL"] = f"file://{jwks_path}"
+
+    from src import auth
+
+    try:
+        # Cold start: concurrent requests must coalesce into a single JWKS fetch
+        auth.token_cache._max_size = 0
+        await asyncio.gather(*(auth.verify_token(token) for _ in range(CONCURRENT_REQUESTS)))
+        cold_start_fetches = auth.jwks_cache.refreshes
+
+        # Baseline: JWKS cached, full RS256 verification each call
+        uncached_us = await time_per_call(lambda: auth.verify_token(token))
+
+        # Verified-token cache enabled
+        auth.token_cache._max_size = 1024
+        await auth.verify_token(token)
+        cached_us = await time_per_call(lambda: auth.verify_token(token))
+    finally:
+        os.unlink(jwks_path)
+
+    print("🔐 verify_token cost per request")
+    print("=" * 50)
+    print(f"RS256 verification : {uncached_us:8.1f} µs")
+    print(f"Token cache hit    : {cached_us:8.1f} µs")
+    print(f"Speedup            : {uncached_us / cached_us:8.1f}x")
+    print(f"Cold start fetches : {cold_start_fetches} for {CONCURRENT_REQUESTS} concurrent requests")
+    print(f"JWKS cache         : {auth.jwks_cache.stats()}")
+    print(f"Token cache        : {auth.token_cache.stats()}")
+
+def main():
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Request coalescing load test for roomait
+Fires concurrent identical requests at the response cache and at
+/api/v1/ai/style-suggestions and checks the backend computation ran once,
+both on a cold key and when an expired entry is served stale-while-revalidate
+"""
+
+import asyncio
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from src.response_cache import MemoryCacheBackend, ResponseCache
+
+CONCURRENT_REQUESTS = 1000
+COMPUTE_SECONDS = 0.05  # Stand-in for an LLM call
+
+class CountingCompute:
+    """Slow computation that counts how often it actually runs"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(COMPUTE_SECONDS)
+        return {"suggestions": ["Minimalist Modern"], "computed": self.calls}
+
+async def timed_burst(fetch) -> tuple:
+    start = time.perf_counter()
+    results = await asyncio.gather(*(fetch() for _ in range(CONCURRENT_REQUESTS)))
+    return results, (time.perf_counter() - start) * 1000
+
+async def cache_scenarios():
+    print(f"\n{CONCURRENT_REQUESTS} concurrent identical lookups against ResponseCache")
+
+    # Baseline: check-then-compute without coalescing stampedes on a cold key
+    naive = CountingCompute()
+    backend = MemoryCacheBackend()
+    async def uncoalesced():
+        cached = await backend.get("key")
+        if cached is None:
+            cached = await naive()
+            await backend.set("key", cached, 60)
+        return cached
+    _, elapsed = await timed_burst(uncoalesced)
+    print(f"  no coalescing        {naive.calls:5} computations | {elapsed:7.1f} ms")
+
+    compute = CountingCompute()
+    cache = ResponseCache(MemoryCacheBackend(), ttl=0.2, stale_ttl=60)
+    results, elapsed = await timed_burst(lambda: cache.get_or_compute("key", compute))
+    assert compute.calls == 1, f"cold key computed {compute.calls} times"
+    assert all(result == results[0] for result in results)
+    print(f"  single-flight        {compute.calls:5} computations | {elapsed:7.1f} ms")
+
+    # Past the TTL: everyone gets the stale entry at once while one refresh runs
+    await asyncio.sleep(0.25)
+    results, elapsed = await timed_burst(lambda: cache.get_or_compute("key", compute))
+    assert all(result["computed"] == 1 for result in results), "stale entry was not served"
+    while cache.stats()["in_flight"]:
+        await asyncio.sleep(0.01)
+    assert compute.calls == 2, f"stale entry refreshed {compute.calls - 1} times"
+    refreshed = await cache.get_or_compute("key", compute)
+    assert refreshed["computed"] == 2
+    print(f"  stale-while-revalidate {compute.calls - 1:3} refresh      | {elapsed:7.1f} ms")
+    print(f"  stats: {cache.stats()}")
+
+async def endpoint_scenario():
+    from src.main import app
+    from src.routes import ai_recommendations
+    from src.response_cache import response_cache
+
+    print(f"\n{CONCURRENT_REQUESTS} concurrent GET /api/v1/ai/style-suggestions")
+    original = ai_recommendations.generate_style_suggestions
+    compute = CountingCompute()
+    async def counted_suggestions(room_size, budget):
+        await compute()
+        return await original(room_size, budget)
+    ai_recommendations.generate_style_suggestions = counted_suggestions
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            # Unique budget, so a shared Redis cache cannot already hold the entry
+            url = f"/api/v1/ai/style-suggestions?room_size=97.5&budget={time.time():.0f}"
+            responses, elapsed = await timed_burst(lambda: client.get(url))
+        assert all(response.status_code == 200 for response in responses)
+        assert compute.calls == 1, f"endpoint computed {compute.calls} times"
+        print(f"  backend computations {compute.calls:5}              | {elapsed:7.1f} ms")
+        print(f"  stats: {response_cache.stats()}")
+    finally:
+        ai_recommendations.generate_style_suggestions = original
+
+async def run():
+    print("🧪 Request coalescing load test")
+    print("=" * 60)
+    await cache_scenarios()
+    await endpoint_scenario()
+    print("\n✅ Each burst ran the backend computation once")
+
+def main():
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    main()
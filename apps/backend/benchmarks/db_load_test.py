@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Database backend load test for roomait
+Runs the /api/v1/models route against a local SQLite file with the sync
+and async (aiosqlite) backends and reports throughput per concurrency level
+"""
+
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CONCURRENCY_LEVELS = [1, 10, 50, 100, 200]
+REQUESTS_PER_LEVEL = 1000
+SEED_MODELS = 500
+
+def seed():
+    """Create tables and insert a catalog of generic models"""
+    from src.database import Base, engine, SessionLocal
+    from src.models.database_models import GenericModel
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        for i in range(SEED_MODELS):
+            db.add(GenericModel(
+                model_id=f"load-test-{i}",
+                category="seating",
+                subcategory="chair",
+                display_name=f"Load Test {i}",
+                description="Load test model",
+                model_url=f"/models/load-test-{i}.glb",
+                thumbnail_url=f"/images/load-test-{i}.jpg",
+                width=24, depth=24, height=36,
+                polygon_count=3000,
+                file_size_mb=2.5,
+                is_active=True
+            ))
+        db.commit()
+    finally:
+        db.close()
+
+async def run_level(client, concurrency: int) -> float:
+    """Requests per second for one concurrency level"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            response = await client.get("/api/v1/models")
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(REQUESTS_PER_LEVEL)))
+    return REQUESTS_PER_LEVEL / (time.perf_counter() - start)
+
+async def run_backend():
+    import httpx
+    from src.main import app
+
+    async with httpx.AsyncClient(app=app, base_url="http://load-test") as client:
+        for concurrency in CONCURRENCY_LEVELS:
+            rps = await run_level(client, concurrency)
+            print(f"  concurrency {concurrency:4d}: {rps:8.1f} req/s")
+
+def main():
+    # Child mode: one backend per process, since the engine is chosen at import time
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        if sys.argv[2] == "seed":
+            seed()
+        else:
+            asyncio.run(run_backend())
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'load.db')}")
+        subprocess.run([sys.executable, __file__, "--child", "seed"], env=env, check=True)
+
+        for backend, flag in (("sync", "false"), ("async", "true")):
+            print(f"🗄️  {backend} backend")
+            subprocess.run([sys.executable, __file__, "--child", "run"], env=dict(env, DATABASE_ASYNC=flag), check=True)
+
+if __name__ == "__main__":
+    main()
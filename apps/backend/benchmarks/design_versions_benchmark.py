@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Design versioning benchmark for roomait
+Replays an AR editing session (mostly single-item moves and turns, some adds and
+removes) against a local SQLite file, once saving every edit as a full design the
+way POST /api/v1/user/designs does and once through
+POST /api/v1/user/designs/{id}/versions, and compares bytes written, database
+size and the time to save and to read back the latest version
+"""
+
+import asyncio
+import copy
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DESIGN_SIZES = [25, 100, 400]
+EDITS = 200
+USER = {"sub": "auth0|design-versions-benchmark", "email": "bench@roomait.test", "name": "Benchmark"}
+
+def make_items(count: int) -> list:
+    return [{
+        "item_id": f"item-{i}",
+        "model_id": "generic-desk-study",
+        "position": {"x": i % 12, "y": 0.0, "z": i // 12 % 10},
+        "rotation": {"x": 0.0, "y": 0.0, "z": 0.0},
+        "scale": {"x": 1.0, "y": 1.0, "z": 1.0},
+        "surface_id": "floor",
+        "estimated_cost": 100.0,
+    } for i in range(count)]
+
+def editing_session(items: list, edits: int, seed: int = 0) -> list:
+    """Layouts after each edit: 70% moves, 20% turns, 5% adds, 5% removes"""
+    rng = random.Random(seed)
+    layout, layouts = copy.deepcopy(items), []
+    for edit in range(edits):
+        roll = rng.random()
+        if roll < 0.7:
+            layout[rng.randrange(len(layout))]["position"] = {"x": rng.uniform(0, 12), "y": 0.0, "z": rng.uniform(0, 10)}
+        elif roll < 0.9:
+            layout[rng.randrange(len(layout))]["rotation"] = {"x": 0.0, "y": rng.uniform(0, 6.28), "z": 0.0}
+        elif roll < 0.95 or len(layout) < 2:
+            layout.append({**make_items(1)[0], "item_id": f"added-{edit}"})
+        else:
+            layout.pop(rng.randrange(len(layout)))
+        layouts.append(copy.deepcopy(layout))
+    return layouts
+
+def database_bytes(url: str) -> int:
+    return os.path.getsize(url.split("sqlite:///", 1)[1])
+
+async def run():
+    import httpx
+    from src.auth import get_current_user
+    from src.database import Base, engine
+    from src.design_versions import payload_size
+    from src.main import app
+
+    Base.metadata.create_all(bind=engine)
+    app.dependency_overrides[get_current_user] = lambda: USER
+    url = os.environ["DATABASE_URL"]
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://design-versions") as client:
+        for count in DESIGN_SIZES:
+            items = make_items(count)
+            layouts = editing_session(items, EDITS)
+
+            # Previous behaviour: every save is a whole new design
+            size_before = database_bytes(url)
+            written, start = 0, time.perf_counter()
+            for layout in layouts:
+                body = {"design_name": "Dorm", "furniture_placement": layout}
+                response = await client.post("/api/v1/user/designs", json=body)
+                assert response.status_code == 200, response.text
+                written += payload_size(layout)
+            full_ms = (time.perf_counter() - start) / EDITS * 1000
+            full_growth = database_bytes(url) - size_before
+
+            response = await client.post("/api/v1/user/designs", json={"design_name": "Dorm", "furniture_placement": items})
+            design_id = response.json()["design_id"]
+            size_before = database_bytes(url)
+            versioned, kinds, start = 0, {"delta": 0, "snapshot": 0}, time.perf_counter()
+            for version, layout in enumerate(layouts, start=1):
+                body = {"furniture_placement": layout, "base_version": version}
+                response = await client.post(f"/api/v1/user/designs/{design_id}/versions", json=body)
+                assert response.status_code == 200, response.text
+                versioned += response.json()["bytes_written"]
+                kinds[response.json()["kind"]] += 1
+            version_ms = (time.perf_counter() - start) / EDITS * 1000
+            version_growth = database_bytes(url) - size_before
+
+            start = time.perf_counter()
+            response = await client.get(f"/api/v1/user/designs/{design_id}/versions/latest")
+            read_ms = (time.perf_counter() - start) * 1000
+            assert response.json()["furniture_placement"] == layouts[-1], "latest version differs from the last save"
+
+            print(f"\n{count} items, {EDITS} edits")
+            print(f"  full design per save   {written / 1024:9.1f} KiB written | db +{full_growth / 1024:8.1f} KiB | {full_ms:6.2f} ms/save")
+            print(f"  versions               {versioned / 1024:9.1f} KiB written | db +{version_growth / 1024:8.1f} KiB | {version_ms:6.2f} ms/save "
+                  f"| {written / max(versioned, 1):5.1f}x fewer bytes")
+            print(f"  {kinds['delta']} deltas, {kinds['snapshot']} snapshots | latest version read in {read_ms:.2f} ms")
+
+def main():
+    # Child mode: the engine is chosen at import time, so each backend gets its own process
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        asyncio.run(run())
+        return
+
+    print("🧪 Design versioning benchmark")
+    print("=" * 60)
+    for backend, flag in (("sync", "false"), ("async", "true")):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'designs.db')}", DATABASE_ASYNC=flag)
+            print(f"\n🗄️  {backend} backend")
+            subprocess.run([sys.executable, __file__, "--child"], env=env, check=True)
+    print("\n✅ Every versioned design read back exactly as last saved")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Layout optimizer benchmark for roomait
+Times one annealing move with incremental cost updates against re-scoring the
+whole layout, shows the best cost found for a growing time budget and how far
+past its deadline the search answers, and compares restarts run one after
+another with restarts spread over a process pool
+"""
+
+import asyncio
+import os
+import sys
+import random
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+import src.layout_optimizer as layout_optimizer
+from src.layout_optimizer import LayoutProblem, LayoutState, anneal, close_layout_pool, optimize_layout
+
+MODELS = {
+    "generic-bed-twin": {"width": 38, "depth": 75, "height": 20},
+    "generic-desk-study": {"width": 48, "depth": 24, "height": 30},
+    "generic-dresser": {"width": 36, "depth": 18, "height": 32},
+    "generic-nightstand": {"width": 18, "depth": 16, "height": 24},
+    "generic-mini-fridge": {"width": 19, "depth": 20, "height": 33},
+    "generic-bean-bag": {"width": 36, "depth": 36, "height": 30},
+}
+# A furnished double room
+MODEL_IDS = [
+    "generic-bed-twin", "generic-bed-twin", "generic-desk-study", "generic-desk-study",
+    "generic-dresser", "generic-nightstand", "generic-mini-fridge", "generic-bean-bag",
+]
+ROOM = {"width": 16.0, "depth": 14.0, "height": 9.0}
+SURFACES = [
+    {"surface_type": "door", "bounds": {"x": 8, "z": 0, "width": 3}},
+    {"surface_type": "radiator", "bounds": {"min_x": 6, "max_x": 10, "min_z": 13.5, "max_z": 14}},
+]
+BUDGETS_MS = [250, 1000, 3000]
+SEEDS = [1, 2, 3]
+RESTARTS = 4
+MOVES = 500
+
+def problem() -> LayoutProblem:
+    return LayoutProblem(MODEL_IDS, MODELS, ROOM, SURFACES)
+
+def move_cost():
+    """Time per move scored incrementally vs by re-scoring the whole layout"""
+    layout = problem()
+    result = anneal(layout, 0, time.time() + 0.2)
+    center, turns = np.array(result["center"]), np.array(result["turns"])
+    rng = random.Random(0)
+    moves = [(rng.randrange(len(layout)), rng.gauss(0, 1), rng.gauss(0, 1), rng.randrange(4)) for _ in range(MOVES)]
+
+    state = LayoutState(layout, center, turns)
+    start = time.perf_counter()
+    for k, dx, dz, quarter in moves:
+        state.try_move(k, state.center[state.obstacles + k] + [dx, dz], quarter, 1.0, rng)
+    incremental = (time.perf_counter() - start) / MOVES * 1000
+
+    start = time.perf_counter()
+    for k, dx, dz, quarter in moves:
+        moved_center, moved_turns = center.copy(), turns.copy()
+        moved_center[k] += [dx, dz]
+        moved_turns[k] = quarter
+        LayoutState(layout, moved_center, moved_turns)
+    full = (time.perf_counter() - start) / MOVES * 1000
+
+    fresh = LayoutState(layout, state.center[state.obstacles:], state.turns[state.obstacles:])
+    assert abs(fresh.cost - state.cost) < 1e-6, "incremental cost drifted from a full re-score"
+    print(f"\nOne move, {len(layout)} items")
+    print(f"  incremental      {incremental:7.3f} ms")
+    print(f"  full re-score    {full:7.3f} ms | {full / incremental:5.1f}x slower")
+
+async def budgets():
+    print(f"\nBest cost by time budget (one restart, seeds {SEEDS})")
+    for budget in BUDGETS_MS:
+        costs, overshoot, iterations = [], [], 0
+        for seed in SEEDS:
+            start = time.perf_counter()
+            layout = await optimize_layout(problem(), budget, 1, seed)
+            overshoot.append((time.perf_counter() - start) * 1000 - budget)
+            costs.append(layout["cost"]["total"])
+            iterations += layout["search"]["iterations"]
+        print(f"  {budget:5d} ms | mean cost {np.mean(costs):7.3f} | best {min(costs):7.3f} | "
+              f"{iterations / len(SEEDS):7.0f} moves | worst overshoot {max(overshoot):6.1f} ms")
+
+async def restarts():
+    budget = 1000
+    print(f"\n{RESTARTS} restarts within {budget} ms")
+    layout = await optimize_layout(problem(), budget, RESTARTS, 10)
+    print(f"  in one thread    cost {layout['cost']['total']:7.3f} | {layout['search']['iterations']:6d} moves | "
+          f"{layout['search']['restarts']} restarts")
+
+    layout_optimizer.LAYOUT_OPTIMIZER_PROCESSES = RESTARTS - 1
+    try:
+        # First use forks the workers; time the warm pool
+        await optimize_layout(problem(), 100, RESTARTS, 0)
+        layout = await optimize_layout(problem(), budget, RESTARTS, 10)
+        print(f"  process pool     cost {layout['cost']['total']:7.3f} | {layout['search']['iterations']:6d} moves | "
+              f"{layout['search']['restarts']} restarts ({os.cpu_count()} CPUs)")
+    finally:
+        close_layout_pool()
+        layout_optimizer.LAYOUT_OPTIMIZER_PROCESSES = 0
+
+def main():
+    print("🧪 Layout optimizer benchmark")
+    print("=" * 60)
+    print(f"{len(MODEL_IDS)} items in a {ROOM['width']:g} x {ROOM['depth']:g} ft room")
+    move_cost()
+    asyncio.run(budgets())
+    asyncio.run(restarts())
+    print("\n✅ Incremental cost matches a full re-score")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Floor occupancy benchmark for roomait
+Times the occupancy grid behind /api/v1/ar/validate-placement and /scan/process
+for a furnished 20 x 20 ft room at several resolutions, and checks the largest
+free rectangle against a per-row stack scan of the same grid
+"""
+
+import os
+import sys
+import math
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.collision import item_footprints
+from src.occupancy import MAX_WALKWAY_WIDTH, OccupancyGrid, analyze_floor, find_door, walkway_width
+
+ROOM = {"width": 20.0, "depth": 20.0, "height": 9.0}
+RESOLUTIONS_IN = [0.5, 1.0, 2.0, 3.0]
+# The 1 inch grid should stay well inside this budget
+BUDGET_MS = 50
+REPEATS = 20
+
+MODELS = {
+    "generic-bed-twin": {"width": 38, "depth": 75, "height": 20},
+    "generic-desk-study": {"width": 48, "depth": 24, "height": 30},
+    "generic-dresser": {"width": 36, "depth": 18, "height": 32},
+    "generic-nightstand": {"width": 18, "depth": 16, "height": 24},
+    "generic-mini-fridge": {"width": 19, "depth": 20, "height": 33},
+    "generic-wall-shelf": {"width": 36, "depth": 10, "height": 12},
+}
+
+SURFACES = [
+    {"surface_type": "floor", "bounds": {"min_x": 0, "max_x": 20, "min_z": 0, "max_z": 20}},
+    {"surface_type": "door", "bounds": {"x": 10, "z": 0, "width": 3}},
+    {"surface_type": "wall", "bounds": {"min_x": 0, "max_x": 20, "min_z": 20, "max_z": 20}},
+    {"surface_type": "radiator", "bounds": {"min_x": 7, "max_x": 13, "min_z": 19, "max_z": 20}},
+]
+
+def item(item_id: str, model_id: str, x: float, z: float, yaw: float = 0.0, y: float = 0.0) -> dict:
+    return {"item_id": item_id, "model_id": model_id, "position": {"x": x, "y": y, "z": z}, "rotation": {"x": 0.0, "y": yaw, "z": 0.0}}
+
+# A double room: beds and desks along the side walls, storage between them
+ITEMS = [
+    item("bed-a", "generic-bed-twin", 1.7, 15.5),
+    item("bed-b", "generic-bed-twin", 18.3, 15.5),
+    item("desk-a", "generic-desk-study", 1.1, 6.0, math.pi / 2),
+    item("desk-b", "generic-desk-study", 18.9, 6.0, math.pi / 2),
+    item("dresser-a", "generic-dresser", 5.0, 19.2),
+    item("dresser-b", "generic-dresser", 15.0, 19.2),
+    item("nightstand-a", "generic-nightstand", 4.2, 18.5, 0.2),
+    item("fridge", "generic-mini-fridge", 16.5, 1.0),
+    item("shelf", "generic-wall-shelf", 10.0, 19.5, y=5.0),
+]
+
+def largest_rectangle_reference(grid: OccupancyGrid) -> float:
+    """Reference: histogram stack scan row by row, area in cells"""
+    rows, columns = grid.occupied.shape
+    heights = [0] * columns
+    best = 0
+    for row in grid.occupied.tolist():
+        heights = [0 if occupied else height + 1 for occupied, height in zip(row, heights)]
+        stack = []
+        for column, height in enumerate(heights + [0]):
+            start = column
+            while stack and stack[-1][1] >= height:
+                start, top = stack.pop()
+                best = max(best, top * (column - start))
+            stack.append((start, height))
+    return best
+
+def best_of(function, repeats: int = REPEATS) -> tuple:
+    timings, result = [], None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+    return result, min(timings) * 1000
+
+def stages(resolution_in: float):
+    """Time of each step analyze_floor takes, on the same grid"""
+    footprints, indices = item_footprints(ITEMS, MODELS)
+    grid = OccupancyGrid(ROOM["width"], ROOM["depth"], resolution_in)
+    _, raster_ms = best_of(lambda: grid.mark_footprints(footprints))
+    rectangle, rectangle_ms = best_of(grid.largest_free_rectangle)
+    clearance, clearance_ms = best_of(lambda: grid.clearance(MAX_WALKWAY_WIDTH / 2))
+    door = find_door(SURFACES, ROOM["width"], ROOM["depth"])
+    _, walkway_ms = best_of(lambda: walkway_width(grid, clearance, door, footprints, 0))
+    print(f"  rasterize {raster_ms:.2f} ms | largest rectangle {rectangle_ms:.2f} ms | "
+          f"clearance {clearance_ms:.2f} ms | one walkway {walkway_ms:.2f} ms")
+
+    expected = largest_rectangle_reference(grid) * grid.cell ** 2
+    assert abs(rectangle["area_sqft"] - round(expected, 2)) < 1e-6, "largest free rectangle differs"
+
+def main():
+    print("🧪 Floor occupancy benchmark")
+    print("=" * 60)
+    print(f"{ROOM['width']:g} x {ROOM['depth']:g} ft room, {len(ITEMS)} items, {len(SURFACES)} scanned surfaces")
+    timings = {}
+    for resolution in RESOLUTIONS_IN:
+        floor, timings[resolution] = best_of(lambda: analyze_floor(ROOM, SURFACES, ITEMS, MODELS, resolution))
+        rows, columns = floor["grid_size"]
+        print(f"\n{resolution:g} in cells ({rows} x {columns} = {rows * columns:,})")
+        print(f"  analyze_floor    {timings[resolution]:8.2f} ms | free {floor['free_area_sqft']} sq ft | "
+              f"largest rectangle {floor['largest_free_rectangle']['area_sqft']} sq ft")
+        print("  walkways         " + ", ".join(f"{w['item_id']} {w['width_ft']} ft" for w in floor["walkways"]))
+        stages(resolution)
+
+    if timings[1.0] < BUDGET_MS:
+        print(f"\n✅ 1 inch grid analyzed in {timings[1.0]:.1f} ms (budget {BUDGET_MS} ms)")
+    else:
+        print(f"\n⚠️ 1 inch grid took {timings[1.0]:.1f} ms (budget {BUDGET_MS} ms)")
+
+if __name__ == "__main__":
+    main()
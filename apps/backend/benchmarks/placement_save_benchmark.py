@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Placement save benchmark for roomait
+Saves designs of 10 to 500 items against a local SQLite file with the previous
+one-ORM-object-per-item path and the single-transaction bulk insert, times
+POST /api/v1/ar/placement/save end to end, then replays retries with an
+Idempotency-Key and checks they add no rows
+"""
+
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DESIGN_SIZES = [10, 100, 500]
+REPEATS = 5
+SCAN_ID = "placement-save-benchmark"
+USER = {"sub": "auth0|placement-save-benchmark", "email": "bench@roomait.test", "name": "Benchmark"}
+
+def make_items(count: int) -> list:
+    return [{
+        "item_id": f"item-{i}",
+        "model_id": "generic-desk-study",
+        "position": {"x": i % 12, "y": 0.0, "z": i // 12 % 10},
+        "rotation": {"x": 0.0, "y": 0.0, "z": 0.0},
+        "scale": {"x": 1.0, "y": 1.0, "z": 1.0},
+    } for i in range(count)]
+
+def seed():
+    """Create tables and the room scan designs are saved against"""
+    from src.database import Base, engine, SessionLocal
+    from src.models.database_models import RoomScan
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        db.add(RoomScan(
+            scan_id=SCAN_ID, room_dimensions={"width": 12, "depth": 10, "height": 8},
+            detected_surfaces=[], scan_quality=0.9
+        ))
+        db.commit()
+    finally:
+        db.close()
+
+def save_per_object(items: list):
+    """Reference: the previous path, one FurniturePlacement object per item and a separate user commit"""
+    import uuid
+    from src.database import SessionLocal
+    from src.models.database_models import FurniturePlacement, RoomScan, User
+
+    db = SessionLocal()
+    try:
+        db.query(RoomScan).filter(RoomScan.scan_id == SCAN_ID).first()
+        db_user = db.query(User).filter(User.auth0_user_id == USER["sub"]).first()
+        if not db_user:
+            db_user = User(auth0_user_id=USER["sub"], email=USER["email"], name=USER["name"])
+            db.add(db_user)
+            db.commit()
+            db.refresh(db_user)
+        placement_id = str(uuid.uuid4())
+        for item in items:
+            db.add(FurniturePlacement(
+                placement_id=placement_id, scan_id=SCAN_ID, user_id=db_user.user_id, model_id=item["model_id"],
+                position=item["position"], rotation=item["rotation"], scale=item["scale"], estimated_cost=100.0
+            ))
+        db.commit()
+    finally:
+        db.close()
+
+def placement_rows(placement_id: str) -> int:
+    from src.database import SessionLocal
+    from src.models.database_models import FurniturePlacement
+
+    db = SessionLocal()
+    try:
+        return db.query(FurniturePlacement).filter(FurniturePlacement.placement_id == placement_id).count()
+    finally:
+        db.close()
+
+async def save_bulk(request):
+    """The endpoint's write path on its own: user upsert and executemany insert in one transaction"""
+    from src.database import SessionLocal
+    from src.routes.ar_scanning import save_placements
+
+    db = SessionLocal()
+    try:
+        await save_placements(db, request, USER)
+    finally:
+        db.close()
+
+async def run():
+    import httpx
+    from src.auth import get_current_user_optional
+    from src.main import app
+    from src.routes.ar_scanning import ARPlacementRequest
+
+    app.dependency_overrides[get_current_user_optional] = lambda: USER
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://placement-save") as client:
+        for count in DESIGN_SIZES:
+            items = make_items(count)
+            body = {"scan_id": SCAN_ID, "furniture_items": items}
+
+            legacy = []
+            for _ in range(REPEATS):
+                start = time.perf_counter()
+                await asyncio.to_thread(save_per_object, items)
+                legacy.append(time.perf_counter() - start)
+
+            request = ARPlacementRequest(**body)
+            bulk = []
+            for _ in range(REPEATS):
+                start = time.perf_counter()
+                await save_bulk(request)
+                bulk.append(time.perf_counter() - start)
+
+            endpoint, replay = [], []
+            for attempt in range(REPEATS):
+                headers = {"Idempotency-Key": f"benchmark-{count}-{attempt}"}
+                start = time.perf_counter()
+                response = await client.post("/api/v1/ar/placement/save", json=body, headers=headers)
+                endpoint.append(time.perf_counter() - start)
+                assert response.status_code == 200, response.text
+
+                start = time.perf_counter()
+                retry = await client.post("/api/v1/ar/placement/save", json=body, headers=headers)
+                replay.append(time.perf_counter() - start)
+                assert retry.headers.get("Idempotent-Replayed") == "true"
+                assert retry.json()["placement_id"] == response.json()["placement_id"]
+                assert placement_rows(response.json()["placement_id"]) == count, "retry inserted duplicate rows"
+
+            print(f"\n{count} items")
+            print(f"  one object per item     {min(legacy) * 1000:8.1f} ms")
+            print(f"  bulk insert             {min(bulk) * 1000:8.1f} ms | {min(legacy) / min(bulk):5.1f}x faster")
+            print(f"  endpoint end to end     {min(endpoint) * 1000:8.1f} ms")
+            print(f"  idempotent retry        {min(replay) * 1000:8.1f} ms")
+
+def main():
+    # Child mode: the engine is chosen at import time, so each backend gets its own process
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        if sys.argv[2] == "seed":
+            seed()
+        else:
+            asyncio.run(run())
+        return
+
+    print("🧪 Placement save benchmark")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'placements.db')}")
+        subprocess.run([sys.executable, __file__, "--child", "seed"], env=env, check=True)
+        for backend, flag in (("sync", "false"), ("async", "true")):
+            print(f"\n🗄️  {backend} backend")
+            subprocess.run([sys.executable, __file__, "--child", "run"], env=dict(env, DATABASE_ASYNC=flag), check=True)
+    print("\n✅ Retries with an Idempotency-Key replayed the first response without new rows")
+
+if __name__ == "__main__":
+    main()
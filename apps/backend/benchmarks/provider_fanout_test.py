@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Retailer fan-out test for roomait
+Runs RetailSearch against local stub retailer adapters with injected latency
+and failures (served through httpx.MockTransport, so the real HTTP provider
+code path runs) and checks concurrency, per-provider timeouts, the overall
+deadline and circuit breaking
+"""
+
+import asyncio
+import os
+import random
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from src.retail_providers import CircuitBreaker, HttpRetailProvider, RetailSearch
+from src.routes.ai_recommendations import ProductRecommendation, ProductSearchRequest, RoomContext
+
+PROVIDER_TIMEOUT = 0.2
+SEARCH_DEADLINE = 0.5
+FAILURE_THRESHOLD = 3
+RESET_TIMEOUT = 0.3
+PRODUCTS_PER_STUB = 40
+
+class StubRetailer:
+    """Retailer adapter stand-in whose latency and failures can be changed between calls"""
+
+    def __init__(self, name: str, latency: float):
+        self.name = name
+        self.latency = latency
+        self.failing = False
+        self.calls = 0
+        rng = random.Random(name)
+        self.products = [{
+            "product_name": f"{name} {rng.choice(['mesh', 'oak', 'velvet'])} chair {i}",
+            "price": round(rng.uniform(20, 300), 2),
+            "sale_price": None,
+            "rating": round(rng.uniform(3.0, 5.0), 1),
+            "review_count": rng.randint(0, 5000),
+            "image_url": f"https://example.com/{name}/{i}.jpg",
+            "product_url": f"https://example.com/{name}/{i}",
+            "why_recommended": "Fits a {room_size:.0f} sq ft room",
+            "shipping": "Free shipping",
+            "in_stock": True,
+            "specifications": {},
+            "dimensions": {"width": rng.uniform(15, 30), "depth": rng.uniform(15, 30), "height": 32},
+        } for i in range(PRODUCTS_PER_STUB)]
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        if self.failing:
+            return httpx.Response(503, json={"detail": "unavailable"})
+        return httpx.Response(200, json={"products": self.products})
+
+def make_search(stubs: dict, deadline: float = SEARCH_DEADLINE) -> RetailSearch:
+    async def route(request: httpx.Request) -> httpx.Response:
+        return await stubs[request.url.host](request)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(route))
+    providers = [
+        HttpRetailProvider(name, f"http://{name}/search", timeout=PROVIDER_TIMEOUT,
+                           breaker=CircuitBreaker(FAILURE_THRESHOLD, RESET_TIMEOUT))
+        for name in stubs
+    ]
+    return RetailSearch(providers, include_catalog=False, deadline=deadline, client=client)
+
+def make_request(max_results: int = 10) -> ProductSearchRequest:
+    return ProductSearchRequest(
+        room_context=RoomContext(dimensions={"width": 12, "depth": 10, "height": 8}, budget_range={"min": 20, "max": 300}),
+        selected_category="seating",
+        search_intent="comfy mesh chair",
+        max_results=max_results
+    )
+
+async def timed_search(retail: RetailSearch, **kwargs) -> tuple:
+    start = time.perf_counter()
+    result = await retail.search(make_request(), **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+def describe(result: dict) -> str:
+    return ", ".join(f"{name}={status['status']}" for name, status in result["sources"].items())
+
+async def healthy_fanout():
+    print("\nHealthy providers (20/40/60/80 ms)")
+    stubs = {name: StubRetailer(name, latency) for name, latency in
+             [("ikea", 0.02), ("amazon", 0.04), ("wayfair", 0.06), ("target", 0.08)]}
+    result, elapsed = await timed_search(make_search(stubs))
+    assert not result["partial"], describe(result)
+    assert len(result["recommendations"]) == 10
+    scores = [recommendation["score"] for recommendation in result["recommendations"]]
+    assert scores == sorted(scores, reverse=True)
+    for recommendation in result["recommendations"]:
+        ProductRecommendation(**recommendation)
+    # Concurrent: about the slowest provider, not the sum of all four
+    assert elapsed < 180, f"fan-out took {elapsed:.1f} ms"
+    print(f"  {describe(result)} | {elapsed:6.1f} ms | stores in top 10: "
+          f"{sorted({r['store'] for r in result['recommendations']})}")
+
+async def slow_provider():
+    print(f"\nOne provider slower than its {PROVIDER_TIMEOUT * 1000:.0f} ms timeout")
+    stubs = {"ikea": StubRetailer("ikea", 0.02), "amazon": StubRetailer("amazon", 1.0)}
+    result, elapsed = await timed_search(make_search(stubs))
+    assert result["partial"] and result["sources"]["amazon"]["status"] == "timeout", describe(result)
+    assert result["recommendations"] and all(r["store"] == "ikea" for r in result["recommendations"])
+    assert elapsed < PROVIDER_TIMEOUT * 1000 + 100, f"took {elapsed:.1f} ms"
+    print(f"  {describe(result)} | {elapsed:6.1f} ms | {len(result['recommendations'])} partial results")
+
+async def overall_deadline():
+    print("\nOverall deadline of 100 ms with a 150 ms provider")
+    stubs = {"ikea": StubRetailer("ikea", 0.02), "wayfair": StubRetailer("wayfair", 0.15)}
+    retail = make_search(stubs)
+    result, elapsed = await timed_search(retail, deadline=0.1)
+    assert result["sources"]["wayfair"]["status"] == "deadline", describe(result)
+    assert elapsed < 180, f"took {elapsed:.1f} ms"
+    # Being cut off by the deadline is not the provider's fault
+    assert retail.remote["wayfair"].breaker.failures == 0
+    print(f"  {describe(result)} | {elapsed:6.1f} ms")
+
+async def circuit_breaker():
+    print(f"\nFailing provider (opens after {FAILURE_THRESHOLD} failures, {RESET_TIMEOUT * 1000:.0f} ms cool-down)")
+    stubs = {"ikea": StubRetailer("ikea", 0.01), "walmart": StubRetailer("walmart", 0.01)}
+    stubs["walmart"].failing = True
+    retail = make_search(stubs)
+    breaker = retail.remote["walmart"].breaker
+    for attempt in range(FAILURE_THRESHOLD):
+        result, elapsed = await timed_search(retail)
+        assert result["sources"]["walmart"]["status"] == "error", describe(result)
+    assert breaker.state == "open"
+
+    calls = stubs["walmart"].calls
+    result, elapsed = await timed_search(retail)
+    assert result["sources"]["walmart"]["status"] == "circuit_open", describe(result)
+    assert stubs["walmart"].calls == calls, "open circuit still called the provider"
+    print(f"  open:      {describe(result)} | {elapsed:6.1f} ms")
+
+    await asyncio.sleep(RESET_TIMEOUT)
+    stubs["walmart"].failing = False
+    result, elapsed = await timed_search(retail)
+    assert result["sources"]["walmart"]["status"] == "ok" and breaker.state == "closed", describe(result)
+    print(f"  recovered: {describe(result)} | {elapsed:6.1f} ms")
+    print(f"  walmart stats: {retail.stats()['providers']['walmart']}")
+
+async def run():
+    print("🧪 Retailer fan-out test")
+    print("=" * 60)
+    await healthy_fanout()
+    await slow_provider()
+    await overall_deadline()
+    await circuit_breaker()
+    print("\n✅ Fan-out stayed concurrent, bounded by timeouts and the deadline, and tripped and reset its circuit")
+
+def main():
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    main()
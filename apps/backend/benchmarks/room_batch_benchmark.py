@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Batch room-analysis benchmark for roomait
+Compares rooms per second for the per-room Python calculations with the
+NumPy column pass, with and without NDJSON serialization, and end to end
+through POST /api/v1/ai/room-analysis/batch
+"""
+
+import asyncio
+import json
+import os
+import sys
+import random
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from src.room_metrics import analyze_rooms, room_columns, iter_room_ndjson
+from src.routes.ai_recommendations import categorize_space_size, estimate_furniture_capacity
+
+SIZES = [1_000, 10_000, 100_000]
+ENDPOINT_BATCH = 10_000
+
+def make_rooms(count: int) -> list:
+    """Random dorm floorplans, some with a missing height"""
+    rng = random.Random(3)
+    rooms = []
+    for i in range(count):
+        dimensions = {"width": round(rng.uniform(5, 16), 2), "depth": round(rng.uniform(5, 14), 2)}
+        if rng.random() < 0.9:
+            dimensions["height"] = round(rng.uniform(7, 10), 2)
+        rooms.append({"id": f"room-{i}", "dimensions": dimensions})
+    return rooms
+
+def analyze_python(rooms: list) -> list:
+    """Per-room loop doing what /room-analysis does for each room"""
+    results = []
+    for room in rooms:
+        dimensions = room["dimensions"]
+        area = dimensions.get("width", 0) * dimensions.get("depth", 0)
+        volume = area * dimensions.get("height", 0)
+        results.append({
+            "area_sqft": round(area, 1),
+            "volume_cuft": round(volume, 1),
+            "space_category": categorize_space_size(area),
+            "furniture_capacity": estimate_furniture_capacity(area),
+            "space_efficiency": "good" if area > 80 else "challenging" if area > 50 else "very_tight",
+            "total_recommended": min(area * 15, 800)
+        })
+    return results
+
+def check_matches(rooms: list, expected: list):
+    """The column pass gives the same answers as the per-room loop"""
+    lines = [json.loads(line) for chunk in iter_room_ndjson(analyze(rooms), [r["id"] for r in rooms]) for line in chunk.splitlines()]
+    for room, line, reference in zip(rooms, lines, expected):
+        metrics = line["calculated_metrics"]
+        assert line["id"] == room["id"]
+        assert metrics["area_sqft"] == reference["area_sqft"]
+        assert metrics["volume_cuft"] == reference["volume_cuft"]
+        assert metrics["space_category"] == reference["space_category"]
+        assert metrics["furniture_capacity"] == reference["furniture_capacity"]
+        assert line["space_efficiency"] == reference["space_efficiency"]
+        assert abs(line["budget_guidance"]["total_recommended"] - reference["total_recommended"]) < 1e-6
+
+def analyze(rooms: list) -> dict:
+    columns = room_columns(rooms)
+    return analyze_rooms(columns["width"], columns["depth"], columns["height"])
+
+def rate(count: int, seconds: float) -> str:
+    return f"{count / seconds:>12,.0f} rooms/s"
+
+def run_size(count: int):
+    rooms = make_rooms(count)
+    ids = [room["id"] for room in rooms]
+    print(f"\n{count:,} rooms")
+
+    start = time.perf_counter()
+    expected = analyze_python(rooms)
+    python_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    columns = room_columns(rooms)
+    extract_time = time.perf_counter() - start
+    start = time.perf_counter()
+    metrics = analyze_rooms(columns["width"], columns["depth"], columns["height"])
+    numpy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    body = "".join(iter_room_ndjson(metrics, ids))
+    serialize_time = time.perf_counter() - start
+
+    print(f"  Python per-room loop      {python_time * 1000:9.1f} ms | {rate(count, python_time)}")
+    print(f"  NumPy column pass         {numpy_time * 1000:9.1f} ms | {rate(count, numpy_time)}")
+    print(f"  + column extraction       {(extract_time + numpy_time) * 1000:9.1f} ms | {rate(count, extract_time + numpy_time)}")
+    total = extract_time + numpy_time + serialize_time
+    print(f"  + NDJSON ({len(body) / 1e6:.1f} MB)        {total * 1000:9.1f} ms | {rate(count, total)}")
+    if count <= 10_000:
+        check_matches(rooms, expected)
+
+async def endpoint_throughput():
+    from src.main import app
+
+    rooms = make_rooms(ENDPOINT_BATCH)
+    print(f"\nPOST /api/v1/ai/room-analysis/batch with {ENDPOINT_BATCH:,} rooms")
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=60) as client:
+        timings = []
+        for _ in range(3):
+            start = time.perf_counter()
+            response = await client.post("/api/v1/ai/room-analysis/batch", json={"rooms": rooms})
+            timings.append(time.perf_counter() - start)
+            assert response.status_code == 200, response.text
+            lines = response.text.splitlines()
+            assert len(lines) == ENDPOINT_BATCH and json.loads(lines[-1])["id"] == rooms[-1]["id"]
+    best = min(timings)
+    print(f"  end to end (best of 3)    {best * 1000:9.1f} ms | {rate(ENDPOINT_BATCH, best)}")
+
+def main():
+    print("🧪 Batch room-analysis benchmark")
+    print("=" * 60)
+    for count in SIZES:
+        run_size(count)
+    asyncio.run(endpoint_throughput())
+    print("\n✅ Column pass matches the per-room calculations")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Scan listing query-count test for roomait
+Seeds scans with furniture placements in a local SQLite file, walks every page of
+GET /api/v1/ar/user/scans at several page sizes with the sync and async backends,
+and asserts each page costs the same number of SQL statements however many scans
+and placements it holds, with placement counts matching what was seeded
+"""
+
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SEED_SCANS = 120
+PAGE_SIZES = [1, 10, 50, 100]
+# One SELECT per page: scans joined to their grouped placement counts
+STATEMENTS_PER_PAGE = 1
+USER = {"sub": "auth0|scan-listing-test", "email": "test@roomait.test", "name": "Scan Listing Test"}
+
+def placements_for(index: int) -> int:
+    """Placements seeded for scan index: 0 to 6, so some scans have none"""
+    return index % 7
+
+def seed():
+    """Create tables and the user's scans, each with its own number of placements"""
+    from src.database import Base, engine, SessionLocal
+    from src.models.database_models import FurniturePlacement, RoomScan
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    # Explicit timestamps: SQLite's CURRENT_TIMESTAMP has no microseconds and would not compare with cursors
+    created = datetime(2026, 1, 1)
+    try:
+        for i in range(SEED_SCANS):
+            scan_id = f"scan-listing-{i:04d}"
+            db.add(RoomScan(
+                scan_id=scan_id, user_id=USER["sub"], room_dimensions={"width": 12, "depth": 10, "height": 8},
+                detected_surfaces=[], scan_quality=0.9, processing_metadata={"surfaces_count": 0},
+                created_at=created + timedelta(minutes=i // 2)
+            ))
+            for k in range(placements_for(i)):
+                db.add(FurniturePlacement(
+                    placement_id=f"{scan_id}-placement", scan_id=scan_id, model_id="generic-desk-study",
+                    position={"x": k, "y": 0.0, "z": 1.0}, rotation={"x": 0.0, "y": 0.0, "z": 0.0},
+                    scale={"x": 1.0, "y": 1.0, "z": 1.0}, estimated_cost=100.0
+                ))
+        db.commit()
+    finally:
+        db.close()
+
+class StatementCounter:
+    """Counts SQL statements sent on an engine"""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._count)
+
+    def _count(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+async def run():
+    import httpx
+    from src.auth import get_current_user_optional
+    from src.database import async_engine, engine
+    from src.main import app
+
+    counter = StatementCounter(async_engine.sync_engine if async_engine is not None else engine)
+    expected = {f"scan-listing-{i:04d}": placements_for(i) for i in range(SEED_SCANS)}
+
+    app.dependency_overrides[get_current_user_optional] = lambda: USER
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://scan-listing") as client:
+        for limit in PAGE_SIZES:
+            seen, statements, cursor = {}, [], None
+            start = time.perf_counter()
+            while True:
+                params = {"limit": limit, "fields": "scan_id,placement_count,created_at"}
+                if cursor:
+                    params["cursor"] = cursor
+                counter.count = 0
+                response = await client.get("/api/v1/ar/user/scans", params=params)
+                assert response.status_code == 200, response.text
+                statements.append(counter.count)
+                page = response.json()
+                seen.update({scan["scan_id"]: scan["placement_count"] for scan in page["scans"]})
+                cursor = page["next_cursor"]
+                if not cursor:
+                    break
+                assert len(statements) <= SEED_SCANS, f"limit {limit}: pagination did not terminate"
+            elapsed = (time.perf_counter() - start) * 1000
+
+            assert seen == expected, f"limit {limit}: scans or placement counts differ from the seeded data"
+            assert set(statements) == {STATEMENTS_PER_PAGE}, f"limit {limit}: statements per page {sorted(set(statements))}"
+            print(f"  limit {limit:3d} | {len(statements):3d} pages | {statements[0]} statement per page | {elapsed:7.1f} ms")
+
+def main():
+    # Child mode: the engine is chosen at import time, so each backend gets its own process
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        if sys.argv[2] == "seed":
+            seed()
+        else:
+            asyncio.run(run())
+        return
+
+    print("🧪 Scan listing query-count test")
+    print("=" * 60)
+    print(f"{SEED_SCANS} scans with 0 to 6 placements each")
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'scans.db')}")
+        subprocess.run([sys.executable, __file__, "--child", "seed"], env=env, check=True)
+        for backend, flag in (("sync", "false"), ("async", "true")):
+            print(f"\n🗄️  {backend} backend")
+            subprocess.run([sys.executable, __file__, "--child", "run"], env=dict(env, DATABASE_ASYNC=flag), check=True)
+    print(f"\n✅ Every page took {STATEMENTS_PER_PAGE} SQL statement regardless of page size")
+
+if __name__ == "__main__":
+    main()
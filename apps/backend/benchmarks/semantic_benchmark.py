@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Semantic search benchmark for roomait
+Measures IVF recall@k and latency against exact brute-force search, with and
+without a category/budget pre-filter
+"""
+
+import os
+import sys
+import random
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from src.semantic_search import SemanticIndex, build_semantic_index
+
+PRODUCTS = 100_000
+QUERIES = 200
+K = 10
+NPROBES = [1, 2, 4, 8, 16, 32, 64, 96, 128]
+
+CATEGORIES = {
+    "seating": ["chair", "stool", "bean bag", "armchair", "ottoman", "bench"],
+    "storage": ["shelf", "cube", "drawer", "cabinet", "bookcase", "organizer"],
+    "desk": ["desk", "table", "workstation", "standing desk", "laptop stand"],
+    "lighting": ["lamp", "floor lamp", "string lights", "desk lamp", "sconce"],
+    "bedding": ["comforter", "pillow", "mattress topper", "duvet", "sheet set"],
+}
+ADJECTIVES = ["compact", "modern", "ergonomic", "foldable", "stackable", "rustic", "minimal", "cozy",
+              "adjustable", "industrial", "scandinavian", "portable", "padded", "slim", "modular"]
+MATERIALS = ["mesh", "oak", "pine", "metal", "fabric", "velvet", "leather", "bamboo", "plastic", "linen"]
+COLORS = ["white", "black", "grey", "walnut", "navy", "beige", "green", "pink"]
+STORES = ["IKEA", "Amazon", "Wayfair", "Target", "Walmart"]
+
+def make_products(count: int) -> list:
+    """Random products with catalog-shaped text fields"""
+    rng = random.Random(7)
+    products = []
+    for i in range(count):
+        category = rng.choice(list(CATEGORIES))
+        noun = rng.choice(CATEGORIES[category])
+        words = rng.sample(ADJECTIVES, 2) + [rng.choice(COLORS), rng.choice(MATERIALS), noun]
+        products.append({
+            "product_name": f"{' '.join(words)} {i}",
+            "category": category,
+            "store": rng.choice(STORES),
+            "price": round(rng.uniform(10, 400), 2),
+            "specifications": {"material": rng.choice(MATERIALS), "style": rng.choice(ADJECTIVES)},
+        })
+    return products
+
+def make_queries(count: int) -> list:
+    rng = random.Random(11)
+    queries = []
+    for _ in range(count):
+        category = rng.choice(list(CATEGORIES))
+        queries.append(f"{rng.choice(ADJECTIVES)} {rng.choice(MATERIALS)} {rng.choice(CATEGORIES[category])}")
+    return queries
+
+def run(label: str, index: SemanticIndex, vectors: list, candidate_sets: list):
+    # Many products tie on score, so a hit counts when it scores at least the exact k-th best
+    thresholds = []
+    start = time.perf_counter()
+    for query, candidates in zip(vectors, candidate_sets):
+        thresholds.append(index.ivf.brute_force(query, K, candidates)[1][-1] - 1e-6)
+    brute_ms = (time.perf_counter() - start) * 1000 / len(vectors)
+    print(f"\n{label}")
+    print(f"  brute force       {brute_ms:7.3f} ms/query | recall@{K} 1.000")
+
+    for nprobe in NPROBES:
+        found = 0
+        start = time.perf_counter()
+        results = [index.search(query, K, candidates, nprobe)[1] for query, candidates in zip(vectors, candidate_sets)]
+        ivf_ms = (time.perf_counter() - start) * 1000 / len(vectors)
+        for scores, threshold in zip(results, thresholds):
+            found += int(np.sum(scores >= threshold))
+        recall = found / (K * len(vectors))
+        print(f"  ivf nprobe={nprobe:<3}    {ivf_ms:7.3f} ms/query | recall@{K} {recall:.3f} | "
+              f"{brute_ms / ivf_ms:5.1f}x")
+
+def main():
+    print(f"🔎 Semantic search: IVF vs brute force ({PRODUCTS:,} products, {QUERIES} queries)")
+    print("=" * 60)
+    products = make_products(PRODUCTS)
+
+    start = time.perf_counter()
+    built = build_semantic_index(products, "benchmark")
+    print(f"Index built in {time.perf_counter() - start:.1f}s "
+          f"({len(built.ivf.centroids)} lists, {built.vectorizer.dim} dims)")
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Query the memory-mapped copy, as the API does with an offline index
+        built.save(directory)
+        index = SemanticIndex.load(directory)
+
+        queries = make_queries(QUERIES)
+        vectors = [index.embed_query(q) for q in queries]
+        run("Unfiltered", index, vectors, [None] * len(vectors))
+
+        # Category and budget pre-filter, as applied by the product search endpoint
+        categories = np.array([p["category"] for p in products])
+        prices = np.array([p["price"] for p in products])
+        rng = random.Random(3)
+        candidate_sets = []
+        for _ in vectors:
+            low = rng.uniform(10, 200)
+            mask = (categories == rng.choice(list(CATEGORIES))) & (prices >= low) & (prices <= low + 150)
+            candidate_sets.append(np.flatnonzero(mask))
+        average = sum(len(c) for c in candidate_sets) / len(candidate_sets)
+        run(f"Category + budget pre-filter (~{average:,.0f} candidates)", index, vectors, candidate_sets)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+from contextlib import suppress
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+from sqlalchemy import Column, DateTime, Integer, String, and_, delete, insert, select, update
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+import asyncio
+import os
+import sys
+import time
+
+from src.database import Base, SessionLocal
+from src.catalog_seed import dialect_insert
+from src.room_metrics import space_size_category
+from src.models.database_models import ProductSearch
+
+# Search events held in memory awaiting a flush; further events are dropped (and counted) once full
+ANALYTICS_BUFFER_SIZE = int(os.getenv("ANALYTICS_BUFFER_SIZE", "10000"))
+# Rows per multi-row INSERT
+ANALYTICS_BATCH_SIZE = int(os.getenv("ANALYTICS_BATCH_SIZE", "500"))
+# Longest an event waits in the buffer before its batch is flushed, in seconds
+ANALYTICS_FLUSH_INTERVAL = float(os.getenv("ANALYTICS_FLUSH_INTERVAL", "2.0"))
+
+# Rollup time buckets (UTC, matching ProductSearch.created_at)
+ROLLUP_GRANULARITIES = ("hour", "day")
+# Budget bands by the top of the requested budget range, in dollars
+BUDGET_BUCKET_EDGES = [50, 100, 200, 500]
+ROLLUP_KEY_COLUMNS = ["granularity", "bucket_start", "category", "budget_bucket", "room_size_bucket"]
+
+class SearchRollup(Base):
+    """Product search counts per time bucket, category, budget band and room size band"""
+    __tablename__ = "search_rollups"
+
+    granularity = Column(String(8), primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    category = Column(String(100), primary_key=True)
+    budget_bucket = Column(String(16), primary_key=True)
+    room_size_bucket = Column(String(16), primary_key=True)
+    search_count = Column(Integer, nullable=False, default=0)
+    zero_result_count = Column(Integer, nullable=False, default=0)
+
+def bucket_start(timestamp: datetime, granularity: str) -> datetime:
+    """Start of the hour or day containing timestamp"""
+    start = timestamp.replace(minute=0, second=0, microsecond=0)
+    return start.replace(hour=0) if granularity == "day" else start
+
+def budget_bucket(room_context: Dict) -> str:
+    budget_max = ((room_context or {}).get("budget_range") or {}).get("max")
+    if budget_max is None:
+        return "unknown"
+    lower = 0
+    for edge in BUDGET_BUCKET_EDGES:
+        if budget_max < edge:
+            return f"{lower}-{edge}"
+        lower = edge
+    return f"{lower}+"
+
+def room_size_bucket(room_context: Dict) -> str:
+    dimensions = (room_context or {}).get("dimensions") or {}
+    if "width" not in dimensions or "depth" not in dimensions:
+        return "unknown"
+    # Same bands as the space_category of /room-analysis
+    return space_size_category(dimensions["width"] * dimensions["depth"])
+
+def aggregate_rollups(rows: Iterable[Dict], counts: Optional[Dict] = None) -> Dict[tuple, List[int]]:
+    """Fold search rows into [search_count, zero_result_count] per rollup key"""
+    counts = {} if counts is None else counts
+    for row in rows:
+        dimensions = (row.get("category") or "", budget_bucket(row.get("room_context")), room_size_bucket(row.get("room_context")))
+        for granularity in ROLLUP_GRANULARITIES:
+            totals = counts.setdefault((granularity, bucket_start(row["created_at"], granularity)) + dimensions, [0, 0])
+            totals[0] += 1
+            totals[1] += row.get("results_count") == 0
+    return counts
+
+def apply_rollups(db: Session, counts: Dict[tuple, List[int]]):
+    """Add aggregated counts onto the stored rollups; the caller commits"""
+    if not counts:
+        return
+    rows = [
+        dict(zip(ROLLUP_KEY_COLUMNS, key), search_count=totals[0], zero_result_count=totals[1])
+        for key, totals in counts.items()
+    ]
+    upsert = dialect_insert(db.get_bind().dialect.name)
+    if upsert is not None:
+        statement = upsert(SearchRollup)
+        db.execute(statement.on_conflict_do_update(
+            index_elements=ROLLUP_KEY_COLUMNS,
+            set_={
+                "search_count": SearchRollup.search_count + statement.excluded.search_count,
+                "zero_result_count": SearchRollup.zero_result_count + statement.excluded.zero_result_count,
+            }
+        ), rows)
+        return
+
+    # Other databases: increment existing rollups, insert the rest
+    for row in rows:
+        key = and_(*[getattr(SearchRollup, column) == row[column] for column in ROLLUP_KEY_COLUMNS])
+        result = db.execute(update(SearchRollup).where(key).values(
+            search_count=SearchRollup.search_count + row["search_count"],
+            zero_result_count=SearchRollup.zero_result_count + row["zero_result_count"]
+        ))
+        if result.rowcount == 0:
+            db.execute(insert(SearchRollup), [row])
+
+def backfill_rollups(db: Session, since: datetime, chunk_size: int = 5000) -> int:
+    """Rebuild rollups from raw ProductSearch rows from the start of since's day onwards
+
+    Run while the analytics sink is idle (e.g. before enabling it); returns rows scanned.
+    """
+    since = bucket_start(since, "day")
+    db.execute(delete(SearchRollup).where(SearchRollup.bucket_start >= since))
+    counts, scanned = {}, 0
+    result = db.execute(
+        select(ProductSearch.category, ProductSearch.room_context, ProductSearch.results_count, ProductSearch.created_at)
+        .where(ProductSearch.created_at >= since)
+        .execution_options(yield_per=chunk_size)
+    )
+    for partition in result.partitions():
+        aggregate_rollups((row._mapping for row in partition), counts)
+        scanned += len(partition)
+    apply_rollups(db, counts)
+    db.commit()
+    return scanned
+
+def write_search_events(rows: List[Dict]):
+    """Insert one batch of ProductSearch rows and fold it into the rollups, in one transaction"""
+    db = SessionLocal()
+    try:
+        db.execute(insert(ProductSearch), rows)
+        apply_rollups(db, aggregate_rollups(rows))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+class SearchAnalyticsSink:
+    """Write-behind buffer for ProductSearch rows, flushed in batches by size or age"""
+
+    def __init__(self, max_buffer: int = ANALYTICS_BUFFER_SIZE, batch_size: int = ANALYTICS_BATCH_SIZE,
+                 flush_interval: float = ANALYTICS_FLUSH_INTERVAL,
+                 writer: Callable[[List[Dict]], None] = write_search_events):
+        self.max_buffer = max_buffer
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._writer = writer
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._flushing: Optional[asyncio.Future] = None
+        self._closing = False
+        # Events taken off the queue for the batch being assembled
+        self._pending: List[Dict] = []
+        self.recorded = 0
+        self.dropped = 0
+        self.flushed = 0
+        self.batches = 0
+        self.failed = 0
+        self.last_flush_ms = 0.0
+
+    def _get_queue(self) -> asyncio.Queue:
+        # Created lazily so it belongs to the running event loop
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_buffer)
+        return self._queue
+
+    def record(self, event: Dict):
+        """Buffer one search event; never blocks, drops the event if the buffer is full"""
+        try:
+            self._get_queue().put_nowait(event)
+            self.recorded += 1
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    def start(self):
+        """Start the background flush loop"""
+        if self._task is None:
+            self._closing = False
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        """Stop the flush loop and write out everything still buffered"""
+        if self._task is not None:
+            # wait_for can swallow a cancel that races a queue item, so the loop also checks the flag
+            self._closing = True
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        if self._flushing is not None:
+            await self._flushing
+        remaining, self._pending = self._pending, []
+        queue = self._get_queue()
+        while not queue.empty():
+            remaining.append(queue.get_nowait())
+        for start in range(0, len(remaining), self.batch_size):
+            await self._flush(remaining[start:start + self.batch_size])
+        # The drained queue belongs to this event loop; a later start() gets a fresh one
+        self._queue = None
+
+    async def _run(self):
+        while not self._closing:
+            await self._fill_batch()
+            batch, self._pending = self._pending, []
+            # Shielded so shutdown waits for an in-progress write instead of abandoning it
+            self._flushing = asyncio.ensure_future(self._flush(batch))
+            await asyncio.shield(self._flushing)
+
+    async def _fill_batch(self):
+        queue = self._get_queue()
+        loop = asyncio.get_running_loop()
+        self._pending.append(await queue.get())
+        deadline = loop.time() + self.flush_interval
+        while len(self._pending) < self.batch_size:
+            if not queue.empty():
+                self._pending.append(queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                return
+            try:
+                self._pending.append(await asyncio.wait_for(queue.get(), timeout))
+            except asyncio.TimeoutError:
+                return
+
+    async def _flush(self, batch: List[Dict]):
+        if not batch:
+            return
+        start = time.perf_counter()
+        try:
+            await run_in_threadpool(self._writer, batch)
+            self.flushed += len(batch)
+            self.batches += 1
+        except Exception as e:
+            self.failed += len(batch)
+            print(f"⚠️  Search analytics flush of {len(batch)} rows failed: {e}")
+        self.last_flush_ms = round((time.perf_counter() - start) * 1000, 3)
+
+    def stats(self) -> dict:
+        """Sink counters for monitoring"""
+        return {
+            "buffered": (self._queue.qsize() if self._queue is not None else 0) + len(self._pending),
+            "capacity": self.max_buffer,
+            "recorded": self.recorded,
+            "dropped": self.dropped,
+            "flushed": self.flushed,
+            "batches": self.batches,
+            "failed": self.failed,
+            "last_flush_ms": self.last_flush_ms,
+        }
+
+# Global search analytics sink
+search_analytics = SearchAnalyticsSink()
+
+def main():
+    """Rebuild search rollups: python -m src.analytics backfill <since, ISO date>"""
+    if len(sys.argv) < 3 or sys.argv[1] != "backfill":
+        print(main.__doc__)
+        sys.exit(1)
+
+    db = SessionLocal()
+    try:
+        scanned = backfill_rollups(db, datetime.fromisoformat(sys.argv[2]))
+        print(f"✅ Rebuilt search rollups from {scanned} searches")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -2,8 +2,14 @@ from functools import wraps
 from fastapi import HTTPException, Security, Depends
 from fastapi.security import HTTPBearer
 from jose import jwt, JWTError
-import requests
+import asyncio
+import httpx
+import hashlib
+import json
 import os
+import threading
+import time
+from collections import OrderedDict
 from typing import Optional
 
 # Auth0 configuration
@@ -11,35 +17,226 @@ AUTH0_DOMAIN = os.getenv("AUTH0_DOMAIN")
 AUTH0_API_AUDIENCE = os.getenv("AUTH0_AUDIENCE", "")
 AUTH0_ALGORITHMS = ["RS256"]
 
+# JWKS location; override with a file:// URL or a local stub server for testing
+AUTH0_JWKS_URL = os.getenv("AUTH0_JWKS_URL", f"https://{AUTH0_DOMAIN}/.well-known/jwks.json")
+JWKS_CACHE_TTL = float(os.getenv("AUTH0_JWKS_CACHE_TTL", "600"))
+JWKS_REFRESH_MIN_INTERVAL = float(os.getenv("AUTH0_JWKS_REFRESH_MIN_INTERVAL", "30"))
+JWKS_FETCH_TIMEOUT = float(os.getenv("AUTH0_JWKS_FETCH_TIMEOUT", "5"))
+AUTH_HTTP_MAX_CONNECTIONS = int(os.getenv("AUTH_HTTP_MAX_CONNECTIONS", "10"))
+
+# Verified-token cache; 0 disables it
+TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "1024"))
+
 # JWT Bearer token security
 bearer = HTTPBearer()
+optional_bearer = HTTPBearer(auto_error=False)
+
+# Shared connection pool for identity provider calls, created lazily inside the event loop
+_http_client: Optional[httpx.AsyncClient] = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the shared async HTTP client used for JWKS fetches"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=JWKS_FETCH_TIMEOUT,
+            limits=httpx.Limits(max_connections=AUTH_HTTP_MAX_CONNECTIONS, max_keepalive_connections=AUTH_HTTP_MAX_CONNECTIONS)
+        )
+    return _http_client
 
-def get_auth0_public_key():
-    """Get Auth0 public key for JWT verification"""
+async def close_http_client():
+    """Close the shared HTTP client on application shutdown"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+def _read_jwks_file(path: str) -> dict:
+    with open(path, "r") as f:
+        return json.load(f)
+
+async def get_auth0_public_key(url: Optional[str] = None) -> dict:
+    """Get Auth0 public key set (JWKS) for JWT verification"""
+    url = url or AUTH0_JWKS_URL
     try:
-        response = requests.get(f"https://{AUTH0_DOMAIN}/.well-known/jwks.json")
-        jwks = response.json()
-        return jwks
+        if url.startswith("file://"):
+            return await asyncio.to_thread(_read_jwks_file, url[len("file://"):])
+        response = await get_http_client().get(url)
+        response.raise_for_status()
+        return response.json()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get Auth0 public key: {str(e)}")
 
-def verify_token(token: str) -> dict:
+class JWKSCache:
+    """Signing keys indexed by kid, refreshed on TTL expiry or on an unknown kid"""
+
+    def __init__(self, fetch=get_auth0_public_key, ttl: float = JWKS_CACHE_TTL,
+                 min_refresh_interval: float = JWKS_REFRESH_MIN_INTERVAL, clock=time.monotonic):
+        self._fetch = fetch
+        self._ttl = ttl
+        self._min_refresh_interval = min_refresh_interval
+        self._clock = clock
+        # Serializes refreshes so concurrent misses coalesce into a single fetch
+        self._lock = asyncio.Lock()
+        self._keys = {}
+        self._fetched_at = None
+        self._last_refresh = None
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.throttled_refreshes = 0
+
+    async def _refresh(self):
+        # Called with the lock held
+        now = self._clock()
+        self._last_refresh = now
+        self.refreshes += 1
+        try:
+            jwks = await self._fetch()
+        except HTTPException:
+            # Keep serving the previous key set if the identity provider is unreachable
+            if not self._keys:
+                raise
+            return
+        self._keys = {jwk["kid"]: jwk for jwk in jwks.get("keys", []) if "kid" in jwk}
+        self._fetched_at = now
+
+    def _is_expired(self) -> bool:
+        return self._fetched_at is None or self._clock() - self._fetched_at >= self._ttl
+
+    def _may_refresh(self) -> bool:
+        return self._last_refresh is None or self._clock() - self._last_refresh >= self._min_refresh_interval
+
+    async def get_key(self, kid: str) -> Optional[dict]:
+        """Return the JWK for kid, refetching at most once per refresh interval on a miss"""
+        # Fast path: no lock and no await when the key set is fresh
+        if not self._is_expired():
+            key = self._keys.get(kid)
+            if key:
+                self.hits += 1
+                return key
+
+        async with self._lock:
+            # Re-check after waiting: another request may have just refreshed
+            if self._is_expired() and self._may_refresh():
+                await self._refresh()
+
+            key = self._keys.get(kid)
+            if key:
+                self.hits += 1
+                return key
+
+            self.misses += 1
+            # Unknown kid: Auth0 may have rotated keys. Rate limited so forged kids can't cause a refetch storm
+            if self._may_refresh():
+                await self._refresh()
+                return self._keys.get(kid)
+
+            self.throttled_refreshes += 1
+            return None
+
+    def clear(self):
+        """Drop all cached keys and counters"""
+        self._keys = {}
+        self._fetched_at = None
+        self._last_refresh = None
+        self.hits = self.misses = self.refreshes = self.throttled_refreshes = 0
+
+    def stats(self) -> dict:
+        """Cache counters for monitoring"""
+        return {
+            "keys": len(self._keys),
+            "hits": self.hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "throttled_refreshes": self.throttled_refreshes,
+        }
+
+class TokenCache:
+    """Bounded LRU of verified token payloads, keyed by token hash and held until exp"""
+
+    def __init__(self, max_size: int = TOKEN_CACHE_SIZE, clock=time.time):
+        self._max_size = max_size
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _key(token: str) -> str:
+        # Never keep raw bearer tokens in memory longer than needed
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[dict]:
+        """Return the cached payload for token, or None if absent or expired"""
+        if self._max_size <= 0:
+            return None
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            payload, expires_at = entry
+            if self._clock() >= expires_at:
+                del self._entries[key]
+                self.evictions += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload
+
+    def put(self, token: str, payload: dict):
+        """Cache a verified payload until its exp claim"""
+        expires_at = payload.get("exp")
+        if self._max_size <= 0 or not isinstance(expires_at, (int, float)):
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (payload, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop all cached payloads and counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        """Cache counters for monitoring"""
+        return {
+            "size": len(self._entries),
+            "max_size": self._max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+# Shared process-wide caches
+jwks_cache = JWKSCache()
+token_cache = TokenCache()
+
+async def verify_token(token: str) -> dict:
     """Verify Auth0 JWT token"""
+    # Repeated bearer tokens skip the RS256 signature check until they expire
+    cached = token_cache.get(token)
+    if cached is not None:
+        return cached
+
     try:
-        # Get the public key
-        jwks = get_auth0_public_key()
-        
         # Decode the header to get key ID
         unverified_header = jwt.get_unverified_header(token)
-        key_id = unverified_header["kid"]
-        
+        key_id = unverified_header.get("kid")
+
         # Find the correct key
-        key = None
-        for jwk in jwks["keys"]:
-            if jwk["kid"] == key_id:
-                key = jwk
-                break
-        
+        key = await jwks_cache.get_key(key_id) if key_id else None
+
         if not key:
             raise HTTPException(status_code=401, detail="Invalid token key")
         
@@ -51,15 +248,18 @@ def verify_token(token: str) -> dict:
             audience=AUTH0_API_AUDIENCE,
             issuer=f"https://{AUTH0_DOMAIN}/"
         )
-        
+
+        token_cache.put(token, payload)
         return payload
         
+    except HTTPException:
+        raise
     except JWTError as e:
         raise HTTPException(status_code=401, detail=f"Token verification failed: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Authentication error: {str(e)}")
 
-def get_current_user(token: str = Security(bearer)) -> dict:
+async def get_current_user(token: str = Security(bearer)) -> dict:
     """Dependency to get current authenticated user"""
     if not AUTH0_DOMAIN:
         raise HTTPException(status_code=500, detail="Auth0 configuration missing")
@@ -70,19 +270,28 @@ def get_current_user(token: str = Security(bearer)) -> dict:
     else:
         token_str = str(token)
     
-    payload = verify_token(token_str)
+    payload = await verify_token(token_str)
     return payload
 
-def get_current_user_optional(token: Optional[str] = Security(bearer, auto_error=False)) -> Optional[dict]:
+async def get_current_user_optional(token: Optional[str] = Security(optional_bearer)) -> Optional[dict]:
     """Optional authentication - returns None if no token provided"""
     if not token:
         return None
     
     try:
-        return get_current_user(token)
+        return await get_current_user(token)
     except HTTPException:
         return None
 
+def require_scope(scope: str):
+    """Dependency requiring a token that grants scope, in Auth0's permissions or scope claim"""
+    async def current_user_with_scope(current_user: dict = Depends(get_current_user)) -> dict:
+        granted = set(current_user.get("permissions") or []) | set((current_user.get("scope") or "").split())
+        if scope not in granted:
+            raise HTTPException(status_code=403, detail=f"Missing required scope: {scope}")
+        return current_user
+    return current_user_with_scope
+
 # Decorator for protected routes
 def auth_required(f):
     """Decorator to require authentication"""
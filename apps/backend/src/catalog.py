@@ -0,0 +1,274 @@
+from sqlalchemy import Column, DDL, Integer, String, event, insert, select, func, update
+from sqlalchemy.orm import Session
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from itertools import islice
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import hashlib
+import heapq
+import json
+import os
+import time
+
+from src.database import Base, execute
+from src.pagination import decode_cursor, encode_cursor
+from src.models.database_models import GenericModel
+
+# How often to check the database for catalog writes made by other processes (e.g. init_db.py)
+CATALOG_REFRESH_INTERVAL = float(os.getenv("CATALOG_REFRESH_INTERVAL", "60"))
+# Rendered page variants kept per snapshot
+CATALOG_RENDER_CACHE_SIZE = int(os.getenv("CATALOG_RENDER_CACHE_SIZE", "256"))
+
+# Catalog fields clients can request via fields=: field -> serializer
+MODEL_FIELDS = {
+    "model_id": lambda m: m.model_id,
+    "category": lambda m: m.category,
+    "subcategory": lambda m: m.subcategory,
+    "display_name": lambda m: m.display_name,
+    "description": lambda m: m.description,
+    "model_url": lambda m: m.model_url,
+    "thumbnail_url": lambda m: m.thumbnail_url,
+    "dimensions": lambda m: {"width": m.width, "depth": m.depth, "height": m.height},
+    "technical_specs": lambda m: {"polygon_count": m.polygon_count, "file_size_mb": m.file_size_mb},
+}
+
+# Dimensions that can be filtered with max_<dimension>=, in inches
+DIMENSIONS = ("width", "depth", "height")
+
+# Use the sorted dimension array when the tightest bound keeps at most 1/N of a bucket;
+# looser filters walk the bucket in page order and stop once the page is full
+SELECTIVE_FRACTION = 8
+
+class CatalogVersion(Base):
+    """Write counter for generic_models, part of the fingerprint that tells servers to rebuild"""
+    __tablename__ = "catalog_versions"
+
+    name = Column(String(32), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+CATALOG_VERSION_NAME = "generic_models"
+event.listen(CatalogVersion.__table__, "after_create", DDL(
+    f"INSERT INTO catalog_versions (name, version) VALUES ('{CATALOG_VERSION_NAME}', 0)"
+))
+
+def bump_catalog_version(db):
+    """Mark the catalog as changed in db's transaction; needed after Core writes to generic_models
+
+    An upsert, so the counter row is created if the table came from a migration or a
+    restore rather than create_all.
+    """
+    # Imported here: catalog_seed imports this module
+    from src.catalog_seed import dialect_insert
+
+    upsert = dialect_insert(db.get_bind().dialect.name)
+    if upsert is not None:
+        statement = upsert(CatalogVersion).values(name=CATALOG_VERSION_NAME, version=1)
+        db.execute(statement.on_conflict_do_update(
+            index_elements=[CatalogVersion.name],
+            set_={"version": CatalogVersion.version + 1}
+        ))
+        return
+
+    # Other databases: update, then insert the row if there was none
+    result = db.execute(
+        update(CatalogVersion)
+        .where(CatalogVersion.name == CATALOG_VERSION_NAME)
+        .values(version=CatalogVersion.version + 1)
+    )
+    if result.rowcount == 0:
+        db.execute(insert(CatalogVersion).values(name=CATALOG_VERSION_NAME, version=1))
+
+@event.listens_for(Session, "after_flush")
+def _bump_on_model_flush(session, flush_context):
+    """ORM inserts, updates and deletes of GenericModel bump the catalog version"""
+    changed = [obj for obj in session.new if isinstance(obj, GenericModel)]
+    changed += [obj for obj in session.deleted if isinstance(obj, GenericModel)]
+    changed += [obj for obj in session.dirty if isinstance(obj, GenericModel) and session.is_modified(obj)]
+    if changed:
+        bump_catalog_version(session)
+
+def _dumps(data) -> bytes:
+    return json.dumps(data, separators=(",", ":"), default=str).encode()
+
+class _Bucket:
+    """Row indices for one (category, subcategory) filter, plus per-dimension sort orders"""
+
+    def __init__(self, indices: List[int], dimensions: Dict[str, List[float]]):
+        # Snapshot (newest first) order, so pages can bisect on the cursor position
+        self.indices = indices
+        self.sorted = {}
+        for dimension, values in dimensions.items():
+            order = sorted(indices, key=values.__getitem__)
+            self.sorted[dimension] = ([values[i] for i in order], order)
+
+class CatalogSnapshot:
+    """Immutable, pre-serialized view of the active generic models"""
+
+    def __init__(self, models: list):
+        # Newest first on (created_at, model_id), matching the keyset cursor order
+        rows = sorted(
+            ((m.created_at or datetime.min, m.model_id, {field: serialize(m) for field, serialize in MODEL_FIELDS.items()})
+             for m in models),
+            key=lambda row: (row[0], row[1]),
+            reverse=True
+        )
+        self.keys = [(created_at, model_id) for created_at, model_id, _ in rows]
+        self.models = [model for _, _, model in rows]
+        # Model dimensions (inches) by model_id, for placement checks
+        self.dimensions = {model["model_id"]: model["dimensions"] for model in self.models}
+        # Ascending copy of the keys for bisecting cursor positions
+        self._ascending_keys = self.keys[::-1]
+        self._build_index()
+        self.version = hashlib.sha256(_dumps([[k[0], k[1], m] for k, m in zip(self.keys, self.models)])).hexdigest()[:16]
+        self._rendered = {}
+
+    def _build_index(self):
+        # Missing dimensions never satisfy a max_<dimension> bound
+        self._dimensions = {
+            dimension: [
+                float(m["dimensions"][dimension]) if m["dimensions"][dimension] is not None else float("inf")
+                for m in self.models
+            ]
+            for dimension in DIMENSIONS
+        }
+        groups = {}
+        for i, model in enumerate(self.models):
+            category, subcategory = model["category"], model["subcategory"]
+            # A model without a subcategory would otherwise land in its buckets twice
+            for key in {(None, None), (category, None), (None, subcategory), (category, subcategory)}:
+                groups.setdefault(key, []).append(i)
+        self._buckets = {key: _Bucket(indices, self._dimensions) for key, indices in groups.items()}
+
+    def select(self, start: int, count: int, category: Optional[str] = None,
+               subcategory: Optional[str] = None, max_dimensions: Optional[Dict[str, float]] = None) -> List[int]:
+        """Indices of the first count matching rows at or after start, in snapshot order"""
+        bucket = self._buckets.get((category, subcategory))
+        if bucket is None:
+            return []
+        bounds = {d: v for d, v in (max_dimensions or {}).items() if v is not None}
+        offset = bisect_left(bucket.indices, start)
+        if not bounds:
+            return bucket.indices[offset:offset + count]
+
+        # Pick the bound that leaves the fewest candidates in its sorted dimension array
+        dimension, fitting = min(
+            ((d, bisect_right(bucket.sorted[d][0], bound)) for d, bound in bounds.items()),
+            key=lambda candidate: candidate[1]
+        )
+        if fitting * SELECTIVE_FRACTION <= len(bucket.indices):
+            # The chosen bound holds for every candidate; only the others need checking
+            candidates = [i for i in islice(bucket.sorted[dimension][1], fitting) if i >= start]
+            for other, bound in bounds.items():
+                if other != dimension:
+                    values = self._dimensions[other]
+                    candidates = [i for i in candidates if values[i] <= bound]
+            return heapq.nsmallest(count, candidates)
+
+        checks = [(self._dimensions[d], bound) for d, bound in bounds.items()]
+        page = []
+        for i in islice(bucket.indices, offset, None):
+            for values, bound in checks:
+                if values[i] > bound:
+                    break
+            else:
+                page.append(i)
+                if len(page) == count:
+                    break
+        return page
+
+    def _page_start(self, cursor: Optional[str]) -> int:
+        if not cursor:
+            return 0
+        position = decode_cursor(cursor)
+        # Rows strictly older than the cursor are the tail of the newest-first list
+        older = bisect_left(self._ascending_keys, position)
+        return len(self.keys) - older
+
+    def render(self, limit: int, cursor: Optional[str], fields: List[str], category: Optional[str] = None,
+               subcategory: Optional[str] = None, max_dimensions: Optional[Dict[str, float]] = None) -> Tuple[bytes, str]:
+        """Serialize one filtered page and return (body, strong ETag)"""
+        start = self._page_start(cursor)
+        page = self.select(start, limit + 1, category, subcategory, max_dimensions)
+        next_cursor = None
+        if len(page) > limit:
+            page = page[:limit]
+            next_cursor = encode_cursor(*self.keys[page[-1]])
+
+        all_fields = set(fields) == set(MODEL_FIELDS)
+        models = [
+            self.models[i] if all_fields else {field: self.models[i][field] for field in fields}
+            for i in page
+        ]
+        body = _dumps({
+            "models": models,
+            "count": len(models),
+            "next_cursor": next_cursor,
+            "catalog_version": self.version,
+            "status": "success"
+        })
+        etag = f'"{self.version}-{hashlib.sha256(body).hexdigest()[:16]}"'
+        return body, etag
+
+    def render_cached(self, variant: tuple, build) -> Tuple[bytes, str]:
+        """Memoize rendered pages per request variant for the life of this snapshot"""
+        rendered = self._rendered.get(variant)
+        if rendered is None:
+            if len(self._rendered) >= CATALOG_RENDER_CACHE_SIZE:
+                self._rendered.clear()
+            rendered = self._rendered[variant] = build()
+        return rendered
+
+class ModelCatalog:
+    """Process-wide generic model catalog, rebuilt only when the table changes"""
+
+    def __init__(self, refresh_interval: float = CATALOG_REFRESH_INTERVAL):
+        self._refresh_interval = refresh_interval
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._fingerprint = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+        self.rebuilds = 0
+
+    def invalidate(self):
+        """Drop the snapshot; the next request rebuilds it"""
+        self._snapshot = None
+        self._fingerprint = None
+
+    async def _load_fingerprint(self, db):
+        # Count and newest row catch plain inserts; the version counter catches updates and deletes
+        version = select(CatalogVersion.version).where(CatalogVersion.name == CATALOG_VERSION_NAME).scalar_subquery()
+        result = await execute(db, select(
+            func.count(), func.max(GenericModel.created_at), version
+        ).select_from(GenericModel).where(GenericModel.is_active == True))
+        return tuple(result.one())
+
+    async def get(self, db) -> CatalogSnapshot:
+        """Return the current snapshot, rebuilding it if invalidated or changed elsewhere"""
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - self._checked_at < self._refresh_interval:
+            return snapshot
+
+        async with self._lock:
+            # Another request may have rebuilt the snapshot while we waited
+            if self._snapshot is not None and time.monotonic() - self._checked_at < self._refresh_interval:
+                return self._snapshot
+
+            fingerprint = await self._load_fingerprint(db)
+            if self._snapshot is None or fingerprint != self._fingerprint:
+                result = await execute(db, select(GenericModel).where(GenericModel.is_active == True))
+                self._snapshot = CatalogSnapshot(result.scalars().all())
+                self._fingerprint = fingerprint
+                self.rebuilds += 1
+            self._checked_at = time.monotonic()
+            return self._snapshot
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Strong comparison of an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+# Shared process-wide catalog
+model_catalog = ModelCatalog()
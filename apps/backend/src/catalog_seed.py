@@ -0,0 +1,218 @@
+from sqlalchemy import select, update, bindparam
+from sqlalchemy.orm import Session
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List
+import json
+import os
+import time
+
+from src.catalog import bump_catalog_version
+from src.models.database_models import GenericModel
+
+# Rows per INSERT ... ON CONFLICT statement (and per transaction)
+SEED_CHUNK_SIZE = int(os.getenv("SEED_CHUNK_SIZE", "1000"))
+# Bytes read from the source file at a time
+SEED_READ_SIZE = 64 * 1024
+
+# Columns written by seeding; model_id is the conflict key
+SEED_COLUMNS = [
+    "model_id", "category", "subcategory", "display_name", "description", "model_url", "thumbnail_url",
+    "width", "depth", "height", "polygon_count", "file_size_mb", "is_active"
+]
+
+def normalize_model(data: Dict) -> Dict:
+    """Map a catalog record (data file or flat API shape) onto GenericModel columns"""
+    dimensions = data.get("typical_dimensions") or data
+    return {
+        "model_id": data["model_id"],
+        "category": data["category"],
+        "subcategory": data.get("subcategory"),
+        "display_name": data["display_name"],
+        "description": data.get("description"),
+        "model_url": data["model_url"],
+        "thumbnail_url": data.get("thumbnail_url") or data.get("thumbnail"),
+        "width": dimensions.get("width"),
+        "depth": dimensions.get("depth"),
+        "height": dimensions.get("height"),
+        "polygon_count": data.get("polygon_count", 3000),  # Estimated for mobile AR
+        "file_size_mb": data.get("file_size_mb", 2.5),      # Estimated compressed GLB size
+        "is_active": data.get("is_active", True)
+    }
+
+class _JSONStream:
+    """Incremental reader that decodes one JSON value at a time from a file"""
+
+    def __init__(self, f):
+        self._f = f
+        self._decoder = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        data = self._f.read(SEED_READ_SIZE)
+        if not data:
+            self._eof = True
+            return False
+        # Drop consumed text so memory stays bounded by one chunk plus one record
+        self._buf = self._buf[self._pos:] + data
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in " \t\r\n":
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise ValueError(f"Expected '{char}' at offset {self._pos} of catalog file")
+        self._pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+                # A number ending exactly at the buffer edge may continue in the next chunk
+                if end < len(self._buf) or self._eof:
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            self._fill()
+
+def _iter_array(stream: _JSONStream) -> Iterator[Dict]:
+    stream.expect("[")
+    if stream.peek() == "]":
+        stream.expect("]")
+        return
+    while True:
+        yield stream.value()
+        if stream.peek() == "]":
+            stream.expect("]")
+            return
+        stream.expect(",")
+
+def iter_json_models(f, key: str = "models") -> Iterator[Dict]:
+    """Stream records from a top-level JSON array or from the array under key in a JSON object"""
+    stream = _JSONStream(f)
+    if stream.peek() == "[":
+        yield from _iter_array(stream)
+        return
+
+    stream.expect("{")
+    while stream.peek() != "}":
+        name = stream.value()
+        stream.expect(":")
+        if name == key:
+            yield from _iter_array(stream)
+        else:
+            stream.value()
+        if stream.peek() == ",":
+            stream.expect(",")
+    stream.expect("}")
+
+def iter_model_records(path: str) -> Iterator[Dict]:
+    """Stream normalized model records from a .json or .jsonl/.ndjson catalog file"""
+    with open(path, "r") as f:
+        if path.endswith((".jsonl", ".ndjson")):
+            for line in f:
+                if line.strip():
+                    yield normalize_model(json.loads(line))
+        else:
+            for record in iter_json_models(f):
+                yield normalize_model(record)
+
+def iter_chunks(records: Iterable[Dict], size: int) -> Iterator[List[Dict]]:
+    iterator = iter(records)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def dialect_insert(dialect_name: str):
+    """INSERT construct with ON CONFLICT support for the dialect, or None if it has none"""
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+        return insert
+    if dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        return insert
+    return None
+
+def upsert_models(db: Session, rows: List[Dict], update_existing: bool = True) -> int:
+    """Write one chunk of models in a single statement; returns rows inserted or updated
+
+    The catalog version is bumped only when the chunk wrote something, so re-seeding an
+    unchanged catalog without update_existing does not make every server rebuild.
+    """
+    written = _write_models(db, rows, update_existing)
+    if written:
+        bump_catalog_version(db)
+    return written
+
+def _write_models(db: Session, rows: List[Dict], update_existing: bool) -> int:
+    # Last occurrence wins within a chunk; ON CONFLICT cannot touch the same row twice
+    rows = list({row["model_id"]: row for row in rows}.values())
+    insert = dialect_insert(db.get_bind().dialect.name)
+
+    if insert is not None:
+        statement = insert(GenericModel)
+        if update_existing:
+            statement = statement.on_conflict_do_update(
+                index_elements=[GenericModel.model_id],
+                set_={column: statement.excluded[column] for column in SEED_COLUMNS if column != "model_id"}
+            )
+            db.execute(statement, rows)
+            return len(rows)
+        # RETURNING on an executemany reports only the rows actually inserted
+        result = db.execute(statement.on_conflict_do_nothing(index_elements=[GenericModel.model_id]).returning(GenericModel.model_id), rows)
+        return len(result.all())
+
+    # Other databases: one lookup per chunk, then executemany inserts and updates
+    existing = set(db.execute(
+        select(GenericModel.model_id).where(GenericModel.model_id.in_([row["model_id"] for row in rows]))
+    ).scalars())
+    new_rows = [row for row in rows if row["model_id"] not in existing]
+    if new_rows:
+        db.execute(GenericModel.__table__.insert(), new_rows)
+    if not update_existing:
+        return len(new_rows)
+    changed_rows = [dict(row, _model_id=row["model_id"]) for row in rows if row["model_id"] in existing]
+    if changed_rows:
+        db.execute(
+            update(GenericModel.__table__)
+            .where(GenericModel.__table__.c.model_id == bindparam("_model_id"))
+            .values({column: bindparam(column) for column in SEED_COLUMNS if column != "model_id"}),
+            changed_rows
+        )
+    return len(rows)
+
+def bulk_seed_models(db: Session, records: Iterable[Dict], chunk_size: int = SEED_CHUNK_SIZE,
+                     update_existing: bool = True, progress=None) -> Dict:
+    """Upsert a stream of normalized model records chunk by chunk, committing after each chunk"""
+    start = time.perf_counter()
+    stats = {"rows_read": 0, "rows_written": 0, "chunks": 0}
+    try:
+        for chunk in iter_chunks(records, chunk_size):
+            stats["rows_written"] += upsert_models(db, chunk, update_existing)
+            db.commit()
+            stats["rows_read"] += len(chunk)
+            stats["chunks"] += 1
+            if progress:
+                progress(stats)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        stats["seconds"] = round(elapsed, 3)
+        stats["rows_per_second"] = round(stats["rows_read"] / elapsed, 1) if elapsed > 0 else 0.0
+    return stats
@@ -0,0 +1,196 @@
+from typing import Dict, List, Optional, Tuple
+import math
+import os
+
+import numpy as np
+
+# Smallest gap to leave between two pieces of furniture at the same height, in feet
+PLACEMENT_MIN_CLEARANCE = float(os.getenv("PLACEMENT_MIN_CLEARANCE_FT", "2.0"))
+# Overlaps and wall crossings shallower than this count as touching, in feet
+CONTACT_TOLERANCE = 1e-3
+# Most items one /validate-placement request may check, and the largest scale it accepts on any axis
+PLACEMENT_MAX_ITEMS = int(os.getenv("PLACEMENT_MAX_ITEMS", "200"))
+PLACEMENT_MAX_SCALE = float(os.getenv("PLACEMENT_MAX_SCALE", "10.0"))
+# Most grid cells a box may span along either axis of the broad phase
+MAX_CELLS_PER_AXIS = 64
+INCHES_PER_FOOT = 12.0
+
+class Footprints:
+    """Oriented floor footprints and vertical extents of placed items, in feet
+
+    The floor plane is (x, z) as in the room scan: x runs along the room's width
+    and z along its depth. Each footprint is a rectangle centred on the item's
+    position with half extents along its own width and depth axes, turned by its
+    yaw; bottom/top bound it vertically.
+    """
+
+    def __init__(self, center: np.ndarray, half: np.ndarray, yaw: np.ndarray, bottom: np.ndarray, top: np.ndarray):
+        self.center = center
+        self.half = half
+        self.yaw = yaw
+        self.bottom = bottom
+        self.top = top
+        cos, sin = np.cos(yaw), np.sin(yaw)
+        # axes[k, 0] is item k's width direction, axes[k, 1] its depth direction
+        self.axes = np.stack([np.stack([cos, sin], axis=-1), np.stack([-sin, cos], axis=-1)], axis=1)
+
+    def __len__(self) -> int:
+        return len(self.center)
+
+    def corners(self, index=slice(None)) -> np.ndarray:
+        """Corners of the selected footprints, (K, 4, 2) in order around the rectangle"""
+        width = self.axes[index, 0] * self.half[index, 0:1]
+        depth = self.axes[index, 1] * self.half[index, 1:2]
+        center = self.center[index]
+        return np.stack([center + width + depth, center - width + depth, center - width - depth, center + width - depth], axis=1)
+
+    def bounds(self, margin: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+        """Axis-aligned boxes around the footprints, grown by margin on every side"""
+        extent = np.abs(self.axes[:, 0]) * self.half[:, 0:1] + np.abs(self.axes[:, 1]) * self.half[:, 1:2] + margin
+        return self.center - extent, self.center + extent
+
+def item_footprints(items: List[Dict], model_dimensions: Dict[str, Dict]) -> Tuple[Footprints, List[int]]:
+    """Footprints of the items whose model has known width and depth, and those items' indices
+
+    model_dimensions maps model_id to GenericModel dimensions in inches. Items carry
+    position (feet; x/z is the footprint centre, y the base), rotation (radians; only
+    the yaw around y turns a floor footprint) and per-axis scale.
+    """
+    rows, indices = [], []
+    for index, item in enumerate(items):
+        dimensions = model_dimensions.get(item.get("model_id")) or {}
+        if dimensions.get("width") is None or dimensions.get("depth") is None:
+            continue
+        position, scale = item.get("position") or {}, item.get("scale") or {}
+        height = dimensions.get("height")
+        bottom = position.get("y", 0.0)
+        rows.append((
+            position.get("x", 0.0), position.get("z", 0.0),
+            dimensions["width"] * abs(scale.get("x", 1.0)) / INCHES_PER_FOOT / 2,
+            dimensions["depth"] * abs(scale.get("z", 1.0)) / INCHES_PER_FOOT / 2,
+            (item.get("rotation") or {}).get("y", 0.0),
+            bottom,
+            bottom + height * abs(scale.get("y", 1.0)) / INCHES_PER_FOOT if height is not None else math.inf
+        ))
+        indices.append(index)
+    columns = np.array(rows, dtype=np.float64).reshape(-1, 7)
+    return Footprints(columns[:, 0:2], columns[:, 2:4], columns[:, 4], columns[:, 5], columns[:, 6]), indices
+
+def candidate_pairs(lo: np.ndarray, hi: np.ndarray, cell_size: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Index pairs (i < j) whose axis-aligned boxes overlap, found through a uniform grid
+
+    Each box is binned into every grid cell it touches and only boxes sharing a cell
+    are paired, so the cost grows with the number of nearby boxes rather than N^2.
+    The default cell is the median box size, so a typical box touches at most 4 cells;
+    it is grown when needed so no box spans more than MAX_CELLS_PER_AXIS cells per axis.
+    """
+    count = len(lo)
+    if count < 2:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    if cell_size is None:
+        cell_size = float(np.median((hi - lo).max(axis=1)))
+    cell_size = max(cell_size, float((hi - lo).max()) / MAX_CELLS_PER_AXIS, 1e-9)
+
+    origin = lo.min(axis=0)
+    first = np.floor((lo - origin) / cell_size).astype(np.int64)
+    last = np.floor((hi - origin) / cell_size).astype(np.int64)
+    span = last - first + 1
+    cells_per_box = span[:, 0] * span[:, 1]
+
+    # One entry per (box, covered cell)
+    box = np.repeat(np.arange(count), cells_per_box)
+    offset = np.arange(len(box)) - np.repeat(np.cumsum(cells_per_box) - cells_per_box, cells_per_box)
+    cell_x = first[box, 0] + offset % span[box, 0]
+    cell_z = first[box, 1] + offset // span[box, 0]
+    order = np.lexsort((box, cell_z, cell_x))
+    box, cell_x, cell_z = box[order], cell_x[order], cell_z[order]
+
+    # Pair every entry with the later entries of its cell (boxes ascend within a cell, so i < j)
+    boundaries = np.flatnonzero((np.diff(cell_x) != 0) | (np.diff(cell_z) != 0)) + 1
+    cell_end = np.repeat(np.r_[boundaries, len(box)], np.diff(np.r_[0, boundaries, len(box)]))
+    later = cell_end - np.arange(len(box)) - 1
+    a = np.repeat(np.arange(len(box)), later)
+    b = a + 1 + np.arange(len(a)) - np.repeat(np.cumsum(later) - later, later)
+    i, j = box[a], box[b]
+
+    # Boxes sharing several cells are reported once, from the first cell both of them cover
+    once = (cell_x[a] == np.maximum(first[i, 0], first[j, 0])) & (cell_z[a] == np.maximum(first[i, 1], first[j, 1]))
+    i, j = i[once], j[once]
+    overlap = np.all((lo[i] <= hi[j]) & (lo[j] <= hi[i]), axis=1)
+    return i[overlap], j[overlap]
+
+def obb_penetration(footprints: Footprints, i: np.ndarray, j: np.ndarray) -> np.ndarray:
+    """Separating-axis overlap of each pair's footprints; > 0 is the overlap depth, <= 0 means apart"""
+    axes = np.concatenate([footprints.axes[i], footprints.axes[j]], axis=1)
+    distance = np.abs(np.einsum("kad,kd->ka", axes, footprints.center[j] - footprints.center[i]))
+
+    def radius(index):
+        # Half-length of each footprint's shadow on each candidate axis
+        return (np.abs(np.einsum("kad,kbd->kab", axes, footprints.axes[index])) * footprints.half[index][:, None, :]).sum(axis=-1)
+
+    return (radius(i) + radius(j) - distance).min(axis=1)
+
+def _point_segment_distance(points: np.ndarray, start: np.ndarray, end: np.ndarray) -> np.ndarray:
+    segment = end - start
+    length = np.maximum((segment * segment).sum(axis=-1), 1e-12)
+    t = np.clip(((points - start) * segment).sum(axis=-1) / length, 0.0, 1.0)
+    return np.linalg.norm(points - (start + t[..., None] * segment), axis=-1)
+
+def obb_gap(footprints: Footprints, i: np.ndarray, j: np.ndarray) -> np.ndarray:
+    """Shortest distance between each pair of non-overlapping footprints"""
+    a, b = footprints.corners(i), footprints.corners(j)
+    a_next, b_next = np.roll(a, -1, axis=1), np.roll(b, -1, axis=1)
+    # For disjoint rectangles the closest points include a corner of one of them
+    a_to_b = _point_segment_distance(a[:, :, None], b[:, None], b_next[:, None]).min(axis=(1, 2))
+    b_to_a = _point_segment_distance(b[:, :, None], a[:, None], a_next[:, None]).min(axis=(1, 2))
+    return np.minimum(a_to_b, b_to_a)
+
+def check_footprints(footprints: Footprints, min_clearance: float = PLACEMENT_MIN_CLEARANCE) -> Dict[str, np.ndarray]:
+    """Colliding pairs and pairs closer than min_clearance, among footprints at overlapping heights
+
+    Returns footprint index arrays i/j with overlap depth for collisions and gap for
+    clearance violations, plus how many pairs survived the broad phase.
+    """
+    lo, hi = footprints.bounds(min_clearance / 2)
+    i, j = candidate_pairs(lo, hi)
+    same_height = (footprints.bottom[i] < footprints.top[j]) & (footprints.bottom[j] < footprints.top[i])
+    i, j = i[same_height], j[same_height]
+
+    penetration = obb_penetration(footprints, i, j)
+    colliding = penetration > CONTACT_TOLERANCE
+    apart_i, apart_j = i[~colliding], j[~colliding]
+    gap = obb_gap(footprints, apart_i, apart_j)
+    tight = gap < min_clearance
+    return {
+        "collision_i": i[colliding], "collision_j": j[colliding], "overlap": penetration[colliding],
+        "clearance_i": apart_i[tight], "clearance_j": apart_j[tight], "gap": gap[tight],
+        "candidate_pairs": np.int64(len(i)),
+    }
+
+def outside_room(footprints: Footprints, width: float, depth: float) -> np.ndarray:
+    """Footprints that cross the walls of a width x depth room (feet, origin at a corner)"""
+    corners = footprints.corners()
+    limit = np.array([width, depth])
+    return ((corners < -CONTACT_TOLERANCE) | (corners > limit + CONTACT_TOLERANCE)).any(axis=(1, 2))
+
+def placement_report(items: List[Dict], model_dimensions: Dict[str, Dict], room_dimensions: Dict[str, float],
+                     min_clearance: float = PLACEMENT_MIN_CLEARANCE) -> Dict:
+    """Collisions, clearance violations and wall crossings for placed items, by index into items"""
+    footprints, indices = item_footprints(items, model_dimensions)
+    result = check_footprints(footprints, min_clearance)
+    index = np.array(indices, dtype=np.int64)
+    outside = outside_room(footprints, room_dimensions.get("width", 0), room_dimensions.get("depth", 0))
+    return {
+        "collisions": [
+            (int(a), int(b), round(float(overlap), 3))
+            for a, b, overlap in zip(index[result["collision_i"]], index[result["collision_j"]], result["overlap"])
+        ],
+        "clearance_violations": [
+            (int(a), int(b), round(float(gap), 3))
+            for a, b, gap in zip(index[result["clearance_i"]], index[result["clearance_j"]], result["gap"])
+        ],
+        "outside_room": [int(a) for a in index[outside]],
+        "unchecked": sorted(set(range(len(items))) - set(indices)),
+        "min_clearance": min_clearance,
+        "candidate_pairs": int(result["candidate_pairs"]),
+    }
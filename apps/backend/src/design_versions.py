@@ -0,0 +1,207 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import json
+import os
+
+from sqlalchemy import JSON, Column, DateTime, Integer, String, and_, func, select
+
+from src.database import Base, execute
+
+# Most deltas stored after a full snapshot of a design; reading a version replays at most this many
+DESIGN_SNAPSHOT_INTERVAL = int(os.getenv("DESIGN_SNAPSHOT_INTERVAL", "20"))
+# A version whose delta touches at least this fraction of the design's items is stored as a snapshot instead
+DESIGN_SNAPSHOT_DELTA_RATIO = float(os.getenv("DESIGN_SNAPSHOT_DELTA_RATIO", "0.5"))
+# Design attributes versioned along with furniture_placement
+DESIGN_VERSION_FIELDS = ("design_name", "room_dimensions", "style_preferences", "estimated_cost")
+# Version 1 is the RoomDesign row as first saved
+BASE_VERSION = 1
+DELTA_SECTIONS = ("fields", "added", "removed", "changed", "unset", "order")
+
+class DesignVersion(Base):
+    """A room design version after the first: a full snapshot, or a delta from the version before it"""
+    __tablename__ = "design_versions"
+
+    design_id = Column(Integer, primary_key=True)
+    version = Column(Integer, primary_key=True)
+    kind = Column(String(8), nullable=False)
+    payload = Column(JSON, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+class InvalidDelta(ValueError):
+    """A delta that does not apply to the version it was sent against"""
+
+def item_keys(items: List[Dict]) -> List[str]:
+    """Stable key per item: its item_id, or its position for items without a unique id"""
+    keys, seen = [], set()
+    for index, item in enumerate(items):
+        key = item.get("item_id")
+        key = str(key) if key is not None else None
+        if key is None or key in seen:
+            key = f"#{index}"
+        seen.add(key)
+        keys.append(key)
+    return keys
+
+def design_state(fields: Dict, items: List[Dict]) -> Dict:
+    """Version contents: design fields plus items keyed in display order"""
+    return {"fields": dict(fields), "items": dict(zip(item_keys(items), items))}
+
+def base_state(design) -> Dict:
+    """Version 1, read from the RoomDesign row"""
+    fields = {name: getattr(design, name) for name in DESIGN_VERSION_FIELDS}
+    return design_state(fields, list(design.furniture_placement or []))
+
+def snapshot_payload(state: Dict) -> Dict:
+    return {"fields": state["fields"], "items": [[key, item] for key, item in state["items"].items()]}
+
+def diff_states(old: Dict, new: Dict) -> Dict:
+    """Compact delta turning old into new; sections with nothing in them are left out
+
+    added holds whole items, removed their keys, changed only the item attributes that
+    differ (a move is just {"position": ...}, a turn just {"rotation": ...}) and unset
+    attributes an item no longer has. order is only recorded when the items were
+    reordered rather than appended.
+    """
+    old_items, new_items = old["items"], new["items"]
+    delta = {
+        "fields": {name: value for name, value in new["fields"].items() if old["fields"].get(name) != value},
+        "added": [[key, item] for key, item in new_items.items() if key not in old_items],
+        "removed": [key for key in old_items if key not in new_items],
+        "changed": {},
+        "unset": {},
+    }
+    for key, item in new_items.items():
+        before = old_items.get(key)
+        if before is None or before == item:
+            continue
+        changed = {name: value for name, value in item.items() if before.get(name) != value or name not in before}
+        if changed:
+            delta["changed"][key] = changed
+        unset = [name for name in before if name not in item]
+        if unset:
+            delta["unset"][key] = unset
+
+    kept = [key for key in old_items if key in new_items]
+    expected = kept + [key for key, _ in delta["added"]]
+    if list(new_items) != expected:
+        delta["order"] = list(new_items)
+    return {section: value for section, value in delta.items() if value}
+
+def apply_delta(state: Dict, delta: Dict) -> Dict:
+    """New state with delta applied; raises InvalidDelta for a malformed delta or unknown items"""
+    unknown = set(delta) - set(DELTA_SECTIONS)
+    if unknown:
+        raise InvalidDelta(f"Unknown delta sections: {', '.join(sorted(unknown))}")
+    try:
+        fields = dict(state["fields"])
+        for name, value in delta.get("fields", {}).items():
+            if name not in DESIGN_VERSION_FIELDS:
+                raise InvalidDelta(f"Field {name} is not versioned")
+            fields[name] = value
+
+        items = dict(state["items"])
+        for key in delta.get("removed", []):
+            if items.pop(key, None) is None:
+                raise InvalidDelta(f"Item {key} is not in this version")
+        for key, attributes in delta.get("changed", {}).items():
+            if key not in items:
+                raise InvalidDelta(f"Item {key} is not in this version")
+            items[key] = {**items[key], **attributes}
+        for key, names in delta.get("unset", {}).items():
+            if key not in items:
+                raise InvalidDelta(f"Item {key} is not in this version")
+            items[key] = {name: value for name, value in items[key].items() if name not in names}
+        for key, item in delta.get("added", []):
+            if key in items:
+                raise InvalidDelta(f"Item {key} is already in this version")
+            if not isinstance(item, dict):
+                raise InvalidDelta(f"Item {key} must be an object")
+            items[key] = item
+
+        order = delta.get("order")
+        if order is not None:
+            if sorted(order) != sorted(items):
+                raise InvalidDelta("order must list every item exactly once")
+            items = {key: items[key] for key in order}
+    except InvalidDelta:
+        raise
+    except (AttributeError, TypeError, ValueError) as e:
+        raise InvalidDelta(f"Malformed delta: {e}")
+    return {"fields": fields, "items": items}
+
+def payload_size(payload: Dict) -> int:
+    """Bytes the payload takes as stored JSON"""
+    return len(json.dumps(payload, separators=(",", ":"), default=str))
+
+def next_version(state: Dict, new_state: Dict, version: int, last_snapshot: int) -> Tuple[str, Dict]:
+    """(kind, payload) to store for the version after one with state
+
+    A snapshot is written every DESIGN_SNAPSHOT_INTERVAL versions, so no read replays a
+    longer chain, or sooner when so many items changed that the delta would be nearly
+    as large as the snapshot.
+    """
+    if version + 1 - last_snapshot > DESIGN_SNAPSHOT_INTERVAL:
+        return "snapshot", snapshot_payload(new_state)
+    delta = diff_states(state, new_state)
+    touched = {key for key, _ in delta.get("added", [])} | set(delta.get("removed", [])) | set(delta.get("changed", {}))
+    if len(touched) >= DESIGN_SNAPSHOT_DELTA_RATIO * max(len(new_state["items"]), 1):
+        return "snapshot", snapshot_payload(new_state)
+    return "delta", delta
+
+def replay(design, rows: List) -> Dict:
+    """State after rows, which start at a snapshot or follow version 1 directly"""
+    state = None
+    if not rows or rows[0].kind != "snapshot":
+        state = base_state(design)
+    for row in rows:
+        if row.kind == "snapshot":
+            state = {"fields": row.payload["fields"], "items": dict((key, item) for key, item in row.payload["items"])}
+        else:
+            state = apply_delta(state, row.payload)
+    return state
+
+async def latest_version(db, design_id: int) -> Tuple[int, int]:
+    """(latest version, latest snapshot version) of a design; both BASE_VERSION when never edited"""
+    result = await execute(db, select(
+        func.max(DesignVersion.version),
+        func.max(DesignVersion.version).filter(DesignVersion.kind == "snapshot")
+    ).where(DesignVersion.design_id == design_id))
+    latest, snapshot = result.one()
+    return latest or BASE_VERSION, snapshot or BASE_VERSION
+
+async def load_version(db, design, version: int) -> Optional[Dict]:
+    """State of one version of a design, or None if it does not exist
+
+    Reads the nearest snapshot at or before version and the deltas after it in one query.
+    """
+    if version == BASE_VERSION:
+        return base_state(design)
+    if version < BASE_VERSION:
+        return None
+    snapshot = (
+        select(func.max(DesignVersion.version))
+        .where(and_(
+            DesignVersion.design_id == design.design_id,
+            DesignVersion.kind == "snapshot",
+            DesignVersion.version <= version
+        ))
+        .scalar_subquery()
+    )
+    result = await execute(db, select(DesignVersion).where(and_(
+        DesignVersion.design_id == design.design_id,
+        DesignVersion.version >= func.coalesce(snapshot, BASE_VERSION),
+        DesignVersion.version <= version
+    )).order_by(DesignVersion.version))
+    rows = result.scalars().all()
+    if not rows or rows[-1].version != version:
+        return None
+    return replay(design, rows)
+
+def version_body(design_id: int, version: int, state: Dict) -> Dict:
+    """API representation of one version"""
+    return {
+        "design_id": design_id,
+        "version": version,
+        **state["fields"],
+        "furniture_placement": list(state["items"].values()),
+    }
@@ -0,0 +1,111 @@
+from typing import Any, Awaitable, Callable, Dict, Tuple
+import asyncio
+import hashlib
+import json
+import os
+
+from src.response_cache import RESPONSE_CACHE_BACKEND, MemoryCacheBackend, RedisCacheBackend
+
+# Seconds a response is replayed to retries that carry the same Idempotency-Key
+IDEMPOTENCY_TTL = float(os.getenv("IDEMPOTENCY_TTL", "86400"))
+# Keys remembered by the in-process backend
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000"))
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+class IdempotencyKeyReused(Exception):
+    """An Idempotency-Key came back with a different request body"""
+
+def request_fingerprint(payload: Dict) -> str:
+    """Digest of a canonical request body, stored with its response"""
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str).encode()).hexdigest()
+
+class IdempotencyStore:
+    """Responses of non-repeatable requests, replayed to retries with the same Idempotency-Key
+
+    Entries live in the response cache's backend type (RESPONSE_CACHE_BACKEND) but
+    never go stale and are never recomputed. Retries that arrive while the first
+    request is still running share its result. Failed requests store nothing, so
+    they can be retried.
+    """
+
+    def __init__(self, backend, ttl: float = IDEMPOTENCY_TTL):
+        self.backend = backend
+        self.ttl = ttl
+        self._inflight: Dict[str, Tuple[str, asyncio.Task]] = {}
+        self.replays = 0
+        self.stored = 0
+        self.conflicts = 0
+        self.errors = 0
+
+    async def run(self, scope: str, key: str, fingerprint: str,
+                  compute: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """(response, replayed) for one request; raises IdempotencyKeyReused on a body mismatch"""
+        storage_key = f"idempotency:{scope}:{key}"
+        try:
+            entry = await self.backend.get(storage_key)
+        except Exception:
+            self.errors += 1
+            entry = None
+        if entry is not None:
+            if entry["fingerprint"] != fingerprint:
+                self.conflicts += 1
+                raise IdempotencyKeyReused(key)
+            self.replays += 1
+            return entry["response"], True
+
+        inflight = self._inflight.get(storage_key)
+        if inflight is not None:
+            if inflight[0] != fingerprint:
+                self.conflicts += 1
+                raise IdempotencyKeyReused(key)
+            self.replays += 1
+            return await asyncio.shield(inflight[1]), True
+
+        async def execute():
+            response = await compute()
+            try:
+                await self.backend.set(storage_key, {"fingerprint": fingerprint, "response": response}, self.ttl)
+                self.stored += 1
+            except Exception:
+                self.errors += 1
+            return response
+
+        def finished(done: asyncio.Task):
+            if self._inflight.get(storage_key, (None, None))[1] is done:
+                del self._inflight[storage_key]
+            if not done.cancelled():
+                done.exception()
+
+        task = asyncio.ensure_future(execute())
+        self._inflight[storage_key] = (fingerprint, task)
+        task.add_done_callback(finished)
+        # Shielded so a retry that is waiting still gets the result if the first client disconnects
+        return await asyncio.shield(task), False
+
+    def stats(self) -> dict:
+        """Idempotency counters for monitoring"""
+        return {
+            "backend": self.backend.name,
+            "size": self.backend.size(),
+            "ttl_seconds": self.ttl,
+            "replays": self.replays,
+            "stored": self.stored,
+            "conflicts": self.conflicts,
+            "in_flight": len(self._inflight),
+            "errors": self.errors,
+        }
+
+def create_idempotency_store() -> IdempotencyStore:
+    """Idempotency store on the configured response cache backend"""
+    if RESPONSE_CACHE_BACKEND == "redis":
+        return IdempotencyStore(RedisCacheBackend())
+    return IdempotencyStore(MemoryCacheBackend(max_size=IDEMPOTENCY_CACHE_SIZE))
+
+# Global idempotency store instance
+idempotency_store = create_idempotency_store()
+
+async def close_idempotency_store():
+    """Close the Redis connection pool, if any, on application shutdown"""
+    close = getattr(idempotency_store.backend, "close", None)
+    if close is not None:
+        await close()
@@ -10,7 +10,12 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.database import engine, Base, SessionLocal
 from src.models.database_models import User, GenericModel, RoomDesign, ProductSearch, UserPreference
-import json
+from src.catalog import model_catalog
+from src.catalog_seed import bulk_seed_models, iter_model_records, normalize_model
+from itertools import chain
+
+# Bundled catalog; pass another .json or .jsonl file to import a vendor catalog
+DEFAULT_MODELS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../../data/generic-models.json")
 
 def create_tables():
     """Create all database tables"""
@@ -18,16 +23,12 @@ def create_tables():
     Base.metadata.create_all(bind=engine)
     print("✅ Tables created successfully!")
 
-def seed_generic_models():
-    """Seed generic 3D models from data file"""
-    print("Seeding generic 3D models...")
+def seed_generic_models(models_file: str = DEFAULT_MODELS_FILE):
+    """Seed generic 3D models from data file, streamed in chunks of upserts"""
+    print(f"Seeding generic 3D models from {models_file}...")
     
     db = SessionLocal()
     try:
-        # Load generic models data
-        with open('../../../data/generic-models.json', 'r') as f:
-            models_data = json.load(f)
-        
         # Add more models for a complete set
         additional_models = [
             {
@@ -112,38 +113,18 @@ def seed_generic_models():
             }
         ]
         
-        # Combine existing and additional models
-        all_models = models_data + additional_models
-        
-        for model_data in all_models:
-            # Check if model already exists
-            existing = db.query(GenericModel).filter(GenericModel.model_id == model_data["model_id"]).first()
-            if existing:
-                print(f"⏭️  Model {model_data['model_id']} already exists, skipping...")
-                continue
-                
-            # Create new model
-            db_model = GenericModel(
-                model_id=model_data["model_id"],
-                category=model_data["category"],
-                subcategory=model_data["subcategory"],
-                display_name=model_data["display_name"],
-                description=model_data["description"],
-                model_url=model_data["model_url"],
-                thumbnail_url=model_data["thumbnail"],
-                width=model_data["typical_dimensions"]["width"],
-                depth=model_data["typical_dimensions"]["depth"],
-                height=model_data["typical_dimensions"]["height"],
-                polygon_count=3000,  # Estimated for mobile AR
-                file_size_mb=2.5,    # Estimated compressed GLB size
-                is_active=True
-            )
-            
-            db.add(db_model)
-            print(f"✅ Added model: {model_data['display_name']}")
+        # Stream the data file, then the additional models; later records win on model_id
+        records = chain(iter_model_records(models_file), (normalize_model(m) for m in additional_models))
+        stats = bulk_seed_models(
+            db,
+            records,
+            progress=lambda s: print(f"  ...{s['rows_read']} models written")
+        )
         
-        db.commit()
-        print(f"✅ Seeded {len(all_models)} generic models!")
+        # Seeding bumps the catalog version, so servers pick up new and updated models within
+        # CATALOG_REFRESH_INTERVAL; in-process callers see them immediately
+        model_catalog.invalidate()
+        print(f"✅ Seeded {stats['rows_read']} generic models in {stats['seconds']}s ({stats['rows_per_second']} rows/s)!")
         
     except Exception as e:
         print(f"❌ Error seeding models: {e}")
@@ -197,7 +178,7 @@ def main():
         print()
         
         # Seed data
-        seed_generic_models()
+        seed_generic_models(*sys.argv[1:2])
         print()
         
         # Create test user
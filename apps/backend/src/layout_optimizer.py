@@ -0,0 +1,362 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import math
+import os
+import random
+import time
+
+import numpy as np
+
+from src.collision import CONTACT_TOLERANCE, INCHES_PER_FOOT, PLACEMENT_MIN_CLEARANCE, Footprints, obb_gap, obb_penetration
+from src.occupancy import OPEN_SURFACE_TYPES, OccupancyGrid, find_door, surface_rect
+
+# Search time for /api/v1/ar/layout/optimize when the request sets none, and the most it may ask for, in ms
+LAYOUT_TIME_BUDGET_MS = int(os.getenv("LAYOUT_TIME_BUDGET_MS", "1500"))
+LAYOUT_MAX_TIME_BUDGET_MS = int(os.getenv("LAYOUT_MAX_TIME_BUDGET_MS", "10000"))
+# Processes for parallel annealing restarts; 0 runs every restart in the request's worker thread
+LAYOUT_OPTIMIZER_PROCESSES = int(os.getenv("LAYOUT_OPTIMIZER_PROCESSES", "0"))
+# Most items and restarts one request may ask for
+LAYOUT_MAX_ITEMS = int(os.getenv("LAYOUT_MAX_ITEMS", "40"))
+LAYOUT_MAX_RESTARTS = int(os.getenv("LAYOUT_MAX_RESTARTS", "8"))
+# Seconds past the deadline to wait for pool restarts before answering without them
+LAYOUT_POOL_GRACE = 0.25
+# Cell size, in inches, of the coarse grid that scores contiguous free floor during the search
+LAYOUT_GRID_RESOLUTION_IN = 6.0
+# Model id keywords of furniture that belongs against a wall
+WALL_ITEMS = ("bed", "desk", "dresser", "wardrobe", "bookshelf", "nightstand")
+# Radius kept clear in front of the door, in feet
+DOOR_CLEARANCE = 3.0
+# Cost per foot of overlap, wall crossing, door intrusion, missing clearance and distance from a wall,
+# per colliding pair, and for the share of the floor outside the largest free rectangle. A collision
+# costs more than the whole free-floor term, so no amount of open floor pays for one.
+WEIGHTS = {
+    "overlap": 100.0, "outside": 100.0, "door": 20.0, "clearance": 2.0, "wall": 1.0,
+    "collision": 20.0, "free_floor": 10.0
+}
+# Annealing temperature at the start and at the deadline
+START_TEMPERATURE = 5.0
+END_TEMPERATURE = 0.005
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+def get_layout_pool() -> Optional[ProcessPoolExecutor]:
+    """Get the shared process pool for annealing restarts, None when LAYOUT_OPTIMIZER_PROCESSES is 0"""
+    global _process_pool
+    if _process_pool is None and LAYOUT_OPTIMIZER_PROCESSES > 0:
+        _process_pool = ProcessPoolExecutor(max_workers=LAYOUT_OPTIMIZER_PROCESSES)
+    return _process_pool
+
+def close_layout_pool():
+    """Shut the annealing process pool down on application shutdown"""
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+
+class LayoutProblem:
+    """What a layout search places and where: item sizes, the room, its obstacles and door, in feet
+
+    Plain arrays only, so a problem pickles cheaply to pool workers.
+    """
+
+    def __init__(self, model_ids: List[str], model_dimensions: Dict[str, Dict], room_dimensions: Dict[str, float],
+                 surfaces: List[Dict], min_clearance: float = PLACEMENT_MIN_CLEARANCE):
+        self.model_ids = list(model_ids)
+        self.width = float(room_dimensions.get("width", 0))
+        self.depth = float(room_dimensions.get("depth", 0))
+        self.half = np.array(
+            [[model_dimensions[m]["width"], model_dimensions[m]["depth"]] for m in self.model_ids], dtype=np.float64
+        ).reshape(-1, 2) / INCHES_PER_FOOT / 2
+        self.against_wall = np.array([any(k in m.lower() for k in WALL_ITEMS) for m in self.model_ids], dtype=bool)
+        rects = [
+            surface_rect(surface.get("bounds") or {}) for surface in surfaces or []
+            if surface.get("surface_type") not in OPEN_SURFACE_TYPES
+        ]
+        rects = np.array([rect for rect in rects if rect is not None], dtype=np.float64).reshape(-1, 4)
+        self.obstacle_center = (rects[:, 0:2] + rects[:, 2:4]) / 2
+        self.obstacle_half = np.abs(rects[:, 2:4] - rects[:, 0:2]) / 2
+        self.door = np.array(find_door(surfaces or [], self.width, self.depth))
+        self.min_clearance = min_clearance
+
+    def __len__(self) -> int:
+        return len(self.model_ids)
+
+    def extent(self, k: int, turns: int) -> np.ndarray:
+        """Half extents of item k along x and z after a number of quarter turns"""
+        return self.half[k, ::-1] if turns % 2 else self.half[k]
+
+class LayoutState:
+    """A layout and its cost terms, kept current one moved item at a time
+
+    Obstacles come first in the footprint arrays and never move; item k is entry
+    obstacles + k. Pair terms sit in symmetric matrices, so moving one item only
+    recomputes its row, and the free-floor grid counts items per cell, so moving
+    one only rewrites the cells it leaves and enters.
+    """
+
+    def __init__(self, problem: LayoutProblem, center: np.ndarray, turns: np.ndarray):
+        self.problem = problem
+        self.obstacles = len(problem.obstacle_center)
+        self.center = np.vstack([problem.obstacle_center, center]).astype(np.float64)
+        self.turns = np.concatenate([np.zeros(self.obstacles, dtype=np.int64), turns]).astype(np.int64)
+        self.half = np.vstack([problem.obstacle_half, problem.half])
+        count = len(self.center)
+        self.is_item = np.arange(count) >= self.obstacles
+
+        self.grid = OccupancyGrid(problem.width, problem.depth, LAYOUT_GRID_RESOLUTION_IN)
+        footprints = self.footprints()
+        self.fixed = np.zeros_like(self.grid.occupied)
+        self.counts = np.zeros(self.grid.occupied.shape, dtype=np.int16)
+        self.cells = [self.grid.footprint_cells(footprints, g) for g in range(count)]
+        for g in range(count):
+            if self.cells[g] is not None:
+                rows, columns, inside = self.cells[g]
+                if self.is_item[g]:
+                    self.counts[rows, columns] += inside
+                else:
+                    self.fixed[rows, columns] |= inside
+
+        self.overlap = np.zeros((count, count))
+        self.deficit = np.zeros((count, count))
+        self.item_terms = np.zeros((count, 3))
+        for g in range(self.obstacles, count):
+            self.overlap[g], self.deficit[g] = self.pair_terms(footprints, g)
+            self.overlap[:, g], self.deficit[:, g] = self.overlap[g], self.deficit[g]
+            self.item_terms[g] = self.single_terms(footprints, g)
+        self.free_rectangle = self.largest_free_area()
+        self.cost = self.total()
+
+    def footprints(self) -> Footprints:
+        count = len(self.center)
+        return Footprints(self.center, self.half, self.turns * (math.pi / 2), np.zeros(count), np.ones(count))
+
+    def pair_terms(self, footprints: Footprints, g: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Overlap with every other entry, and clearance missing to every other item, in feet"""
+        others = np.flatnonzero(np.arange(len(self.center)) != g)
+        mine = np.full(len(others), g)
+        penetration = obb_penetration(footprints, mine, others)
+        colliding = penetration > CONTACT_TOLERANCE
+        overlap, deficit = np.zeros(len(self.center)), np.zeros(len(self.center))
+        overlap[others[colliding]] = penetration[colliding]
+        # Obstacles only have to be avoided; other items also need walking room
+        apart = others[~colliding & self.is_item[others]]
+        if len(apart):
+            gap = obb_gap(footprints, np.full(len(apart), g), apart)
+            deficit[apart] = np.maximum(self.problem.min_clearance - gap, 0.0)
+        return overlap, deficit
+
+    def single_terms(self, footprints: Footprints, g: int) -> np.ndarray:
+        """Distance past the walls, intrusion into the door's clear radius and distance from a wall"""
+        extent = np.abs(footprints.axes[g, 0]) * self.half[g, 0] + np.abs(footprints.axes[g, 1]) * self.half[g, 1]
+        lo, hi = self.center[g] - extent, self.center[g] + extent
+        room = np.array([self.problem.width, self.problem.depth])
+        outside = float(np.maximum(-lo, 0.0).sum() + np.maximum(hi - room, 0.0).sum())
+        door_distance = float(np.linalg.norm(np.maximum(np.maximum(lo - self.problem.door, self.problem.door - hi), 0.0)))
+        door = max(DOOR_CLEARANCE - door_distance, 0.0)
+        wall = max(float(min(lo.min(), (room - hi).min())), 0.0) if self.problem.against_wall[g - self.obstacles] else 0.0
+        return np.array([outside, door, wall])
+
+    def largest_free_area(self) -> float:
+        self.grid.occupied = self.fixed | (self.counts > 0)
+        return self.grid.largest_free_rectangle()["area_sqft"]
+
+    def total(self) -> float:
+        room_area = max(self.problem.width * self.problem.depth, 1e-9)
+        return (
+            WEIGHTS["overlap"] * self.overlap.sum() / 2 + WEIGHTS["collision"] * np.count_nonzero(self.overlap) / 2
+            + WEIGHTS["clearance"] * self.deficit.sum() / 2
+            + self.item_terms.sum(axis=0) @ np.array([WEIGHTS["outside"], WEIGHTS["door"], WEIGHTS["wall"]])
+            + WEIGHTS["free_floor"] * (1 - self.free_rectangle / room_area)
+        )
+
+    def breakdown(self) -> Dict[str, float]:
+        """Cost terms of the current layout, in feet (sq ft for free floor)"""
+        return {
+            "total": round(float(self.cost), 4),
+            "collisions": int(np.count_nonzero(self.overlap) // 2),
+            "overlap_ft": round(float(self.overlap.sum() / 2), 3),
+            "clearance_deficit_ft": round(float(self.deficit.sum() / 2), 3),
+            "outside_room_ft": round(float(self.item_terms[:, 0].sum()), 3),
+            "door_intrusion_ft": round(float(self.item_terms[:, 1].sum()), 3),
+            "wall_distance_ft": round(float(self.item_terms[:, 2].sum()), 3),
+            "largest_free_area_sqft": round(float(self.free_rectangle), 2)
+        }
+
+    def try_move(self, k: int, center: np.ndarray, turns: int, temperature: float, rng: random.Random) -> bool:
+        """Move item k, keep the move if annealing accepts the cost change, and report whether it did"""
+        g = self.obstacles + k
+        old_center, old_turns, old_cells = self.center[g].copy(), self.turns[g], self.cells[g]
+        self.center[g], self.turns[g] = center, turns
+        footprints = self.footprints()
+        overlap, deficit = self.pair_terms(footprints, g)
+        single = self.single_terms(footprints, g)
+        new_cells = self.grid.footprint_cells(footprints, g)
+        self._count(old_cells, -1)
+        self._count(new_cells, 1)
+        free_rectangle = self.largest_free_area()
+
+        room_area = max(self.problem.width * self.problem.depth, 1e-9)
+        delta = (
+            WEIGHTS["overlap"] * (overlap.sum() - self.overlap[g].sum())
+            + WEIGHTS["collision"] * (np.count_nonzero(overlap) - np.count_nonzero(self.overlap[g]))
+            + WEIGHTS["clearance"] * (deficit.sum() - self.deficit[g].sum())
+            + (single - self.item_terms[g]) @ np.array([WEIGHTS["outside"], WEIGHTS["door"], WEIGHTS["wall"]])
+            + WEIGHTS["free_floor"] * (self.free_rectangle - free_rectangle) / room_area
+        )
+        if delta <= 0 or rng.random() < math.exp(-delta / temperature):
+            self.overlap[g], self.overlap[:, g] = overlap, overlap
+            self.deficit[g], self.deficit[:, g] = deficit, deficit
+            self.item_terms[g] = single
+            self.cells[g] = new_cells
+            self.free_rectangle = free_rectangle
+            self.cost += delta
+            return True
+        self._count(new_cells, -1)
+        self._count(old_cells, 1)
+        self.center[g], self.turns[g] = old_center, old_turns
+        return False
+
+    def _count(self, cells: Optional[Tuple[slice, slice, np.ndarray]], step: int):
+        if cells is not None:
+            rows, columns, inside = cells
+            self.counts[rows, columns] += step * inside
+
+def _inside(problem: LayoutProblem, k: int, turns: int, center: np.ndarray) -> np.ndarray:
+    """Clamp a centre so item k stays within the walls where it fits"""
+    extent = problem.extent(k, turns)
+    room = np.array([problem.width, problem.depth])
+    return np.where(2 * extent >= room, room / 2, np.clip(center, extent, room - extent))
+
+def _against_wall(problem: LayoutProblem, k: int, rng: random.Random) -> Tuple[np.ndarray, int]:
+    """A random spot with item k's back flat against one of the four walls"""
+    turns = rng.randrange(4)
+    extent = problem.extent(k, turns)
+    wall = rng.randrange(4)
+    along = rng.uniform(0, problem.depth if wall < 2 else problem.width)
+    if wall == 0:
+        center = np.array([extent[0], along])
+    elif wall == 1:
+        center = np.array([problem.width - extent[0], along])
+    elif wall == 2:
+        center = np.array([along, extent[1]])
+    else:
+        center = np.array([along, problem.depth - extent[1]])
+    return _inside(problem, k, turns, center), turns
+
+def _random_spot(problem: LayoutProblem, k: int, rng: random.Random) -> Tuple[np.ndarray, int]:
+    turns = rng.randrange(4)
+    center = np.array([rng.uniform(0, problem.width), rng.uniform(0, problem.depth)])
+    return _inside(problem, k, turns, center), turns
+
+def anneal(problem: LayoutProblem, seed: int, deadline: float) -> Dict:
+    """Simulated annealing from a random layout until deadline (time.time()); the best layout seen
+
+    Each step moves one item: a nudge that shrinks as the search cools, a quarter
+    turn, a jump against a wall, or a jump anywhere. Returns plain lists so results
+    travel back from pool workers.
+    """
+    rng = random.Random(seed)
+    starts = [
+        _against_wall(problem, k, rng) if problem.against_wall[k] else _random_spot(problem, k, rng)
+        for k in range(len(problem))
+    ]
+    state = LayoutState(
+        problem, np.array([c for c, _ in starts]).reshape(-1, 2), np.array([t for _, t in starts], dtype=np.int64)
+    )
+    best_cost, best_center, best_turns = state.cost, state.center.copy(), state.turns.copy()
+
+    start = time.time()
+    span = max(deadline - start, 1e-6)
+    reach = max(problem.width, problem.depth) / 4
+    iterations = 0
+    while True:
+        now = time.time()
+        if now >= deadline or not len(problem):
+            break
+        progress = (now - start) / span
+        temperature = START_TEMPERATURE * (END_TEMPERATURE / START_TEMPERATURE) ** progress
+        k = rng.randrange(len(problem))
+        g = state.obstacles + k
+        move = rng.random()
+        if move < 0.55:
+            turns = int(state.turns[g])
+            step = max(reach * (1 - progress), 0.1)
+            center = _inside(problem, k, turns, state.center[g] + np.array([rng.gauss(0, step), rng.gauss(0, step)]))
+        elif move < 0.7:
+            turns = int(state.turns[g]) + rng.choice((-1, 1))
+            center = _inside(problem, k, turns, state.center[g])
+        elif move < 0.9 and problem.against_wall[k]:
+            center, turns = _against_wall(problem, k, rng)
+        else:
+            center, turns = _random_spot(problem, k, rng)
+        state.try_move(k, center, turns % 4, temperature, rng)
+        iterations += 1
+        if state.cost < best_cost - 1e-9:
+            best_cost, best_center, best_turns = state.cost, state.center.copy(), state.turns.copy()
+
+    return {
+        "seed": seed,
+        "cost": float(best_cost),
+        "center": best_center[state.obstacles:].tolist(),
+        "turns": best_turns[state.obstacles:].tolist(),
+        "iterations": iterations
+    }
+
+def anneal_restarts(problem: LayoutProblem, seeds: List[int], deadline: float) -> List[Dict]:
+    """One annealing run per seed, one after another, sharing the time left until deadline evenly"""
+    results = []
+    for index, seed in enumerate(seeds):
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            break
+        results.append(anneal(problem, seed, time.time() + remaining / (len(seeds) - index)))
+    return results
+
+def layout_items(problem: LayoutProblem, result: Dict) -> List[Dict]:
+    """Furniture items, shaped like /placement/save and /validate-placement take them, for a search result"""
+    return [{
+        "item_id": f"{model_id}-{k + 1}",
+        "model_id": model_id,
+        "position": {"x": round(x, 3), "y": 0.0, "z": round(z, 3)},
+        "rotation": {"x": 0.0, "y": round(turns * math.pi / 2, 6), "z": 0.0},
+        "scale": {"x": 1.0, "y": 1.0, "z": 1.0}
+    } for k, (model_id, (x, z), turns) in enumerate(zip(problem.model_ids, result["center"], result["turns"]))]
+
+async def optimize_layout(problem: LayoutProblem, time_budget_ms: int, restarts: int, seed: int) -> Optional[Dict]:
+    """Best layout over restarts annealed until one shared deadline, None if none finished
+
+    The first restart runs in a worker thread. With a process pool configured the
+    others run there in parallel; without one they follow it in the thread, splitting
+    the same budget. Pool restarts that miss the deadline are left out.
+    """
+    loop = asyncio.get_running_loop()
+    budget = time_budget_ms / 1000
+    deadline = time.time() + budget
+    seeds = [seed + r for r in range(restarts)]
+    pool = get_layout_pool()
+    if pool is None:
+        futures = [loop.run_in_executor(None, anneal_restarts, problem, seeds, deadline)]
+    else:
+        futures = [loop.run_in_executor(None, anneal_restarts, problem, seeds[:1], deadline)] + [
+            loop.run_in_executor(pool, anneal_restarts, problem, [s], deadline) for s in seeds[1:]
+        ]
+    done, pending = await asyncio.wait(futures, timeout=budget + LAYOUT_POOL_GRACE)
+    for future in pending:
+        future.cancel()
+    results = [result for future in done if future.exception() is None for result in future.result()]
+    if not results:
+        return None
+
+    best = min(results, key=lambda result: result["cost"])
+    state = LayoutState(problem, np.array(best["center"]).reshape(-1, 2), np.array(best["turns"], dtype=np.int64))
+    return {
+        "furniture_items": layout_items(problem, best),
+        "cost": state.breakdown(),
+        "search": {
+            "seed": best["seed"],
+            "restarts": len(results),
+            "iterations": sum(result["iterations"] for result in results),
+            "time_budget_ms": time_budget_ms
+        }
+    }
@@ -1,21 +1,42 @@
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Query, Header
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
+from fastapi.responses import JSONResponse, Response
+from sqlalchemy import func, insert, literal, select, text, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, load_only
+from datetime import datetime
+from typing import Optional
 import os
 from dotenv import load_dotenv
+from starlette.concurrency import run_in_threadpool
 
 # Load environment variables
 load_dotenv()
 
 # Import database components
-from src.database import engine, get_db, Base
+from src.database import engine, get_db, get_async_db, execute, commit, rollback, get_pool_stats, Base
 from src.models.database_models import User, GenericModel, RoomDesign, ProductSearch, RoomScan, FurniturePlacement
-from src.auth import get_current_user, get_current_user_optional
+from src.auth import get_current_user, get_current_user_optional, close_http_client
+from src.pagination import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate, split_page, parse_fields, projected_columns, project
+)
+from src.catalog import model_catalog, MODEL_FIELDS, etag_matches
+from src.catalog_seed import bulk_seed_models, normalize_model
+from src.product_catalog import get_product_catalog
+from src.response_cache import response_cache, close_response_cache
+from src.analytics import search_analytics
+from src.retail_providers import retail_search, close_retail_client
+from src.layout_optimizer import close_layout_pool
+from src.idempotency import idempotency_store, close_idempotency_store
+from src.design_versions import (
+    BASE_VERSION, DESIGN_VERSION_FIELDS, DesignVersion, InvalidDelta, apply_delta, design_state, diff_states,
+    latest_version, load_version, next_version, payload_size, version_body
+)
 
 # Import route modules
 from src.routes.ai_recommendations import router as ai_router
 from src.routes.ar_scanning import router as ar_router
+from src.routes.search_analytics import router as analytics_router
 
 # Create tables on startup
 Base.metadata.create_all(bind=engine)
@@ -40,6 +61,23 @@ app.add_middleware(
 # Include route modules
 app.include_router(ai_router)
 app.include_router(ar_router)
+app.include_router(analytics_router)
+
+@app.on_event("startup")
+async def startup():
+    """Load in-memory catalogs before serving traffic"""
+    await run_in_threadpool(get_product_catalog)
+    search_analytics.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Flush buffered analytics and release shared connection and process pools"""
+    await search_analytics.stop()
+    await close_http_client()
+    await close_response_cache()
+    await close_retail_client()
+    await close_idempotency_store()
+    close_layout_pool()
 
 @app.get("/")
 async def root():
@@ -55,7 +93,7 @@ async def health_check(db: Session = Depends(get_db)):
     """Detailed health check for monitoring"""
     try:
         # Test database connection
-        db.execute("SELECT 1")
+        db.execute(text("SELECT 1"))
         db_status = "connected"
     except Exception as e:
         db_status = f"error: {str(e)}"
@@ -64,42 +102,49 @@ async def health_check(db: Session = Depends(get_db)):
         "status": "healthy",
         "environment": os.getenv("RAILWAY_ENVIRONMENT", "development"),
         "database": db_status,
+        "database_pools": get_pool_stats(),
+        "response_cache": response_cache.stats(),
+        "search_analytics": search_analytics.stats(),
+        "retail_providers": retail_search.stats(),
+        "idempotency": idempotency_store.stats(),
         "ai_service": "not_configured"  # Will be updated when OpenAI is configured
     }
 
 @app.get("/api/v1/models")
-async def get_generic_models(db: Session = Depends(get_db)):
-    """Get all generic 3D models for AR placement"""
+async def get_generic_models(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    category: Optional[str] = None,
+    subcategory: Optional[str] = None,
+    max_width: Optional[float] = Query(None, ge=0),
+    max_depth: Optional[float] = Query(None, ge=0),
+    max_height: Optional[float] = Query(None, ge=0),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_async_db)
+):
+    """Get generic 3D models for AR placement, served from the in-memory catalog snapshot
+
+    Optional filters: category, subcategory and max_width/max_depth/max_height
+    (inches) to find models that fit a given gap in the room.
+    """
+    requested_fields = parse_fields(fields, MODEL_FIELDS)
+    max_dimensions = {"width": max_width, "depth": max_depth, "height": max_height}
     try:
-        models = db.query(GenericModel).filter(GenericModel.is_active == True).all()
+        snapshot = await model_catalog.get(db)
+        body, etag = snapshot.render_cached(
+            (limit, cursor, tuple(requested_fields), category, subcategory, max_width, max_depth, max_height),
+            lambda: snapshot.render(limit, cursor, requested_fields, category, subcategory, max_dimensions)
+        )
         
-        model_list = []
-        for model in models:
-            model_list.append({
-                "model_id": model.model_id,
-                "category": model.category,
-                "subcategory": model.subcategory,
-                "display_name": model.display_name,
-                "description": model.description,
-                "model_url": model.model_url,
-                "thumbnail_url": model.thumbnail_url,
-                "dimensions": {
-                    "width": model.width,
-                    "depth": model.depth,
-                    "height": model.height
-                },
-                "technical_specs": {
-                    "polygon_count": model.polygon_count,
-                    "file_size_mb": model.file_size_mb
-                }
-            })
+        # Unchanged catalog page: let the client reuse its copy
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
         
-        return {
-            "models": model_list,
-            "count": len(model_list),
-            "status": "success"
-        }
+        return Response(content=body, media_type="application/json", headers={"ETag": etag, "Cache-Control": "no-cache"})
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
@@ -141,38 +186,18 @@ async def seed_generic_models(db: Session = Depends(get_db)):
             }
         ]
         
-        added_count = 0
-        for model_data in sample_models:
-            # Check if model already exists
-            existing = db.query(GenericModel).filter(GenericModel.model_id == model_data["model_id"]).first()
-            if existing:
-                continue
-                
-            # Create new model
-            db_model = GenericModel(
-                model_id=model_data["model_id"],
-                category=model_data["category"],
-                subcategory=model_data["subcategory"],
-                display_name=model_data["display_name"],
-                description=model_data["description"],
-                model_url=model_data["model_url"],
-                thumbnail_url=model_data["thumbnail_url"],
-                width=model_data["width"],
-                depth=model_data["depth"],
-                height=model_data["height"],
-                polygon_count=3000,
-                file_size_mb=2.5,
-                is_active=True
-            )
-            
-            db.add(db_model)
-            added_count += 1
-        
-        db.commit()
+        # Insert-if-missing as one ON CONFLICT DO NOTHING statement per chunk
+        stats = await run_in_threadpool(
+            bulk_seed_models, db, (normalize_model(m) for m in sample_models), update_existing=False
+        )
+        added_count = stats["rows_written"]
+        if added_count:
+            model_catalog.invalidate()
         
         return {
             "message": f"Successfully seeded {added_count} models",
             "added_count": added_count,
+            "rows_per_second": stats["rows_per_second"],
             "status": "success"
         }
         
@@ -249,42 +274,190 @@ async def save_room_design(
     
     return {
         "design_id": room_design.design_id,
+        "version": BASE_VERSION,
         "message": "Room design saved successfully",
         "status": "success"
     }
 
+# Projectable fields for design listings: field -> (columns to load, serializer)
+# Design fields here are version 1 as first saved; latest_version above 1 means
+# newer contents are at /api/v1/user/designs/{design_id}/versions/latest
+DESIGN_FIELDS = {
+    "design_id": ([RoomDesign.design_id], lambda row: row[0].design_id),
+    "design_name": ([RoomDesign.design_name], lambda row: row[0].design_name),
+    "room_dimensions": ([RoomDesign.room_dimensions], lambda row: row[0].room_dimensions),
+    "furniture_placement": ([RoomDesign.furniture_placement], lambda row: row[0].furniture_placement),
+    "style_preferences": ([RoomDesign.style_preferences], lambda row: row[0].style_preferences),
+    "estimated_cost": ([RoomDesign.estimated_cost], lambda row: row[0].estimated_cost),
+    "latest_version": ([], lambda row: row[1]),
+    "created_at": ([RoomDesign.created_at], lambda row: row[0].created_at),
+    "updated_at": ([RoomDesign.updated_at], lambda row: row[0].updated_at),
+}
+
+# Newest version of each listed design, read from the (design_id, version) primary key
+LATEST_DESIGN_VERSION = (
+    select(func.coalesce(func.max(DesignVersion.version), BASE_VERSION))
+    .where(DesignVersion.design_id == RoomDesign.design_id)
+    .correlate(RoomDesign)
+    .scalar_subquery()
+)
+
 @app.get("/api/v1/user/designs")
 async def get_user_designs(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
     current_user: dict = Depends(get_current_user), 
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_async_db)
 ):
-    """Get all room designs for authenticated user"""
+    """Get room designs for authenticated user, newest first, one page at a time"""
     user_id = current_user.get("sub")
+    requested_fields = parse_fields(fields, DESIGN_FIELDS)
     
     # Get user
-    db_user = db.query(User).filter(User.auth0_user_id == user_id).first()
+    result = await execute(db, select(User).where(User.auth0_user_id == user_id))
+    db_user = result.scalars().first()
     if not db_user:
-        return {"designs": [], "count": 0}
+        return {"designs": [], "count": 0, "next_cursor": None}
     
-    # Get user's designs
-    designs = db.query(RoomDesign).filter(RoomDesign.user_id == db_user.user_id).all()
+    # Get one page of the user's designs, loading only the columns the client asked for
+    columns = projected_columns(requested_fields, DESIGN_FIELDS, RoomDesign.created_at, RoomDesign.design_id)
+    latest = LATEST_DESIGN_VERSION if "latest_version" in requested_fields else literal(None)
+    statement = paginate(
+        select(RoomDesign, latest).options(load_only(*columns)).where(RoomDesign.user_id == db_user.user_id),
+        RoomDesign.created_at, RoomDesign.design_id, cursor, limit
+    )
+    result = await execute(db, statement)
+    rows, next_cursor = split_page(result.all(), limit, lambda row: (row[0].created_at, row[0].design_id))
     
-    design_list = []
-    for design in designs:
-        design_list.append({
-            "design_id": design.design_id,
-            "design_name": design.design_name,
-            "room_dimensions": design.room_dimensions,
-            "furniture_placement": design.furniture_placement,
-            "style_preferences": design.style_preferences,
-            "estimated_cost": design.estimated_cost,
-            "created_at": design.created_at,
-            "updated_at": design.updated_at
-        })
+    design_list = [project(row, requested_fields, DESIGN_FIELDS) for row in rows]
     
     return {
         "designs": design_list,
         "count": len(design_list),
+        "next_cursor": next_cursor,
+        "status": "success"
+    }
+
+async def get_owned_design(db, design_id: int, current_user: dict):
+    """The current user's design, or 404"""
+    result = await execute(db, select(RoomDesign).join(User, User.user_id == RoomDesign.user_id).where(
+        RoomDesign.design_id == design_id,
+        User.auth0_user_id == current_user.get("sub")
+    ))
+    design = result.scalars().first()
+    if not design:
+        raise HTTPException(status_code=404, detail="Design not found")
+    return design
+
+@app.post("/api/v1/user/designs/{design_id}/versions")
+async def save_design_version(
+    design_id: int,
+    version_data: dict,
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_async_db)
+):
+    """Save the next version of a design as a delta from the latest one, with a full snapshot every so often
+
+    Send either the whole furniture_placement (and any changed design fields) or changes,
+    a delta in the format the diff endpoint returns. With base_version set, a save made
+    against anything but the latest version is rejected with 409 instead of overwriting it.
+    """
+    if "changes" in version_data and "furniture_placement" in version_data:
+        raise HTTPException(status_code=400, detail="Send either changes or furniture_placement, not both")
+
+    design = await get_owned_design(db, design_id, current_user)
+    latest, last_snapshot = await latest_version(db, design_id)
+    base_version = version_data.get("base_version")
+    if base_version is not None and base_version != latest:
+        raise HTTPException(status_code=409, detail=f"Design is at version {latest}, not {base_version}")
+
+    state = await load_version(db, design, latest)
+    try:
+        if "changes" in version_data:
+            if not isinstance(version_data["changes"], dict):
+                raise InvalidDelta("changes must be an object")
+            new_state = apply_delta(state, version_data["changes"])
+        else:
+            items = version_data.get("furniture_placement", list(state["items"].values()))
+            if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+                raise InvalidDelta("furniture_placement must be a list of objects")
+            fields = {**state["fields"], **{name: version_data[name] for name in DESIGN_VERSION_FIELDS if name in version_data}}
+            new_state = design_state(fields, items)
+    except InvalidDelta as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if new_state == state:
+        return {"design_id": design_id, "version": latest, "kind": None, "bytes_written": 0,
+                "message": "No changes since the latest version", "status": "success"}
+
+    kind, payload = next_version(state, new_state, latest, last_snapshot)
+    now = datetime.utcnow()
+    try:
+        await execute(db, insert(DesignVersion).values(
+            design_id=design_id, version=latest + 1, kind=kind, payload=payload, created_at=now
+        ))
+        await execute(db, update(RoomDesign).where(RoomDesign.design_id == design_id).values(updated_at=now))
+        await commit(db)
+    except IntegrityError:
+        # Another save took this version number first
+        await rollback(db)
+        raise HTTPException(status_code=409, detail="Design was changed by another save; fetch the latest version and retry")
+
+    return {
+        "design_id": design_id,
+        "version": latest + 1,
+        "kind": kind,
+        "bytes_written": payload_size(payload),
+        "message": "Design version saved successfully",
+        "status": "success"
+    }
+
+@app.get("/api/v1/user/designs/{design_id}/versions/latest")
+async def get_latest_design_version(
+    design_id: int,
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_async_db)
+):
+    """Get the current version of a design"""
+    design = await get_owned_design(db, design_id, current_user)
+    latest, _ = await latest_version(db, design_id)
+    state = await load_version(db, design, latest)
+    return {**version_body(design_id, latest, state), "latest_version": latest, "status": "success"}
+
+@app.get("/api/v1/user/designs/{design_id}/versions/{version}")
+async def get_design_version(
+    design_id: int,
+    version: int,
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_async_db)
+):
+    """Get one version of a design, rebuilt from its nearest snapshot and the deltas after it"""
+    design = await get_owned_design(db, design_id, current_user)
+    state = await load_version(db, design, version)
+    if state is None:
+        raise HTTPException(status_code=404, detail="Design version not found")
+    return {**version_body(design_id, version, state), "status": "success"}
+
+@app.get("/api/v1/user/designs/{design_id}/diff")
+async def diff_design_versions(
+    design_id: int,
+    from_version: int = Query(..., alias="from", ge=BASE_VERSION),
+    to_version: int = Query(..., alias="to", ge=BASE_VERSION),
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_async_db)
+):
+    """Get the per-item changes between two versions of a design, in either direction"""
+    design = await get_owned_design(db, design_id, current_user)
+    old = await load_version(db, design, from_version)
+    new = await load_version(db, design, to_version)
+    if old is None or new is None:
+        raise HTTPException(status_code=404, detail="Design version not found")
+    return {
+        "design_id": design_id,
+        "from": from_version,
+        "to": to_version,
+        "changes": diff_states(old, new),
         "status": "success"
     }
 
@@ -0,0 +1,294 @@
+from typing import Dict, List, Optional, Tuple
+import math
+import os
+
+import numpy as np
+
+from src.collision import PLACEMENT_MIN_CLEARANCE, Footprints, item_footprints
+
+# Floor grid cell size, in inches
+OCCUPANCY_RESOLUTION_IN = float(os.getenv("OCCUPANCY_RESOLUTION_IN", "1.0"))
+# Larger rooms get coarser cells so a grid never holds more than this many cells
+OCCUPANCY_MAX_CELLS = int(os.getenv("OCCUPANCY_MAX_CELLS", "4000000"))
+# Items whose base is below this height (feet) block the floor; wall shelves and loft beds above it do not
+FLOOR_BLOCKING_HEIGHT = 3.0
+# Scanned surfaces that do not stand on the floor
+OPEN_SURFACE_TYPES = {"floor", "ceiling", "door", "window"}
+# Walkways are measured up to this width in feet; anything wider is reported as this
+MAX_WALKWAY_WIDTH = 6.0
+# Model id keywords of the furniture that needs a walkway from the door
+WALKWAY_TARGETS = ("bed", "desk")
+
+def surface_rect(bounds: Dict[str, float]) -> Optional[Tuple[float, float, float, float]]:
+    """Floor rectangle (x0, z0, x1, z1) of a scanned surface's bounds, in feet
+
+    Accepts min_x/max_x/min_z/max_z, or a centre x/z with width/depth (a missing
+    size is a thin surface such as a wall).
+    """
+    if all(key in bounds for key in ("min_x", "max_x", "min_z", "max_z")):
+        return bounds["min_x"], bounds["min_z"], bounds["max_x"], bounds["max_z"]
+    if "x" in bounds and "z" in bounds:
+        half_width, half_depth = bounds.get("width", 0.0) / 2, bounds.get("depth", 0.0) / 2
+        return bounds["x"] - half_width, bounds["z"] - half_depth, bounds["x"] + half_width, bounds["z"] + half_depth
+    return None
+
+def find_door(surfaces: List[Dict], width: float, depth: float) -> Tuple[float, float]:
+    """Door position on the floor: the first scanned door, else the middle of the z = 0 wall"""
+    for surface in surfaces:
+        if surface.get("surface_type") == "door":
+            rect = surface_rect(surface.get("bounds") or {})
+            if rect is not None:
+                return min(max((rect[0] + rect[2]) / 2, 0.0), width), min(max((rect[1] + rect[3]) / 2, 0.0), depth)
+    return width / 2, 0.0
+
+class OccupancyGrid:
+    """Floor of a room rasterized into square cells; occupied marks cells something stands on
+
+    Rows run along z (depth) and columns along x (width), with the origin at a room
+    corner: cell (r, c) covers x in [c, c + 1) * cell and z in [r, r + 1) * cell, in feet.
+    """
+
+    def __init__(self, width: float, depth: float, resolution_in: float = OCCUPANCY_RESOLUTION_IN):
+        self.width = max(width, 0.0)
+        self.depth = max(depth, 0.0)
+        cell = resolution_in / 12
+        self.cell = max(cell, math.sqrt(self.width * self.depth / OCCUPANCY_MAX_CELLS))
+        shape = (max(1, math.ceil(self.depth / self.cell - 1e-9)), max(1, math.ceil(self.width / self.cell - 1e-9)))
+        self.occupied = np.zeros(shape, dtype=bool)
+        self.x = (np.arange(shape[1]) + 0.5) * self.cell
+        self.z = (np.arange(shape[0]) + 0.5) * self.cell
+
+    def _cell_range(self, lo: float, hi: float, count: int) -> Tuple[int, int]:
+        first = min(max(int(math.floor(lo / self.cell)), 0), count - 1)
+        last = min(max(int(math.ceil(hi / self.cell)), first + 1), count)
+        return first, last
+
+    def mark_rect(self, x0: float, z0: float, x1: float, z1: float):
+        """Occupy every cell an axis-aligned rectangle touches (at least one)"""
+        if x1 < 0 or z1 < 0 or x0 > self.width or z0 > self.depth:
+            return
+        c0, c1 = self._cell_range(x0, x1, self.occupied.shape[1])
+        r0, r1 = self._cell_range(z0, z1, self.occupied.shape[0])
+        self.occupied[r0:r1, c0:c1] = True
+
+    def footprint_cells(self, footprints: Footprints, k: int) -> Optional[Tuple[slice, slice, np.ndarray]]:
+        """Cells whose centres fall inside footprint k: a (rows, columns) window and a mask over it
+
+        None when the footprint lies wholly outside the room.
+        """
+        extent = np.abs(footprints.axes[k, 0]) * footprints.half[k, 0] + np.abs(footprints.axes[k, 1]) * footprints.half[k, 1]
+        lo, hi = footprints.center[k] - extent, footprints.center[k] + extent
+        if hi[0] < 0 or hi[1] < 0 or lo[0] > self.width or lo[1] > self.depth:
+            return None
+        c0, c1 = self._cell_range(lo[0], hi[0], self.occupied.shape[1])
+        r0, r1 = self._cell_range(lo[1], hi[1], self.occupied.shape[0])
+        dx = self.x[None, c0:c1] - footprints.center[k, 0]
+        dz = self.z[r0:r1, None] - footprints.center[k, 1]
+        (ux, uz), (vx, vz) = footprints.axes[k]
+        # A half cell of slack so thin items still cover the cells they cross
+        slack = self.cell / 2
+        inside = (np.abs(dx * ux + dz * uz) <= footprints.half[k, 0] + slack) & \
+                 (np.abs(dx * vx + dz * vz) <= footprints.half[k, 1] + slack)
+        return slice(r0, r1), slice(c0, c1), inside
+
+    def mark_footprints(self, footprints: Footprints):
+        """Occupy the cells whose centres fall inside each oriented footprint"""
+        for k in range(len(footprints)):
+            cells = self.footprint_cells(footprints, k)
+            if cells is not None:
+                rows, columns, inside = cells
+                self.occupied[rows, columns] |= inside
+
+    def free_area(self) -> float:
+        return float((~self.occupied).sum()) * self.cell ** 2
+
+    def clearance(self, cap: float) -> np.ndarray:
+        """Distance in feet from each cell centre to the nearest occupied cell or wall, capped at cap
+
+        Exact Euclidean distance transform in two separable passes: distance to the
+        nearest obstacle in the same column, then the best combination across columns.
+        Only column offsets up to the cap are visited.
+        """
+        rows, columns = self.occupied.shape
+        limit = int(math.ceil(cap / self.cell)) + 1
+        index = np.arange(rows)[:, None]
+        # Walls act as obstacle cells just outside the grid
+        above = np.maximum.accumulate(np.where(self.occupied, index, -1), axis=0)
+        below = np.minimum.accumulate(np.where(self.occupied, index, rows)[::-1], axis=0)[::-1]
+        # Squared distances in cells are whole numbers, so int32 keeps them exact
+        vertical = np.minimum(np.minimum(index - above, below - index), limit).astype(np.int32) ** 2
+
+        column = np.arange(columns, dtype=np.int32)
+        squared = np.minimum(vertical, np.minimum(column + 1, columns - column)[None, :] ** 2)
+        for offset in range(1, min(limit, columns)):
+            step = offset * offset
+            if offset % 8 == 0 and step >= squared.max():
+                break
+            np.minimum(squared[:, offset:], vertical[:, :-offset] + step, out=squared[:, offset:])
+            np.minimum(squared[:, :-offset], vertical[:, offset:] + step, out=squared[:, :-offset])
+        # Centre-to-centre distance less half a cell reaches the obstacle cell's edge
+        return np.minimum(np.maximum(np.sqrt(squared) - 0.5, 0.0) * self.cell, cap)
+
+    def largest_free_rectangle(self) -> Dict:
+        """Largest axis-aligned rectangle of free cells, in feet
+
+        The maximal-rectangle DP without its row loop: each free cell gets the height of
+        the free run above it and the tightest left/right walls of the row runs along
+        that height, found with cumulative max/min down each column that restart at
+        every occupied cell.
+        """
+        rows, columns = self.occupied.shape
+        index = np.arange(rows)[:, None]
+        column = np.arange(columns)[None, :]
+        last_occupied = np.maximum.accumulate(np.where(self.occupied, index, -1), axis=0)
+        heights = index - last_occupied
+        # Free run of each row around each cell: [run_left, run_right)
+        run_left = np.maximum.accumulate(np.where(self.occupied, column + 1, 0), axis=1)
+        run_right = np.minimum.accumulate(np.where(self.occupied, column, columns)[:, ::-1], axis=1)[:, ::-1]
+        # Offsetting by the count of occupied cells so far keeps each column segment's max/min
+        # apart; occupied cells themselves carry neutral bounds
+        segment = np.cumsum(self.occupied, axis=0) * (columns + 1)
+        left = np.maximum.accumulate(np.where(self.occupied, 0, run_left) + segment, axis=0) - segment
+        right = np.minimum.accumulate(np.where(self.occupied, columns, run_right) - segment, axis=0) + segment
+        areas = np.where(self.occupied, 0, heights * (right - left))
+        row, column = np.unravel_index(int(np.argmax(areas)), areas.shape)
+        if areas[row, column] == 0:
+            return {"x": 0.0, "z": 0.0, "width": 0.0, "depth": 0.0, "area_sqft": 0.0}
+        width = (right[row, column] - left[row, column]) * self.cell
+        depth = heights[row, column] * self.cell
+        return {
+            "x": round(left[row, column] * self.cell, 3),
+            "z": round((row - heights[row, column] + 1) * self.cell, 3),
+            "width": round(width, 3),
+            "depth": round(depth, 3),
+            "area_sqft": round(width * depth, 2)
+        }
+
+def _run_ids(mask: np.ndarray) -> Tuple[np.ndarray, int]:
+    """Number every horizontal run of True cells (1, 2, ...); False cells get 0"""
+    starts = mask.copy()
+    starts[:, 1:] &= ~mask[:, :-1]
+    ids = np.cumsum(starts.ravel()).reshape(mask.shape)
+    return np.where(mask, ids, 0), int(ids[-1, -1]) if ids.size else 0
+
+def connected(mask: np.ndarray, start: np.ndarray, goal: np.ndarray) -> bool:
+    """Whether any start cell reaches any goal cell through 4-connected mask cells
+
+    Each round floods whole row runs, then whole column runs, so the number of rounds
+    follows the number of turns in the path rather than its length.
+    """
+    reached = start & mask
+    if not reached.any():
+        return False
+    row_ids, row_runs = _run_ids(mask)
+    column_ids, column_runs = _run_ids(np.ascontiguousarray(mask.T))
+    column_ids = column_ids.T
+    count = int(reached.sum())
+    while True:
+        if (reached & goal).any():
+            return True
+        runs = np.zeros(row_runs + 1, dtype=bool)
+        runs[row_ids[reached]] = True
+        runs[0] = False
+        reached = runs[row_ids]
+        runs = np.zeros(column_runs + 1, dtype=bool)
+        runs[column_ids[reached]] = True
+        runs[0] = False
+        reached = runs[column_ids]
+        grown = int(reached.sum())
+        if grown == count:
+            return bool((reached & goal).any())
+        count = grown
+
+def walkway_width(grid: OccupancyGrid, clearance: np.ndarray, door: Tuple[float, float],
+                  footprints: Footprints, target: int) -> Optional[float]:
+    """Width in feet of the widest path from the door to one footprint, None if it cannot be reached
+
+    A path of width w exists when free cells with clearance >= w / 2 connect a cell
+    within w / 2 of the door to a cell within w / 2 of the target. Reachability only
+    shrinks as w grows, so w is binary-searched in whole cells up to MAX_WALKWAY_WIDTH;
+    the answer can read up to one cell narrower than the real walkway.
+    """
+    slack = 1.5 * grid.cell
+    free = ~grid.occupied
+    near_door = np.hypot(grid.x[None, :] - door[0], grid.z[:, None] - door[1])
+    dx = grid.x[None, :] - footprints.center[target, 0]
+    dz = grid.z[:, None] - footprints.center[target, 1]
+    (ux, uz), (vx, vz) = footprints.axes[target]
+    near_target = np.hypot(
+        np.maximum(np.abs(dx * ux + dz * uz) - footprints.half[target, 0], 0.0),
+        np.maximum(np.abs(dx * vx + dz * vz) - footprints.half[target, 1], 0.0)
+    )
+
+    def passable(cells: int) -> bool:
+        radius = cells * grid.cell / 2
+        mask = free & (clearance >= radius - 1e-9)
+        return connected(mask, near_door <= radius + slack, near_target <= radius + slack)
+
+    if not passable(0):
+        return None
+    lo, hi = 0, int(MAX_WALKWAY_WIDTH / grid.cell)
+    if passable(hi):
+        return MAX_WALKWAY_WIDTH
+    while hi - lo > 1:
+        middle = (lo + hi) // 2
+        if passable(middle):
+            lo = middle
+        else:
+            hi = middle
+    return round(lo * grid.cell, 3)
+
+def analyze_floor(room_dimensions: Dict[str, float], surfaces: List[Dict], items: Optional[List[Dict]] = None,
+                  model_dimensions: Optional[Dict[str, Dict]] = None, resolution_in: float = OCCUPANCY_RESOLUTION_IN,
+                  min_walkway: float = PLACEMENT_MIN_CLEARANCE) -> Dict:
+    """Occupancy analysis of a scanned room and the furniture placed in it
+
+    Scanned obstacles and floor-standing furniture are rasterized; the result has the
+    free floor area, the largest free rectangle and, for each bed and desk, the width of
+    the widest walkway to it from the door.
+    """
+    width, depth = room_dimensions.get("width", 0.0), room_dimensions.get("depth", 0.0)
+    grid = OccupancyGrid(width, depth, resolution_in)
+    for surface in surfaces or []:
+        if surface.get("surface_type") not in OPEN_SURFACE_TYPES:
+            rect = surface_rect(surface.get("bounds") or {})
+            if rect is not None:
+                grid.mark_rect(*rect)
+
+    items = items or []
+    footprints, indices = item_footprints(items, model_dimensions or {})
+    on_floor = np.flatnonzero(footprints.bottom < FLOOR_BLOCKING_HEIGHT)
+    grid.mark_footprints(Footprints(
+        footprints.center[on_floor], footprints.half[on_floor], footprints.yaw[on_floor],
+        footprints.bottom[on_floor], footprints.top[on_floor]
+    ))
+
+    free_area = grid.free_area()
+    report = {
+        "resolution_in": round(grid.cell * 12, 3),
+        "grid_size": list(grid.occupied.shape),
+        "free_area_sqft": round(free_area, 2),
+        "free_ratio": round(free_area / (width * depth), 4) if width * depth > 0 else 0.0,
+        "largest_free_rectangle": grid.largest_free_rectangle(),
+        "walkways": []
+    }
+
+    targets = [
+        (k, keyword) for k, index in enumerate(indices)
+        for keyword in WALKWAY_TARGETS if keyword in (items[index].get("model_id") or "").lower()
+    ]
+    if targets:
+        door = find_door(surfaces or [], width, depth)
+        clearance = grid.clearance(MAX_WALKWAY_WIDTH / 2)
+        report["door"] = {"x": round(door[0], 3), "z": round(door[1], 3)}
+        for k, keyword in targets:
+            width_ft = walkway_width(grid, clearance, door, footprints, k)
+            report["walkways"].append({
+                "index": indices[k],
+                "item_id": items[indices[k]].get("item_id"),
+                "target": keyword,
+                "reachable": width_ft is not None,
+                "width_ft": width_ft,
+                "meets_minimum": width_ft is not None and width_ft >= min_walkway
+            })
+    return report
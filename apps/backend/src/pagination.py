@@ -0,0 +1,71 @@
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import base64
+import json
+import os
+
+# Page size bounds for list endpoints
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", "50"))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "200"))
+
+def encode_cursor(created_at: datetime, row_id) -> str:
+    """Encode a (created_at, id) keyset position as an opaque cursor"""
+    position = [created_at.isoformat() if created_at else None, row_id if isinstance(row_id, (int, str)) else str(row_id)]
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, object]:
+    """Decode a cursor produced by encode_cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), row_id
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def paginate(statement, created_column, id_column, cursor: Optional[str], limit: int):
+    """Apply newest-first keyset pagination on (created_at, id)"""
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        statement = statement.where(or_(
+            created_column < created_at,
+            and_(created_column == created_at, id_column < row_id)
+        ))
+    # One extra row tells us whether another page exists without a COUNT query
+    return statement.order_by(created_column.desc(), id_column.desc()).limit(limit + 1)
+
+def split_page(rows: list, limit: int, position) -> Tuple[list, Optional[str]]:
+    """Trim the look-ahead row and build the next cursor from the last row kept"""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(*position(rows[-1]))
+
+def parse_fields(fields: Optional[str], available: Dict) -> List[str]:
+    """Parse a comma-separated fields= projection; all fields when omitted"""
+    if not fields:
+        return list(available)
+    # Repeated fields are kept once, in the order first requested
+    requested = list(dict.fromkeys(field.strip() for field in fields.split(",") if field.strip()))
+    unknown = [field for field in requested if field not in available]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(available)}"
+        )
+    return requested
+
+def projected_columns(requested: List[str], available: Dict, *always) -> list:
+    """Columns needed to serialize the requested fields, plus the pagination keys"""
+    columns = list(always)
+    for field in requested:
+        for column in available[field][0]:
+            # Identity check: == on SQLAlchemy columns builds an expression
+            if not any(column is existing for existing in columns):
+                columns.append(column)
+    return columns
+
+def project(row, requested: List[str], available: Dict) -> dict:
+    """Serialize a row to only the requested fields"""
+    return {field: available[field][1](row) for field in requested}
@@ -0,0 +1,239 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+
+from src.catalog_seed import iter_json_models
+from src.ranking import RANKING_WEIGHTS, score_products, blend_relevance, explain
+from src.semantic_search import SemanticIndex, load_or_build_semantic_index
+
+# Nearest neighbours fetched per requested result when a search intent narrows the candidates
+SEMANTIC_CANDIDATE_FACTOR = 5
+
+# Product catalog file (.json with a "products" array, or .jsonl), loaded once per process
+PRODUCT_CATALOG_PATH = os.getenv(
+    "PRODUCT_CATALOG_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../../data/sample-products.json")
+)
+
+def iter_product_records(path: str) -> Iterable[Dict]:
+    """Stream product records from a .json or .jsonl/.ndjson catalog file"""
+    with open(path, "r") as f:
+        if path.endswith((".jsonl", ".ndjson")):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from iter_json_models(f, key="products")
+
+def _positions_between(positions: np.ndarray, lo: int, hi: int) -> np.ndarray:
+    # positions is ascending, so the [lo, hi) price window is a contiguous slice of it
+    return positions[np.searchsorted(positions, lo):np.searchsorted(positions, hi)]
+
+class _CategoryShard:
+    """Products of one category stored column-wise in ascending price order"""
+
+    def __init__(self, ids: np.ndarray, price: np.ndarray, sale_price: np.ndarray, rating: np.ndarray,
+                 review_count: np.ndarray, width: np.ndarray, depth: np.ndarray, height: np.ndarray,
+                 in_stock: np.ndarray, store_codes: np.ndarray, stores: List[str]):
+        order = np.argsort(price, kind="stable")
+        self.ids = ids[order]
+        self.price = price[order]
+        self.sale_price = sale_price[order]
+        self.rating = rating[order]
+        self.review_count = review_count[order]
+        self.width = width[order]
+        self.depth = depth[order]
+        self.height = height[order]
+
+        # Secondary indexes hold ascending shard positions, so they stay aligned with the price order
+        positions = np.arange(len(order))
+        store_codes = store_codes[order]
+        self.by_store = {}
+        for code, store in enumerate(stores):
+            index = positions[store_codes == code]
+            if len(index):
+                self.by_store[store] = index
+        self.in_stock = positions[in_stock[order]]
+
+    def candidates(self, min_price: float, max_price: float, stores: Optional[List[str]] = None,
+                   min_rating: Optional[float] = None, in_stock_only: bool = False) -> np.ndarray:
+        """Shard positions of products matching the filters, in price order"""
+        # Budget filter is a pair of bisects on the price column
+        lo = int(np.searchsorted(self.price, min_price, side="left"))
+        hi = int(np.searchsorted(self.price, max_price, side="right"))
+        if hi <= lo:
+            return np.arange(0)
+
+        candidates = None
+        if stores:
+            candidates = np.sort(np.concatenate(
+                [_positions_between(self.by_store[s], lo, hi) for s in stores if s in self.by_store] or [self.ids[:0]]
+            ))
+        if in_stock_only:
+            in_stock = _positions_between(self.in_stock, lo, hi)
+            candidates = in_stock if candidates is None else np.intersect1d(candidates, in_stock, assume_unique=True)
+        if candidates is None:
+            candidates = np.arange(lo, hi)
+        if min_rating is not None:
+            candidates = candidates[self.rating[candidates] >= min_rating]
+        return candidates
+
+    def search(self, budget: Dict[str, float], room_dimensions: Dict[str, float], stores: Optional[List[str]] = None,
+               min_rating: Optional[float] = None, in_stock_only: bool = False, limit: int = 10,
+               query: Optional[np.ndarray] = None,
+               semantic: Optional[SemanticIndex] = None) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """Global ids and score components of the best-scoring matches, best first"""
+        candidates = self.candidates(budget["min"], budget["max"], stores, min_rating, in_stock_only)
+        if limit <= 0 or not len(candidates):
+            return self.ids[:0], {}
+
+        relevance = None
+        if query is not None:
+            # Filters run first, so the ANN stage only ever returns products that pass them
+            hits, similarity = semantic.search(query, limit * SEMANTIC_CANDIDATE_FACTOR, candidate_ids=self.ids[candidates])
+            order = np.argsort(hits)
+            hits, similarity = hits[order], similarity[order]
+            slots = np.minimum(np.searchsorted(hits, self.ids[candidates]), len(hits) - 1)
+            found = hits[slots] == self.ids[candidates]
+            candidates, relevance = candidates[found], similarity[slots[found]]
+
+        # One vectorized scoring pass over every candidate, then a top-k on the score
+        components = score_products(
+            self.price[candidates], self.sale_price[candidates], self.rating[candidates],
+            self.review_count[candidates], self.width[candidates], self.depth[candidates],
+            self.height[candidates], budget, room_dimensions
+        )
+        if relevance is not None:
+            blend_relevance(components, relevance)
+        best = self.top_k(np.arange(len(candidates)), components["score"], limit)
+        return self.ids[candidates[best]], {name: values[best] for name, values in components.items()}
+
+    @staticmethod
+    def top_k(candidates: np.ndarray, key: np.ndarray, limit: int) -> np.ndarray:
+        """The limit candidates with the highest key, best first, without sorting every candidate"""
+        keys = key[candidates]
+        if len(candidates) > limit:
+            partition = np.argpartition(-keys, limit - 1)[:limit]
+            candidates, keys = candidates[partition], keys[partition]
+        return candidates[np.argsort(-keys, kind="stable")]
+
+class ProductCatalog:
+    """In-memory product catalog with per-category price-sorted columns and secondary indexes"""
+
+    def __init__(self, records: Iterable[Dict]):
+        self.products: List[Dict] = []
+        digest = hashlib.sha256()
+        by_category = {}
+        prices, sale_prices, ratings, review_counts, in_stock, stores = [], [], [], [], [], []
+        widths, depths, heights = [], [], []
+        for i, record in enumerate(records):
+            digest.update(json.dumps(record, sort_keys=True).encode())
+            self.products.append(record)
+            by_category.setdefault(record.get("category"), []).append(i)
+            prices.append(float(record["price"]))
+            sale_prices.append(_float_or_nan(record.get("sale_price")))
+            dimensions = record.get("dimensions") or {}
+            widths.append(_float_or_nan(dimensions.get("width")))
+            depths.append(_float_or_nan(dimensions.get("depth")))
+            heights.append(_float_or_nan(dimensions.get("height")))
+            ratings.append(float(record.get("rating") or 0.0))
+            review_counts.append(int(record.get("review_count") or 0))
+            in_stock.append(bool(record.get("in_stock", True)))
+            stores.append(record.get("store") or "")
+        # Changes whenever the loaded products change; cache layers key on it
+        self.version = digest.hexdigest()[:16]
+        # search_intent index, attached by get_product_catalog (None disables semantic retrieval)
+        self.semantic: Optional[SemanticIndex] = None
+
+        store_names = sorted(set(stores))
+        store_lookup = {store: code for code, store in enumerate(store_names)}
+        columns = {
+            "ids": np.arange(len(self.products)),
+            "price": np.array(prices, dtype=np.float64),
+            "sale_price": np.array(sale_prices, dtype=np.float64),
+            "rating": np.array(ratings, dtype=np.float64),
+            "review_count": np.array(review_counts, dtype=np.int64),
+            "width": np.array(widths, dtype=np.float64),
+            "depth": np.array(depths, dtype=np.float64),
+            "height": np.array(heights, dtype=np.float64),
+            "in_stock": np.array(in_stock, dtype=bool),
+            "store_codes": np.array([store_lookup[s] for s in stores], dtype=np.int32),
+        }
+        self._shards = {}
+        for category, indices in by_category.items():
+            rows = np.array(indices)
+            self._shards[category] = _CategoryShard(
+                **{name: column[rows] for name, column in columns.items()}, stores=store_names
+            )
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+    def categories(self) -> List[str]:
+        return sorted(c for c in self._shards if c is not None)
+
+    def stores(self, category: str) -> List[str]:
+        """Stores carrying products in category"""
+        shard = self._shards.get(category)
+        return sorted(shard.by_store) if shard is not None else []
+
+    def search(self, category: str, budget: Dict[str, float], room_dimensions: Dict[str, float],
+               stores: Optional[List[str]] = None, min_rating: Optional[float] = None,
+               in_stock_only: bool = False, limit: int = 10,
+               search_intent: Optional[str] = None) -> List[Tuple[int, Dict[str, float]]]:
+        """(product id, score components) for the best matches in category within the budget"""
+        shard = self._shards.get(category)
+        if shard is None:
+            return []
+        query = self.semantic.embed_query(search_intent) if self.semantic is not None and search_intent else None
+        ids, components = shard.search(
+            budget, room_dimensions, stores, min_rating, in_stock_only, limit, query, self.semantic
+        )
+        return [
+            (int(product_id), {name: round(float(values[i]), 4) for name, values in components.items()})
+            for i, product_id in enumerate(ids)
+        ]
+
+    def recommendation(self, product_id: int, components: Dict[str, float], room_size: float, budget: Dict[str, float]) -> Dict:
+        """Product fields for a ProductRecommendation, with why_recommended explained for this room"""
+        product = dict(self.products[product_id])
+        template = product.get("why_recommended", "")
+        try:
+            why = template.format(room_size=room_size, budget_min=budget.get("min", 0), budget_max=budget.get("max", 0))
+        except (KeyError, ValueError, IndexError):
+            why = template
+        reasons = explain(product, components, budget)
+        product["why_recommended"] = f"{why} ({reasons})" if why and reasons else why or reasons
+        product["score"] = components["score"]
+        product["score_breakdown"] = {name: components[name] for name in [*RANKING_WEIGHTS, "relevance"] if name in components}
+        return product
+
+def _float_or_nan(value) -> float:
+    return float(value) if value is not None else float("nan")
+
+_product_catalog: Optional[ProductCatalog] = None
+_load_lock = threading.Lock()
+
+def load_product_catalog(path: str = PRODUCT_CATALOG_PATH) -> ProductCatalog:
+    """Build a catalog from a local file"""
+    return ProductCatalog(iter_product_records(path))
+
+def get_product_catalog() -> ProductCatalog:
+    """Get the process-wide product catalog, loading it on first use"""
+    global _product_catalog
+    if _product_catalog is None:
+        with _load_lock:
+            if _product_catalog is None:
+                catalog = load_product_catalog()
+                catalog.semantic = load_or_build_semantic_index(catalog)
+                _product_catalog = catalog
+    return _product_catalog
+
+def set_product_catalog(catalog: ProductCatalog):
+    """Swap in a new catalog (e.g. after a reload)"""
+    global _product_catalog
+    _product_catalog = catalog
@@ -0,0 +1,113 @@
+from typing import Dict
+import math
+
+import numpy as np
+
+# Weight of each score component in the final ranking score (sums to 1)
+RANKING_WEIGHTS = {
+    "price_fit": 0.30,
+    "rating": 0.25,
+    "reviews": 0.15,
+    "discount": 0.10,
+    "dimension_fit": 0.20,
+}
+
+# Share of the final score given to search_intent relevance when the query has one
+SEMANTIC_WEIGHT = 0.35
+
+# Review count at which the review score saturates
+REVIEW_SATURATION = 10000
+# Largest share of the room's floor a single item should take before its fit score reaches 0
+MAX_FOOTPRINT_SHARE = 0.25
+# Score for products without dimensions, or rooms without floor dimensions
+UNKNOWN_DIMENSION_SCORE = 0.5
+
+def score_products(price: np.ndarray, sale_price: np.ndarray, rating: np.ndarray, review_count: np.ndarray,
+                   width: np.ndarray, depth: np.ndarray, height: np.ndarray,
+                   budget: Dict[str, float], room_dimensions: Dict[str, float]) -> Dict[str, np.ndarray]:
+    """Score every candidate in one pass over columnar arrays
+
+    sale_price and product dimensions (inches) use NaN for missing values;
+    room_dimensions are in feet. Returns each component plus the weighted "score".
+    """
+    budget_min, budget_max = budget.get("min", 0.0), budget.get("max", 0.0)
+    on_sale = ~np.isnan(sale_price)
+    effective_price = np.where(on_sale, sale_price, price)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        components = {
+            # Cheaper within the budget window scores higher
+            "price_fit": np.clip((budget_max - effective_price) / max(budget_max - budget_min, 1.0), 0.0, 1.0),
+            "rating": np.clip(rating / 5.0, 0.0, 1.0),
+            "reviews": np.clip(np.log1p(review_count) / math.log1p(REVIEW_SATURATION), 0.0, 1.0),
+            "discount": np.where(on_sale & (price > 0), np.clip((price - sale_price) / price, 0.0, 1.0), 0.0),
+            "dimension_fit": _dimension_fit(width, depth, height, room_dimensions),
+        }
+
+    components["score"] = sum(RANKING_WEIGHTS[name] * components[name] for name in RANKING_WEIGHTS)
+    return components
+
+def blend_relevance(components: Dict[str, np.ndarray], relevance: np.ndarray) -> Dict[str, np.ndarray]:
+    """Fold semantic similarity to the search intent into the weighted score"""
+    components["relevance"] = np.clip(relevance, 0.0, 1.0)
+    components["score"] = (1 - SEMANTIC_WEIGHT) * components["score"] + SEMANTIC_WEIGHT * components["relevance"]
+    return components
+
+def _dimension_fit(width: np.ndarray, depth: np.ndarray, height: np.ndarray, room_dimensions: Dict[str, float]) -> np.ndarray:
+    room_area = room_dimensions.get("width", 0.0) * 12 * room_dimensions.get("depth", 0.0) * 12
+    if room_area <= 0:
+        return np.full(len(width), UNKNOWN_DIMENSION_SCORE)
+    fit = np.clip(1.0 - (width * depth / room_area) / MAX_FOOTPRINT_SHARE, 0.0, 1.0)
+    room_height = room_dimensions.get("height", 0.0) * 12
+    if room_height > 0:
+        # NaN heights compare False, so unknown heights are never ruled out here
+        fit = np.where(height > room_height, 0.0, fit)
+    return np.where(np.isnan(width) | np.isnan(depth), UNKNOWN_DIMENSION_SCORE, fit)
+
+def score_product_python(product: Dict, budget: Dict[str, float], room_dimensions: Dict[str, float]) -> Dict[str, float]:
+    """Per-dict reference implementation of score_products, used to benchmark and check it"""
+    price = product["price"]
+    sale_price = product.get("sale_price")
+    effective_price = sale_price if sale_price is not None else price
+    budget_min, budget_max = budget.get("min", 0.0), budget.get("max", 0.0)
+    clip = lambda value: min(max(value, 0.0), 1.0)
+
+    dimensions = product.get("dimensions") or {}
+    width, depth, height = dimensions.get("width"), dimensions.get("depth"), dimensions.get("height")
+    room_area = room_dimensions.get("width", 0.0) * 12 * room_dimensions.get("depth", 0.0) * 12
+    room_height = room_dimensions.get("height", 0.0) * 12
+    if room_area <= 0 or width is None or depth is None:
+        dimension_fit = UNKNOWN_DIMENSION_SCORE
+    elif room_height > 0 and height is not None and height > room_height:
+        dimension_fit = 0.0
+    else:
+        dimension_fit = clip(1.0 - (width * depth / room_area) / MAX_FOOTPRINT_SHARE)
+
+    components = {
+        "price_fit": clip((budget_max - effective_price) / max(budget_max - budget_min, 1.0)),
+        "rating": clip((product.get("rating") or 0.0) / 5.0),
+        "reviews": clip(math.log1p(product.get("review_count") or 0) / math.log1p(REVIEW_SATURATION)),
+        "discount": clip((price - sale_price) / price) if sale_price is not None and price > 0 else 0.0,
+        "dimension_fit": dimension_fit,
+    }
+    components["score"] = sum(RANKING_WEIGHTS[name] * components[name] for name in RANKING_WEIGHTS)
+    return components
+
+def explain(product: Dict, components: Dict[str, float], budget: Dict[str, float], top: int = 2) -> str:
+    """Short reason list from the components that contributed most to the score"""
+    sale_price = product.get("sale_price")
+    # Formatted lazily: only the selected components are rendered, and null catalog values read as 0
+    reasons = {
+        "price_fit": lambda: f"${sale_price if sale_price is not None else product['price']:.0f} leaves room in your ${budget.get('max', 0):.0f} budget",
+        "rating": lambda: f"rated {product.get('rating') or 0:.1f}/5",
+        "reviews": lambda: f"{product.get('review_count') or 0:,} reviews",
+        "discount": lambda: f"{components['discount'] * 100:.0f}% off right now",
+        "dimension_fit": lambda: "compact footprint for your room",
+        "relevance": lambda: "close match for what you searched",
+    }
+    weights = dict(RANKING_WEIGHTS)
+    if "relevance" in components:
+        weights = {name: weight * (1 - SEMANTIC_WEIGHT) for name, weight in weights.items()}
+        weights["relevance"] = SEMANTIC_WEIGHT
+    contributions = sorted(weights, key=lambda name: weights[name] * components[name], reverse=True)
+    return "; ".join(reasons[name]() for name in contributions[:top] if components[name] > 0)
@@ -0,0 +1,249 @@
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+import asyncio
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+
+# Where cached API responses live: "memory" (per process) or "redis" (shared by all workers)
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory")
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "300"))
+# Seconds past the TTL an entry is still served while a background refresh recomputes it
+RESPONSE_CACHE_STALE_TTL = float(os.getenv("RESPONSE_CACHE_STALE_TTL", "60"))
+# Entries kept by the in-process backend; 0 disables caching
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "2048"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
+REDIS_KEY_PREFIX = "roomait:cache:"
+
+def quantize(value: float, quantum: float) -> float:
+    """Snap value to the nearest multiple of quantum (half rounds up)"""
+    if quantum <= 0:
+        return value
+    return round(math.floor(value / quantum + 0.5) * quantum, 6)
+
+def cache_key(namespace: str, version: str, payload: Dict) -> str:
+    """Stable key for a canonical request payload; version ties entries to the data they came from"""
+    digest = hashlib.sha256(json.dumps(payload, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+    return f"{namespace}:{version}:{digest[:32]}"
+
+class MemoryCacheBackend:
+    """Per-process LRU with a TTL per entry"""
+
+    name = "memory"
+
+    def __init__(self, max_size: int = RESPONSE_CACHE_SIZE, clock=time.monotonic):
+        self._max_size = max_size
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.evictions = 0
+
+    async def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if self._clock() >= expires_at:
+                del self._entries[key]
+                self.evictions += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    async def set(self, key: str, value: Any, ttl: float):
+        if self._max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, self._clock() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    async def delete_prefix(self, prefix: str) -> int:
+        with self._lock:
+            stale = [key for key in self._entries if key.startswith(prefix)]
+            for key in stale:
+                del self._entries[key]
+            return len(stale)
+
+    def size(self) -> Optional[int]:
+        return len(self._entries)
+
+class RedisCacheBackend:
+    """Cache shared across workers; values are stored as JSON with a Redis-side TTL"""
+
+    name = "redis"
+
+    def __init__(self, url: str = REDIS_URL, client=None):
+        if client is None:
+            import redis.asyncio as redis
+            client = redis.from_url(url)
+        self._client = client
+
+    async def get(self, key: str) -> Optional[Any]:
+        raw = await self._client.get(REDIS_KEY_PREFIX + key)
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value: Any, ttl: float):
+        await self._client.set(REDIS_KEY_PREFIX + key, json.dumps(value), px=max(int(ttl * 1000), 1))
+
+    async def delete_prefix(self, prefix: str) -> int:
+        # Versioned keys expire on their own; this only frees memory early
+        keys = [key async for key in self._client.scan_iter(match=f"{REDIS_KEY_PREFIX}{prefix}*", count=500)]
+        if keys:
+            await self._client.delete(*keys)
+        return len(keys)
+
+    def size(self) -> Optional[int]:
+        return None
+
+    async def close(self):
+        await self._client.close()
+
+class ResponseCache:
+    """TTL + LRU cache for computed API responses with hit-rate metrics
+
+    Concurrent misses for one key share a single in-flight computation, and
+    entries past their TTL are still served for stale_ttl seconds while one
+    background refresh recomputes them. Backend errors are counted and treated
+    as misses, so a cache outage only costs latency.
+    """
+
+    def __init__(self, backend, ttl: float = RESPONSE_CACHE_TTL, stale_ttl: float = RESPONSE_CACHE_STALE_TTL,
+                 clock=time.time):
+        self.backend = backend
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        # Wall-clock time, since Redis entries are shared between processes
+        self._clock = clock
+        self._versions: Dict[str, str] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.refreshes = 0
+        self.errors = 0
+        self.invalidations = 0
+        self.uncacheable = 0
+
+    async def check_version(self, namespace: str, version: str):
+        """Drop a namespace's entries when the data version it was computed from changes"""
+        previous = self._versions.get(namespace)
+        self._versions[namespace] = version
+        if previous is not None and previous != version:
+            self.invalidations += 1
+            try:
+                await self.backend.delete_prefix(f"{namespace}:{previous}:")
+            except Exception:
+                self.errors += 1
+
+    async def _get_entry(self, key: str) -> Optional[Dict]:
+        try:
+            return await self.backend.get(key)
+        except Exception:
+            self.errors += 1
+            return None
+
+    async def set(self, key: str, value: Any):
+        # Backends keep entries through the stale window; freshness is judged from stored_at
+        try:
+            await self.backend.set(key, {"value": value, "stored_at": self._clock()}, self.ttl + self.stale_ttl)
+        except Exception:
+            self.errors += 1
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]],
+                             cacheable: Optional[Callable[[Any], bool]] = None) -> Any:
+        """Cached value for key; a miss joins or starts the one computation in flight for key
+
+        Computed values for which cacheable returns False are returned but not stored.
+        """
+        entry = await self._get_entry(key)
+        if entry is not None:
+            age = self._clock() - entry["stored_at"]
+            if age < self.ttl:
+                self.hits += 1
+                return entry["value"]
+            if age < self.ttl + self.stale_ttl:
+                self.stale_hits += 1
+                if key not in self._inflight:
+                    self.refreshes += 1
+                    self._start(key, compute, cacheable).add_done_callback(self._refresh_done)
+                return entry["value"]
+
+        self.misses += 1
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._start(key, compute, cacheable)
+        else:
+            self.coalesced += 1
+        # Shielded so a disconnecting client does not cancel the computation other requests await
+        return await asyncio.shield(task)
+
+    def _start(self, key: str, compute: Callable[[], Awaitable[Any]],
+               cacheable: Optional[Callable[[Any], bool]] = None) -> asyncio.Task:
+        async def run():
+            value = await compute()
+            if cacheable is None or cacheable(value):
+                await self.set(key, value)
+            else:
+                self.uncacheable += 1
+            return value
+
+        def finished(done: asyncio.Task):
+            if self._inflight.get(key) is done:
+                del self._inflight[key]
+            # Retrieve the exception even if every waiter went away; waiters that remain still see it
+            if not done.cancelled():
+                done.exception()
+
+        task = asyncio.ensure_future(run())
+        self._inflight[key] = task
+        task.add_done_callback(finished)
+        return task
+
+    def _refresh_done(self, task: asyncio.Task):
+        # Nobody awaits a background refresh; a failure keeps serving the stale entry
+        if not task.cancelled() and task.exception() is not None:
+            self.errors += 1
+
+    def stats(self) -> dict:
+        """Cache counters for monitoring"""
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "backend": self.backend.name,
+            "size": self.backend.size(),
+            "ttl_seconds": self.ttl,
+            "stale_ttl_seconds": self.stale_ttl,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight),
+            "refreshes": self.refreshes,
+            "evictions": getattr(self.backend, "evictions", None),
+            "invalidations": self.invalidations,
+            "uncacheable": self.uncacheable,
+            "errors": self.errors,
+        }
+
+def create_response_cache() -> ResponseCache:
+    """Response cache for the configured backend"""
+    if RESPONSE_CACHE_BACKEND == "redis":
+        return ResponseCache(RedisCacheBackend())
+    return ResponseCache(MemoryCacheBackend())
+
+# Global response cache instance
+response_cache = create_response_cache()
+
+async def close_response_cache():
+    """Close the Redis connection pool, if any, on application shutdown"""
+    close = getattr(response_cache.backend, "close", None)
+    if close is not None:
+        await close()
@@ -0,0 +1,331 @@
+from abc import ABC, abstractmethod
+from functools import partial
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import bisect
+import os
+import time
+
+import httpx
+from starlette.concurrency import run_in_threadpool
+
+from src.product_catalog import ProductCatalog, get_product_catalog
+from src.semantic_search import IVFIndex, SemanticIndex, product_text
+
+# Remote retailer adapters as comma-separated name=url pairs, e.g. "Wayfair=http://wayfair-adapter/search".
+# A remote adapter replaces the local catalog for the store with the same name
+RETAIL_PROVIDERS = os.getenv("RETAIL_PROVIDERS", "")
+# Longest a single provider call may take, in seconds
+RETAIL_PROVIDER_TIMEOUT = float(os.getenv("RETAIL_PROVIDER_TIMEOUT", "2.0"))
+# Longest a whole fan-out may take; providers still running are cut off and the rest returned
+RETAIL_SEARCH_DEADLINE = float(os.getenv("RETAIL_SEARCH_DEADLINE", "3.0"))
+RETAIL_HTTP_MAX_CONNECTIONS = int(os.getenv("RETAIL_HTTP_MAX_CONNECTIONS", "20"))
+# Consecutive failures that open a provider's circuit, and how long it stays open before a trial call
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("RETAIL_CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_TIMEOUT = float(os.getenv("RETAIL_CIRCUIT_RESET_TIMEOUT", "30"))
+# Upper bounds of the latency histogram buckets, in milliseconds
+LATENCY_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+# Shared connection pool for retailer adapter calls, created lazily inside the event loop
+_http_client: Optional[httpx.AsyncClient] = None
+
+def get_retail_client() -> httpx.AsyncClient:
+    """Get the shared async HTTP client used for retailer adapter calls"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=RETAIL_PROVIDER_TIMEOUT,
+            limits=httpx.Limits(max_connections=RETAIL_HTTP_MAX_CONNECTIONS, max_keepalive_connections=RETAIL_HTTP_MAX_CONNECTIONS)
+        )
+    return _http_client
+
+async def close_retail_client():
+    """Close the shared retailer HTTP client on application shutdown"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+class LatencyHistogram:
+    """Call latencies counted into fixed millisecond buckets"""
+
+    def __init__(self, bounds: List[float] = LATENCY_BUCKETS_MS):
+        self.bounds = list(bounds)
+        # One count per bound (latency <= bound), plus one for everything slower
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+
+    def observe(self, elapsed_ms: float):
+        self.counts[bisect.bisect_left(self.bounds, elapsed_ms)] += 1
+        self.count += 1
+        self.total_ms += elapsed_ms
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q quantile; None with no data or past the last bound"""
+        seen = 0
+        for bound, count in zip(self.bounds + [None], self.counts):
+            seen += count
+            if count and seen >= q * self.count:
+                return bound
+        return None
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else None,
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+            "buckets": {
+                **{f"le_{bound}": count for bound, count in zip(self.bounds, self.counts)},
+                f"gt_{self.bounds[-1]}": self.counts[-1]
+            }
+        }
+
+class CircuitBreaker:
+    """Stops calling a provider after consecutive failures, then lets one trial call through after a cool-down"""
+
+    def __init__(self, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD, reset_timeout: float = CIRCUIT_RESET_TIMEOUT,
+                 clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead; an open circuit past its cool-down admits one trial call"""
+        if self.state == "open" and self._clock() - self.opened_at >= self.reset_timeout:
+            self.state = "half_open"
+            return True
+        if self.state != "closed":
+            self.rejected += 1
+            return False
+        return True
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            self.state = "open"
+            self.opened_at = self._clock()
+            self.trips += 1
+
+    def release(self):
+        """A call ended without a verdict (cancelled or cut off by the deadline); let the next call be the trial"""
+        if self.state == "half_open":
+            self.state = "open"
+
+    def stats(self) -> dict:
+        return {"state": self.state, "failures": self.failures, "trips": self.trips, "rejected": self.rejected}
+
+def rank_catalog(catalog: ProductCatalog, search_request, stores: Optional[List[str]] = None) -> List[Dict]:
+    """Best matches in catalog for a ProductSearchRequest, as recommendation dicts best first"""
+    context = search_request.room_context
+    budget = context.budget_range
+    room_size = context.dimensions.get("width", 10) * context.dimensions.get("depth", 10)
+
+    # Budget is a bisect on the category's price-sorted column; candidates are scored in one
+    # vectorized pass and max_results is a top-k on that score. search_intent narrows the
+    # filtered candidates to their nearest neighbours in the semantic index
+    matches = catalog.search(
+        search_request.selected_category,
+        budget,
+        context.dimensions,
+        stores=stores,
+        min_rating=search_request.min_rating,
+        in_stock_only=search_request.in_stock_only,
+        limit=search_request.max_results,
+        search_intent=search_request.search_intent
+    )
+    return [catalog.recommendation(product_id, components, room_size, budget) for product_id, components in matches]
+
+def rank_records(records: List[Dict], search_request) -> List[Dict]:
+    """Rank product records fetched from a retailer with the same scoring as the local catalog
+
+    Records are embedded with the local catalog's vectorizer, so relevance (and therefore the
+    score) is comparable with local results when the lists are merged.
+    """
+    if not records:
+        return []
+    catalog = ProductCatalog(records)
+    base = get_product_catalog().semantic
+    if base is not None:
+        vectors = base.vectorizer.transform(product_text(record) for record in records)
+        catalog.semantic = SemanticIndex(base.vectorizer, IVFIndex.build(vectors), catalog.version)
+    return rank_catalog(catalog, search_request)
+
+class RetailProvider(ABC):
+    """One retailer backend; search returns scored recommendation dicts, best first
+
+    Ranking is CPU-bound, so implementations run it in the threadpool; work done on the
+    event loop could not be cut short by the provider timeout or the search deadline.
+    """
+
+    def __init__(self, name: str, timeout: float = RETAIL_PROVIDER_TIMEOUT, breaker: Optional[CircuitBreaker] = None):
+        self.name = name
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker()
+        self.latency = LatencyHistogram()
+
+    @abstractmethod
+    async def search(self, client: httpx.AsyncClient, search_request) -> List[Dict]:
+        """Ranked results for one search"""
+
+    def stats(self) -> dict:
+        return {
+            "timeout_seconds": self.timeout,
+            "circuit": self.breaker.stats(),
+            "latency": self.latency.snapshot()
+        }
+
+class CatalogProvider(RetailProvider):
+    """One store's products from the local in-memory catalog"""
+
+    async def search(self, client: httpx.AsyncClient, search_request) -> List[Dict]:
+        return await run_in_threadpool(lambda: rank_catalog(get_product_catalog(), search_request, stores=[self.name]))
+
+class HttpRetailProvider(RetailProvider):
+    """Retailer adapter reached over HTTP
+
+    The adapter receives the search as JSON and answers {"products": [...]} with records
+    in the product catalog format; they are filtered and ranked here.
+    """
+
+    def __init__(self, name: str, url: str, **kwargs):
+        super().__init__(name, **kwargs)
+        self.url = url
+
+    async def search(self, client: httpx.AsyncClient, search_request) -> List[Dict]:
+        response = await client.post(self.url, json={
+            "category": search_request.selected_category,
+            "subcategory": search_request.subcategory,
+            "search_intent": search_request.search_intent,
+            "budget_range": search_request.room_context.budget_range,
+            "max_results": search_request.max_results,
+            "in_stock_only": bool(search_request.in_stock_only)
+        })
+        response.raise_for_status()
+        records = [
+            dict(record, store=record.get("store") or self.name,
+                 category=record.get("category") or search_request.selected_category)
+            for record in response.json().get("products", [])
+        ]
+        return await run_in_threadpool(rank_records, records, search_request)
+
+def providers_from_config(config: str = RETAIL_PROVIDERS) -> List[RetailProvider]:
+    """HTTP retailer adapters from a "name=url,name=url" string"""
+    providers = []
+    for entry in filter(None, (part.strip() for part in config.split(","))):
+        name, _, url = entry.partition("=")
+        if not url:
+            raise ValueError(f"Retail provider entry {entry!r} is not name=url")
+        providers.append(HttpRetailProvider(name.strip(), url.strip()))
+    return providers
+
+class RetailSearch:
+    """Fans a product search out to every retailer provider concurrently and merges the results
+
+    Each provider call is bounded by its own timeout and by the overall deadline; providers
+    that fail, time out or have an open circuit are reported in the per-provider status and
+    the search returns whatever the others found.
+    """
+
+    def __init__(self, remote_providers: Optional[List[RetailProvider]] = None, include_catalog: bool = True,
+                 deadline: float = RETAIL_SEARCH_DEADLINE, provider_timeout: float = RETAIL_PROVIDER_TIMEOUT,
+                 client: Optional[httpx.AsyncClient] = None):
+        self.remote = {provider.name: provider for provider in remote_providers or []}
+        self.include_catalog = include_catalog
+        self.deadline = deadline
+        self.provider_timeout = provider_timeout
+        self._client = client
+        # Catalog providers are kept per store so their breakers and histograms persist
+        self._catalog_providers: Dict[str, CatalogProvider] = {}
+
+    def providers(self, search_request) -> List[RetailProvider]:
+        """Providers for a search: the local catalog per store in the category plus remote adapters"""
+        stores = get_product_catalog().stores(search_request.selected_category) if self.include_catalog else []
+        providers = [self.remote.get(store) or self._catalog_provider(store) for store in stores]
+        providers += [provider for name, provider in self.remote.items() if name not in stores]
+        if search_request.stores:
+            providers = [provider for provider in providers if provider.name in search_request.stores]
+        return providers
+
+    def _catalog_provider(self, store: str) -> CatalogProvider:
+        if store not in self._catalog_providers:
+            self._catalog_providers[store] = CatalogProvider(store, timeout=self.provider_timeout)
+        return self._catalog_providers[store]
+
+    def sources(self, search_request, deadline: Optional[float] = None) -> Dict[str, Callable[[], Awaitable[Tuple[List[Dict], Dict]]]]:
+        """One call per provider, all sharing a deadline that starts now"""
+        expires_at = asyncio.get_running_loop().time() + (self.deadline if deadline is None else deadline)
+        return {
+            provider.name: partial(self.call, provider, search_request, expires_at)
+            for provider in self.providers(search_request)
+        }
+
+    async def call(self, provider: RetailProvider, search_request, expires_at: float) -> Tuple[List[Dict], Dict]:
+        """(results, status) for one provider call; failures are reported in the status, not raised"""
+        if not provider.breaker.allow():
+            return [], {"status": "circuit_open"}
+
+        # The overall deadline cuts a call short without counting against the provider's circuit
+        timeout = min(provider.timeout, expires_at - asyncio.get_running_loop().time())
+        start = time.perf_counter()
+        results, status = [], {"status": "ok"}
+        try:
+            results = await asyncio.wait_for(provider.search(self._client or get_retail_client(), search_request), max(timeout, 0))
+            provider.breaker.record_success()
+        except asyncio.TimeoutError:
+            if timeout < provider.timeout:
+                status = {"status": "deadline"}
+                provider.breaker.release()
+            else:
+                status = {"status": "timeout"}
+                provider.breaker.record_failure()
+        except asyncio.CancelledError:
+            provider.breaker.release()
+            raise
+        except Exception as e:
+            status = {"status": "error", "error": str(e)}
+            provider.breaker.record_failure()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        provider.latency.observe(elapsed_ms)
+        status["elapsed_ms"] = round(elapsed_ms, 3)
+        return results, status
+
+    async def search(self, search_request, deadline: Optional[float] = None) -> Dict:
+        """Merged top results from every provider that answered in time, with per-provider status"""
+        sources = self.sources(search_request, deadline)
+        outcomes = await asyncio.gather(*(run() for run in sources.values()))
+        statuses = {name: status for name, (_, status) in zip(sources, outcomes)}
+        # Every provider scores with the same ranking, so merging is a sort on the score
+        merged = sorted(
+            (recommendation for results, _ in outcomes for recommendation in results),
+            key=lambda recommendation: recommendation.get("score") or 0.0, reverse=True
+        )
+        return {
+            "recommendations": merged[:search_request.max_results],
+            "sources": statuses,
+            "partial": any(status["status"] != "ok" for status in statuses.values())
+        }
+
+    def stats(self) -> dict:
+        """Per-provider circuit and latency counters for monitoring"""
+        return {
+            "deadline_seconds": self.deadline,
+            "providers": {
+                provider.name: provider.stats()
+                for provider in [*self._catalog_providers.values(), *self.remote.values()]
+            }
+        }
+
+# Global retail search fan-out
+retail_search = RetailSearch(providers_from_config())
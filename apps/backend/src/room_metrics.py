@@ -0,0 +1,109 @@
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterator, List, Optional
+import json
+
+import numpy as np
+
+# Space size bands by floor area in sq ft; an area on an edge falls in the band above it.
+# The single definition behind /room-analysis, the batch endpoint and search analytics
+SPACE_SIZE_EDGES = [50, 80, 120]
+SPACE_SIZE_LABELS = np.array(["micro", "small", "medium", "large"])
+# Recommended layouts by the same bands, with micro and small sharing "linear"
+LAYOUT_LABELS = np.array(["linear", "L-shaped", "flexible"])
+# Space efficiency bands by floor area in sq ft; an area on an edge stays in the band below it
+SPACE_EFFICIENCY_EDGES = [50, 80]
+SPACE_EFFICIENCY_LABELS = np.array(["very_tight", "challenging", "good"])
+# Furniture capacity as (sq ft per piece, most pieces)
+CAPACITY_RULES = {
+    "major_pieces": (25, 6),
+    "storage_units": (40, 4),
+    "decorative_items": (15, 8),
+}
+# Recommended spend per sq ft and its cap
+BUDGET_PER_SQFT = 15
+BUDGET_CAP = 800
+PRIORITY_SPENDING = "bed and desk (60% of budget)"
+SAVINGS_TIPS = "Check local student marketplaces for gently used items"
+
+def space_size_category(area_sqft: float) -> str:
+    """Space size band of one floor area, as analyze_rooms computes it for a batch"""
+    return str(SPACE_SIZE_LABELS[bisect_right(SPACE_SIZE_EDGES, area_sqft)])
+
+def recommended_layout(area_sqft: float) -> str:
+    """Recommended layout for one floor area, as analyze_rooms computes it for a batch"""
+    return str(LAYOUT_LABELS[bisect_right(SPACE_SIZE_EDGES[1:], area_sqft)])
+
+def space_efficiency(area_sqft: float) -> str:
+    """Space efficiency band of one floor area, as analyze_rooms computes it for a batch"""
+    return str(SPACE_EFFICIENCY_LABELS[bisect_left(SPACE_EFFICIENCY_EDGES, area_sqft)])
+
+def furniture_capacity(area_sqft: float) -> Dict[str, int]:
+    """Pieces of each kind that fit one floor area, as analyze_rooms computes it for a batch"""
+    return {name: min(int(area_sqft / per_piece), most) for name, (per_piece, most) in CAPACITY_RULES.items()}
+
+def recommended_budget(area_sqft: float) -> float:
+    """Recommended total spend for one floor area, as analyze_rooms computes it for a batch"""
+    return min(area_sqft * BUDGET_PER_SQFT, BUDGET_CAP)
+
+def analyze_rooms(width: np.ndarray, depth: np.ndarray, height: np.ndarray) -> Dict[str, np.ndarray]:
+    """Room metrics for a whole batch in column operations
+
+    Dimensions are in feet (0 where missing). Matches the per-room calculations of
+    /room-analysis: area, volume, space category, furniture capacity, layout,
+    space efficiency and recommended budget. Area and volume are left unrounded.
+    """
+    area = width * depth
+    metrics = {
+        "area_sqft": area,
+        "volume_cuft": area * height,
+        # side="right": an area equal to an edge falls in the band above it, like the "<" checks
+        "space_category": SPACE_SIZE_LABELS[np.searchsorted(SPACE_SIZE_EDGES, area, side="right")],
+        "recommended_layout": LAYOUT_LABELS[np.searchsorted(SPACE_SIZE_EDGES[1:], area, side="right")],
+        # side="left": an area equal to an edge stays in the band below it
+        "space_efficiency": SPACE_EFFICIENCY_LABELS[np.searchsorted(SPACE_EFFICIENCY_EDGES, area, side="left")],
+        "total_recommended": np.minimum(area * BUDGET_PER_SQFT, BUDGET_CAP),
+    }
+    for name, (per_piece, most) in CAPACITY_RULES.items():
+        # trunc matches int() for the negative areas a bad scan can produce
+        metrics[name] = np.minimum(np.trunc(area / per_piece), most).astype(np.int64)
+    return metrics
+
+def room_columns(rooms: List[Dict]) -> Dict[str, np.ndarray]:
+    """width, depth and height columns from room dicts, 0 where a dimension is missing"""
+    columns = {}
+    for name in ("width", "depth", "height"):
+        columns[name] = np.fromiter(
+            ((room.get("dimensions") or {}).get(name, 0) for room in rooms), dtype=np.float64, count=len(rooms)
+        )
+    return columns
+
+def iter_room_ndjson(metrics: Dict[str, np.ndarray], ids: List[Optional[str]], chunk_size: int = 1000) -> Iterator[str]:
+    """NDJSON lines for analyzed rooms, chunk_size rooms per yielded string"""
+    # Plain Python lists serialize much faster than NumPy scalars
+    columns = {name: values.tolist() for name, values in metrics.items()}
+    for start in range(0, len(ids), chunk_size):
+        lines = []
+        for i in range(start, min(start + chunk_size, len(ids))):
+            lines.append(json.dumps({
+                "index": i,
+                "id": ids[i],
+                "calculated_metrics": {
+                    # round() rather than np.round, which can differ by 0.1 on ties
+                    "area_sqft": round(columns["area_sqft"][i], 1),
+                    "volume_cuft": round(columns["volume_cuft"][i], 1),
+                    "space_category": columns["space_category"][i],
+                    "furniture_capacity": {
+                        "major_pieces": columns["major_pieces"][i],
+                        "storage_units": columns["storage_units"][i],
+                        "decorative_items": columns["decorative_items"][i],
+                        "recommended_layout": columns["recommended_layout"][i]
+                    }
+                },
+                "space_efficiency": columns["space_efficiency"][i],
+                "budget_guidance": {
+                    "total_recommended": columns["total_recommended"][i],
+                    "priority_spending": PRIORITY_SPENDING,
+                    "savings_tips": SAVINGS_TIPS
+                }
+            }))
+        yield "\n".join(lines) + "\n"
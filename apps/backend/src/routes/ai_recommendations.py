@@ -1,19 +1,43 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from pydantic import BaseModel
+from datetime import datetime
 import openai
 import os
 import json
 import asyncio
 import httpx
+import time
 
 from src.database import get_db
+from src.analytics import search_analytics
 from src.auth import get_current_user_optional
-from src.models.database_models import ProductSearch, User
+from src.product_catalog import get_product_catalog
+from src.response_cache import response_cache, cache_key, quantize
+from src.retail_providers import retail_search
+from src.room_metrics import (
+    PRIORITY_SPENDING, SAVINGS_TIPS, analyze_rooms, furniture_capacity, iter_room_ndjson, recommended_budget,
+    recommended_layout, room_columns, space_efficiency, space_size_category
+)
+from src.models.database_models import User
 
 router = APIRouter(prefix="/api/v1/ai", tags=["AI Recommendations"])
 
+# Search cache quantization: budgets snap to this many dollars, room dimensions to this many feet
+SEARCH_CACHE_BUDGET_STEP = float(os.getenv("SEARCH_CACHE_BUDGET_STEP", "10"))
+SEARCH_CACHE_DIMENSION_STEP = float(os.getenv("SEARCH_CACHE_DIMENSION_STEP", "0.5"))
+# Part of the room-analysis and style-suggestion cache keys; bump when prompts or models change
+AI_RESPONSE_VERSION = "1"
+# Part of the product-search cache version; bump when the cached result shape changes
+SEARCH_RESPONSE_VERSION = "2"
+
+# Streaming product search wire formats
+STREAM_MEDIA_TYPES = {"sse": "text/event-stream", "ndjson": "application/x-ndjson"}
+# Most rooms accepted by one batch room-analysis request
+ROOM_BATCH_MAX = int(os.getenv("ROOM_BATCH_MAX", "100000"))
+
 # Pydantic models for request/response
 class RoomContext(BaseModel):
     dimensions: Dict[str, float]  # width, height, depth in feet
@@ -28,6 +52,12 @@ class ProductSearchRequest(BaseModel):
     subcategory: Optional[str] = None
     search_intent: str
     max_results: Optional[int] = 10
+    stores: Optional[List[str]] = None
+    min_rating: Optional[float] = None
+    in_stock_only: Optional[bool] = False
+
+class RoomBatchRequest(BaseModel):
+    rooms: List[Dict]  # each like a /room-analysis body, plus an optional "id"
 
 class ProductRecommendation(BaseModel):
     product_name: str
@@ -43,42 +73,78 @@ class ProductRecommendation(BaseModel):
     shipping: str
     in_stock: bool
     specifications: Optional[Dict] = {}
+    score: Optional[float] = None
+    score_breakdown: Optional[Dict[str, float]] = None
 
 @router.post("/product-search")
 async def search_products(
     search_request: ProductSearchRequest,
-    db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user_optional)
 ):
     """AI-powered product search based on room context and user preferences"""
+    # Log search for analytics; written behind the request in batches, results_count stays None on failure
+    search_event = {
+        "user_id": current_user.get("sub") if current_user else None,
+        "search_query": search_request.search_intent,
+        "category": search_request.selected_category,
+        "room_context": search_request.room_context.dict(),
+        "filters": {},
+        "results_count": None,
+        "created_at": datetime.utcnow()
+    }
     try:
-        # Log search for analytics
-        search_log = ProductSearch(
-            user_id=current_user.get("sub") if current_user else None,
-            search_query=search_request.search_intent,
-            category=search_request.selected_category,
-            room_context=search_request.room_context.dict(),
-            filters={}
+        # Near-identical searches share one cached result, computed once from the quantized request
+        # even when many arrive together. Partial results (a provider failed or ran out of time)
+        # are returned but not cached
+        canonical_request = canonical_search_request(search_request)
+        search_version = f"{get_product_catalog().version}.{SEARCH_RESPONSE_VERSION}"
+        await response_cache.check_version("product-search", search_version)
+        result = await response_cache.get_or_compute(
+            cache_key("product-search", search_version, canonical_request.dict()),
+            lambda: recommend_products(canonical_request),
+            cacheable=lambda result: not result["partial"]
         )
-        db.add(search_log)
-        db.commit()
-
-        # Generate AI-powered product recommendations
-        recommendations = await generate_product_recommendations(search_request)
-        
-        # Update search log with results
-        search_log.results_count = len(recommendations)
-        db.commit()
+        recommendations = result["recommendations"]
+        search_event["results_count"] = len(recommendations)
 
         return {
             "recommendations": recommendations,
             "search_context": search_request.room_context.dict(),
             "total_results": len(recommendations),
+            "sources": result["sources"],
+            "partial": result["partial"],
             "status": "success"
         }
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Product search failed: {str(e)}")
+    finally:
+        search_analytics.record(search_event)
+
+@router.post("/product-search/stream")
+async def stream_product_search(
+    search_request: ProductSearchRequest,
+    format: str = Query("sse", pattern="^(sse|ndjson)$"),
+    current_user: dict = Depends(get_current_user_optional)
+):
+    """Streaming product search: recommendations are sent as each source completes, then a summary
+
+    format=sse sends Server-Sent Events; format=ndjson sends one JSON object per line.
+    """
+    search_event = {
+        "user_id": current_user.get("sub") if current_user else None,
+        "search_query": search_request.search_intent,
+        "category": search_request.selected_category,
+        "room_context": search_request.room_context.dict(),
+        "filters": {},
+        "results_count": None,
+        "created_at": datetime.utcnow()
+    }
+    return StreamingResponse(
+        stream_recommendations(search_request, format, search_event),
+        media_type=STREAM_MEDIA_TYPES[format],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @router.post("/room-analysis")
 async def analyze_room(
@@ -96,14 +162,18 @@ async def analyze_room(
         area = dimensions.get("width", 0) * dimensions.get("depth", 0)
         volume = area * dimensions.get("height", 0)
 
-        # AI analysis of room suitability
-        analysis = await analyze_room_with_ai({
+        # AI analysis of room suitability; identical concurrent rooms share one computation
+        analysis_input = {
             "dimensions": dimensions,
             "area_sqft": area,
             "volume_cuft": volume,
             "surfaces_detected": detected_surfaces,
             "room_type": room_type
-        })
+        }
+        analysis = await response_cache.get_or_compute(
+            cache_key("room-analysis", AI_RESPONSE_VERSION, analysis_input),
+            lambda: analyze_room_with_ai(analysis_input)
+        )
 
         return {
             "room_analysis": analysis,
@@ -119,6 +189,27 @@ async def analyze_room(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Room analysis failed: {str(e)}")
 
+@router.post("/room-analysis/batch")
+async def analyze_rooms_batch(
+    batch: RoomBatchRequest,
+    current_user: dict = Depends(get_current_user_optional)
+):
+    """Metrics for many rooms at once, streamed back as NDJSON (one line per room, in request order)
+
+    Area, volume, space category, furniture capacity and budget guidance are computed
+    as column operations over the whole batch.
+    """
+    if len(batch.rooms) > ROOM_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"At most {ROOM_BATCH_MAX} rooms per batch")
+    try:
+        columns = room_columns(batch.rooms)
+    except (TypeError, ValueError, AttributeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid room dimensions: {str(e)}")
+
+    metrics = analyze_rooms(columns["width"], columns["depth"], columns["height"])
+    ids = [room.get("id") for room in batch.rooms]
+    return StreamingResponse(iter_room_ndjson(metrics, ids), media_type=STREAM_MEDIA_TYPES["ndjson"])
+
 @router.get("/style-suggestions")
 async def get_style_suggestions(
     room_size: float,
@@ -127,7 +218,10 @@ async def get_style_suggestions(
 ):
     """Get AI-powered style suggestions based on room size and budget"""
     try:
-        suggestions = await generate_style_suggestions(room_size, budget)
+        suggestions = await response_cache.get_or_compute(
+            cache_key("style-suggestions", AI_RESPONSE_VERSION, {"room_size": room_size, "budget": budget}),
+            lambda: generate_style_suggestions(room_size, budget)
+        )
         
         return {
             "style_suggestions": suggestions,
@@ -139,92 +233,106 @@ async def get_style_suggestions(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Style suggestion failed: {str(e)}")
 
-async def generate_product_recommendations(search_request: ProductSearchRequest) -> List[ProductRecommendation]:
-    """Generate AI-powered product recommendations using OpenAI and real product APIs"""
+def canonical_search_request(search_request: ProductSearchRequest) -> ProductSearchRequest:
+    """Normalized, quantized copy of a search, so near-identical requests map to one cache entry"""
+    context = search_request.room_context
+    return ProductSearchRequest(
+        room_context=RoomContext(
+            dimensions={name: quantize(value, SEARCH_CACHE_DIMENSION_STEP) for name, value in context.dimensions.items()},
+            style_preference=(context.style_preference or "").strip().lower() or None,
+            budget_range={name: quantize(value, SEARCH_CACHE_BUDGET_STEP) for name, value in context.budget_range.items()}
+            if context.budget_range is not None else None,
+            existing_items=sorted({item.strip().lower() for item in context.existing_items or []}),
+            room_type=(context.room_type or "").strip().lower() or None
+        ),
+        selected_category=search_request.selected_category.strip(),
+        subcategory=search_request.subcategory.strip() if search_request.subcategory else None,
+        search_intent=" ".join(search_request.search_intent.lower().split()),
+        max_results=search_request.max_results,
+        stores=sorted(set(search_request.stores)) if search_request.stores else None,
+        min_rating=round(search_request.min_rating, 1) if search_request.min_rating is not None else None,
+        in_stock_only=bool(search_request.in_stock_only)
+    )
+
+def format_stream_event(event: str, data: Dict, event_id: Optional[int], format: str) -> str:
+    """One streamed event as an SSE frame or an NDJSON line"""
+    if format == "ndjson":
+        return json.dumps({"event": event, "id": event_id, "data": data}) + "\n"
+    frame = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{frame}event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def recommendation_sources(search_request: ProductSearchRequest) -> Dict:
+    """Independent result sources for a search, one per retailer provider"""
+    return retail_search.sources(search_request)
+
+async def stream_recommendations(search_request: ProductSearchRequest, format: str, search_event: Dict):
+    """Yield recommendations as sources finish, then a summary with the overall ranking
+
+    Each source returns its own top max_results, so the overall top max_results is among
+    the streamed events. Sources share the retail search deadline. If the client disconnects,
+    the response task is cancelled and sources still running are cancelled with it.
+    """
+    start = time.perf_counter()
+    tasks = {asyncio.ensure_future(run()): name for name, run in recommendation_sources(search_request).items()}
+    scores = []
+    sources = {}
+    try:
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                name = tasks[task]
+                if task.exception() is not None:
+                    sources[name] = {"status": "error", "error": str(task.exception())}
+                    continue
+                results, status = task.result()
+                sources[name] = dict(status, results=len(results))
+                for recommendation in results:
+                    event_id = len(scores)
+                    scores.append(recommendation.get("score") or 0.0)
+                    payload = ProductRecommendation(**recommendation).dict()
+                    yield format_stream_event("recommendation", dict(payload, source=name), event_id, format)
+
+        ranking = sorted(range(len(scores)), key=lambda event_id: scores[event_id], reverse=True)[:search_request.max_results]
+        search_event["results_count"] = len(ranking)
+        yield format_stream_event("summary", {
+            "total_results": len(ranking),
+            "ranking": ranking,
+            "sources": sources,
+            "partial": any(status["status"] != "ok" for status in sources.values()),
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 3),
+            "status": "success"
+        }, None, format)
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+        search_analytics.record(search_event)
+
+async def recommend_products(search_request: ProductSearchRequest) -> Dict:
+    """Recommendations as plain dicts with per-provider status, the form kept in the response cache"""
+    recommendations, sources = await generate_product_recommendations(search_request)
+    return {
+        "recommendations": [recommendation.dict() for recommendation in recommendations],
+        "sources": sources,
+        "partial": any(status["status"] != "ok" for status in sources.values())
+    }
+
+async def generate_product_recommendations(search_request: ProductSearchRequest) -> Tuple[List[ProductRecommendation], Dict[str, Dict]]:
+    """Generate AI-powered product recommendations using OpenAI and real product APIs
+
+    Returns the recommendations and each retailer provider's status.
+    """
     
     # For MVP, we'll simulate AI recommendations with realistic data
     # In production, this would integrate with OpenAI GPT-4 and real retail APIs
     
-    category = search_request.selected_category
-    budget = search_request.room_context.budget_range
-    room_size = search_request.room_context.dimensions.get("width", 10) * search_request.room_context.dimensions.get("depth", 10)
-    
-    # Sample product database (in production, this would be real API calls)
-    sample_products = {
-        "seating": [
-            {
-                "product_name": "IKEA Markus Office Chair",
-                "price": 179.0,
-                "sale_price": 149.0,
-                "rating": 4.3,
-                "review_count": 2847,
-                "image_url": "https://example.com/ikea-markus.jpg",
-                "store": "IKEA",
-                "product_url": "https://ikea.com/markus-chair",
-                "why_recommended": f"Perfect size for your {room_size:.0f} sq ft room, highly rated for study sessions",
-                "shipping": "Free pickup",
-                "in_stock": True,
-                "specifications": {"weight_capacity": "240 lbs", "warranty": "10 years"}
-            },
-            {
-                "product_name": "Amazon Basics Mesh Chair",
-                "price": 89.0,
-                "rating": 4.1,
-                "review_count": 1203,
-                "image_url": "https://example.com/amazon-mesh.jpg",
-                "store": "Amazon",
-                "product_url": "https://amazon.com/basics-mesh-chair",
-                "why_recommended": f"Within your ${budget['max']:.0f} budget, breathable for long study sessions",
-                "shipping": "Prime 1-day",
-                "in_stock": True,
-                "specifications": {"material": "Mesh", "adjustable_height": True}
-            }
-        ],
-        "storage": [
-            {
-                "product_name": "IKEA Kallax Shelf Unit",
-                "price": 49.99,
-                "rating": 4.5,
-                "review_count": 3421,
-                "image_url": "https://example.com/ikea-kallax.jpg",
-                "store": "IKEA",
-                "product_url": "https://ikea.com/kallax-shelf",
-                "why_recommended": "Modular design perfect for dorm organization, fits your modern style",
-                "shipping": "Free pickup",
-                "in_stock": True,
-                "specifications": {"dimensions": "30 3/8x57 7/8\"", "weight": "73 lbs"}
-            },
-            {
-                "product_name": "Wayfair College Storage Cube",
-                "price": 34.99,
-                "rating": 4.2,
-                "review_count": 856,
-                "image_url": "https://example.com/wayfair-cube.jpg",
-                "store": "Wayfair",
-                "product_url": "https://wayfair.com/storage-cube",
-                "why_recommended": "Student-friendly price, stackable for flexible storage",
-                "shipping": "Free shipping over $35",
-                "in_stock": True,
-                "specifications": {"material": "Fabric", "collapsible": True}
-            }
-        ]
-    }
-    
-    # Get products for the requested category
-    products = sample_products.get(category, [])
-    
-    # Filter by budget
-    filtered_products = [
-        p for p in products 
-        if p["price"] <= budget["max"] and p["price"] >= budget["min"]
-    ]
+    # Every retailer provider (the local catalog per store, plus any remote adapters) is queried
+    # concurrently; providers that fail or miss the deadline are left out of the merged results
+    result = await retail_search.search(search_request)
     
     # Convert to ProductRecommendation objects
-    recommendations = []
-    for product in filtered_products[:search_request.max_results]:
-        recommendations.append(ProductRecommendation(**product))
-    
-    return recommendations
+    return [ProductRecommendation(**recommendation) for recommendation in result["recommendations"]], result["sources"]
 
 async def analyze_room_with_ai(room_data: Dict) -> Dict:
     """Use AI to analyze room characteristics and provide insights"""
@@ -234,7 +342,7 @@ async def analyze_room_with_ai(room_data: Dict) -> Dict:
     
     # AI analysis simulation (in production, would use OpenAI)
     analysis = {
-        "space_efficiency": "good" if area > 80 else "challenging" if area > 50 else "very_tight",
+        "space_efficiency": space_efficiency(area),
         "layout_suggestions": [
             "Place bed along the longest wall to maximize floor space",
             "Use vertical storage solutions to save floor area",
@@ -252,9 +360,9 @@ async def analyze_room_with_ai(room_data: Dict) -> Dict:
             "Minimal patterns to avoid visual clutter"
         ],
         "budget_guidance": {
-            "total_recommended": min(area * 15, 800),  # $15 per sq ft, max $800
-            "priority_spending": "bed and desk (60% of budget)",
-            "savings_tips": "Check local student marketplaces for gently used items"
+            "total_recommended": recommended_budget(area),
+            "priority_spending": PRIORITY_SPENDING,
+            "savings_tips": SAVINGS_TIPS
         }
     }
     
@@ -305,20 +413,11 @@ async def generate_style_suggestions(room_size: float, budget: float) -> List[Di
 
 def categorize_space_size(area_sqft: float) -> str:
     """Categorize room size for furniture recommendations"""
-    if area_sqft < 50:
-        return "micro"
-    elif area_sqft < 80:
-        return "small"
-    elif area_sqft < 120:
-        return "medium"
-    else:
-        return "large"
+    return space_size_category(area_sqft)
 
 def estimate_furniture_capacity(area_sqft: float) -> Dict:
     """Estimate how many pieces of furniture can fit"""
     return {
-        "major_pieces": min(int(area_sqft / 25), 6),  # One major piece per 25 sq ft
-        "storage_units": min(int(area_sqft / 40), 4),
-        "decorative_items": min(int(area_sqft / 15), 8),
-        "recommended_layout": "linear" if area_sqft < 80 else "L-shaped" if area_sqft < 120 else "flexible"
+        **furniture_capacity(area_sqft),
+        "recommended_layout": recommended_layout(area_sqft)
     }
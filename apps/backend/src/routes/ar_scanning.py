@@ -1,17 +1,36 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, HTTPException, UploadFile, File, Query, Response
+from sqlalchemy import insert, select, func, literal
+from sqlalchemy.orm import Session, load_only
 from typing import List, Dict, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field
 import json
+import math
+import random
+import time
 import uuid
 from datetime import datetime
+from starlette.concurrency import run_in_threadpool
 
-from src.database import get_db
+from src.database import get_db, get_async_db, async_session, execute, commit, rollback
 from src.auth import get_current_user_optional
+from src.pagination import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate, split_page, parse_fields, projected_columns, project
+)
+from src.catalog import model_catalog
+from src.catalog_seed import dialect_insert
+from src.collision import PLACEMENT_MAX_ITEMS, PLACEMENT_MAX_SCALE, PLACEMENT_MIN_CLEARANCE, placement_report
+from src.occupancy import analyze_floor
+from src.idempotency import IDEMPOTENCY_KEY_MAX_LENGTH, IdempotencyKeyReused, idempotency_store, request_fingerprint
+from src.layout_optimizer import (
+    LAYOUT_MAX_ITEMS, LAYOUT_MAX_RESTARTS, LAYOUT_MAX_TIME_BUDGET_MS, LAYOUT_TIME_BUDGET_MS, LayoutProblem, optimize_layout
+)
 from src.models.database_models import RoomScan, FurniturePlacement, User
 
 router = APIRouter(prefix="/api/v1/ar", tags=["AR Scanning"])
 
+# Twin bed footprint (short side, long side) in feet, for open-floor placement suggestions
+TWIN_BED_FOOTPRINT = (38 / 12, 75 / 12)
+
 # Pydantic models
 class RoomDimensions(BaseModel):
     width: float
@@ -34,6 +53,8 @@ class RoomScanData(BaseModel):
     timestamp: Optional[datetime] = None
 
 class FurnitureItem(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+
     item_id: str
     model_id: str
     position: Dict[str, float]  # x, y, z
@@ -46,6 +67,16 @@ class ARPlacementRequest(BaseModel):
     furniture_items: List[FurnitureItem]
     design_name: Optional[str] = "AR Design"
 
+class LayoutOptimizeRequest(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+
+    scan_id: str
+    model_ids: List[str]
+    time_budget_ms: Optional[int] = None
+    restarts: int = 1
+    seed: Optional[int] = None
+    min_clearance: float = Field(PLACEMENT_MIN_CLEARANCE, ge=0)
+
 @router.post("/scan/process")
 async def process_room_scan(
     scan_data: RoomScanData,
@@ -72,6 +103,10 @@ async def process_room_scan(
                 ]
             }
 
+        # Open floor left by the detected obstacles, before any furniture
+        detected_surfaces = [surface.dict() for surface in scan_data.detected_surfaces]
+        floor_analysis = analyze_floor(scan_data.dimensions.dict(), detected_surfaces)
+
         # Store scan data
         room_scan = RoomScan(
             scan_id=scan_data.scan_id,
@@ -82,12 +117,13 @@ async def process_room_scan(
                 "depth": scan_data.dimensions.depth,
                 "units": scan_data.dimensions.units
             },
-            detected_surfaces=[surface.dict() for surface in scan_data.detected_surfaces],
+            detected_surfaces=detected_surfaces,
             scan_quality=scan_data.scan_quality,
             processing_metadata={
                 "surfaces_count": len(scan_data.detected_surfaces),
                 "room_area": scan_data.dimensions.width * scan_data.dimensions.depth,
-                "room_volume": scan_data.dimensions.width * scan_data.dimensions.depth * scan_data.dimensions.height
+                "room_volume": scan_data.dimensions.width * scan_data.dimensions.depth * scan_data.dimensions.height,
+                "free_area_sqft": floor_analysis["free_area_sqft"]
             }
         )
 
@@ -96,7 +132,7 @@ async def process_room_scan(
         db.refresh(room_scan)
 
         # Generate placement suggestions
-        placement_suggestions = generate_placement_suggestions(scan_data)
+        placement_suggestions = generate_placement_suggestions(scan_data, floor_analysis)
 
         return {
             "status": "success",
@@ -106,7 +142,8 @@ async def process_room_scan(
                 "area_sqft": round(scan_data.dimensions.width * scan_data.dimensions.depth, 1),
                 "volume_cuft": round(scan_data.dimensions.width * scan_data.dimensions.depth * scan_data.dimensions.height, 1),
                 "surfaces_detected": len(scan_data.detected_surfaces),
-                "room_category": categorize_room_size(scan_data.dimensions)
+                "room_category": categorize_room_size(scan_data.dimensions),
+                "floor_analysis": floor_analysis
             },
             "placement_suggestions": placement_suggestions
         }
@@ -117,85 +154,134 @@ async def process_room_scan(
 @router.post("/placement/save")
 async def save_furniture_placement(
     placement_request: ARPlacementRequest,
-    db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user_optional)
+    response: Response,
+    db: Session = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user_optional),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
-    """Save AR furniture placement configuration"""
+    """Save AR furniture placement configuration
+
+    A retry carrying the same Idempotency-Key header gets the first response back
+    (with Idempotent-Replayed: true) instead of saving the design again. Keys are
+    scoped to the signed-in user, so the header requires authentication.
+    """
+    if idempotency_key is None:
+        return await save_placements(db, placement_request, current_user)
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Authentication required to use Idempotency-Key")
+    if not idempotency_key or len(idempotency_key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+        raise HTTPException(status_code=400, detail=f"Idempotency-Key must be 1 to {IDEMPOTENCY_KEY_MAX_LENGTH} characters")
+
+    async def save_in_own_session():
+        # Retries may wait on this save after the first client disconnects and its request session closes
+        async with async_session() as session:
+            return await save_placements(session, placement_request, current_user)
+
+    # Keys are per user, so two users cannot replay each other's saves
+    scope = f"placement-save:{current_user.get('sub')}"
+    try:
+        result, replayed = await idempotency_store.run(
+            scope, idempotency_key, request_fingerprint(placement_request.dict()), save_in_own_session
+        )
+    except IdempotencyKeyReused:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request")
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return result
+
+async def save_placements(db: Session, placement_request: ARPlacementRequest, current_user: Optional[dict]) -> Dict:
+    """Write a design's placement rows, and its user if new, in one transaction
+
+    The rows go in as a single executemany INSERT rather than one ORM object each.
+    """
     try:
         # Verify scan exists
-        room_scan = db.query(RoomScan).filter(RoomScan.scan_id == placement_request.scan_id).first()
-        if not room_scan:
+        result = await execute(db, select(RoomScan.scan_id).where(RoomScan.scan_id == placement_request.scan_id))
+        if result.first() is None:
             raise HTTPException(status_code=404, detail="Room scan not found")
 
-        # Get or create user
-        user_id = None
-        if current_user:
-            user_id = current_user.get("sub")
-            db_user = db.query(User).filter(User.auth0_user_id == user_id).first()
-            if not db_user:
-                db_user = User(
-                    auth0_user_id=user_id,
-                    email=current_user.get("email"),
-                    name=current_user.get("name")
-                )
-                db.add(db_user)
-                db.commit()
-                db.refresh(db_user)
-                user_id = db_user.user_id
+        user_id = await upsert_user(db, current_user) if current_user else None
 
         # Save furniture placements
         placement_id = str(uuid.uuid4())
-        total_estimated_cost = 0.0
-
-        for furniture_item in placement_request.furniture_items:
-            # Calculate estimated cost (in production, would fetch real prices)
-            estimated_cost = estimate_furniture_cost(furniture_item.model_id)
-            total_estimated_cost += estimated_cost
-
-            placement = FurniturePlacement(
-                placement_id=placement_id,
-                scan_id=placement_request.scan_id,
-                user_id=user_id,
-                model_id=furniture_item.model_id,
-                position=furniture_item.position,
-                rotation=furniture_item.rotation,
-                scale=furniture_item.scale,
-                surface_id=furniture_item.surface_id,
-                estimated_cost=estimated_cost
-            )
-            db.add(placement)
-
-        db.commit()
+        rows = [{
+            "placement_id": placement_id,
+            "scan_id": placement_request.scan_id,
+            "user_id": user_id,
+            "model_id": furniture_item.model_id,
+            "position": furniture_item.position,
+            "rotation": furniture_item.rotation,
+            "scale": furniture_item.scale,
+            "surface_id": furniture_item.surface_id,
+            # Estimated cost (in production, would fetch real prices)
+            "estimated_cost": estimate_furniture_cost(furniture_item.model_id)
+        } for furniture_item in placement_request.furniture_items]
+        if rows:
+            await execute(db, insert(FurniturePlacement), rows)
+        await commit(db)
 
         return {
             "status": "success",
             "placement_id": placement_id,
-            "items_placed": len(placement_request.furniture_items),
-            "estimated_total_cost": round(total_estimated_cost, 2),
+            "items_placed": len(rows),
+            "estimated_total_cost": round(sum((row["estimated_cost"] for row in rows), 0.0), 2),
             "design_name": placement_request.design_name,
             "message": "Furniture placement saved successfully"
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
+        await rollback(db)
         raise HTTPException(status_code=500, detail=f"Placement save failed: {str(e)}")
 
+async def upsert_user(db: Session, current_user: dict) -> int:
+    """users.user_id for the token's subject, creating the user if new, without committing
+
+    On PostgreSQL and SQLite this is one INSERT ... ON CONFLICT statement, so concurrent
+    first saves by the same user cannot race; the no-op update makes RETURNING give the
+    id of an existing row too.
+    """
+    values = {
+        "auth0_user_id": current_user.get("sub"),
+        "email": current_user.get("email"),
+        "name": current_user.get("name")
+    }
+    upsert = dialect_insert(db.get_bind().dialect.name)
+    if upsert is not None:
+        statement = upsert(User).values(**values)
+        statement = statement.on_conflict_do_update(
+            index_elements=[User.auth0_user_id],
+            set_={"auth0_user_id": statement.excluded.auth0_user_id}
+        ).returning(User.user_id)
+        return (await execute(db, statement)).scalar_one()
+
+    # Other databases: look up, then insert in the same transaction
+    result = await execute(db, select(User.user_id).where(User.auth0_user_id == values["auth0_user_id"]))
+    user_id = result.scalar()
+    if user_id is None:
+        user_id = (await execute(db, insert(User).values(**values).returning(User.user_id))).scalar_one()
+    return user_id
+
 @router.get("/placement/{placement_id}")
 async def get_furniture_placement(
     placement_id: str,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_async_db),
     current_user: dict = Depends(get_current_user_optional)
 ):
     """Retrieve saved furniture placement"""
     try:
-        placements = db.query(FurniturePlacement).filter(
+        result = await execute(db, select(FurniturePlacement).where(
             FurniturePlacement.placement_id == placement_id
-        ).all()
+        ))
+        placements = result.scalars().all()
 
         if not placements:
             raise HTTPException(status_code=404, detail="Placement not found")
 
         # Get scan data
-        scan = db.query(RoomScan).filter(RoomScan.scan_id == placements[0].scan_id).first()
+        result = await execute(db, select(RoomScan).where(RoomScan.scan_id == placements[0].scan_id))
+        scan = result.scalars().first()
 
         furniture_items = []
         total_cost = 0.0
@@ -228,38 +314,67 @@ async def get_furniture_placement(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Placement retrieval failed: {str(e)}")
 
+# Projectable fields for scan listings: field -> (columns to load, serializer)
+# surfaces_detected reads the count recorded at processing time instead of loading detected_surfaces
+SCAN_FIELDS = {
+    "scan_id": ([RoomScan.scan_id], lambda row: row[0].scan_id),
+    "room_dimensions": ([RoomScan.room_dimensions], lambda row: row[0].room_dimensions),
+    "scan_quality": ([RoomScan.scan_quality], lambda row: row[0].scan_quality),
+    "surfaces_detected": (
+        [RoomScan.processing_metadata],
+        lambda row: (row[0].processing_metadata or {}).get("surfaces_count", 0)
+    ),
+    "placement_count": ([], lambda row: row[1]),
+    "created_at": ([RoomScan.created_at], lambda row: row[0].created_at),
+}
+
 @router.get("/user/scans")
 async def get_user_scans(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
     current_user: dict = Depends(get_current_user_optional),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_async_db)
 ):
-    """Get all room scans for the current user"""
+    """Get room scans for the current user, newest first, one page at a time"""
     if not current_user:
-        return {"scans": [], "count": 0}
+        return {"scans": [], "count": 0, "next_cursor": None}
+
+    requested_fields = parse_fields(fields, SCAN_FIELDS)
 
     try:
         user_id = current_user.get("sub")
-        scans = db.query(RoomScan).filter(RoomScan.user_id == user_id).all()
+        columns = projected_columns(requested_fields, SCAN_FIELDS, RoomScan.created_at, RoomScan.scan_id)
+
+        if "placement_count" in requested_fields:
+            # Placement counts for the user's scans in one grouped query (no per-scan round trip)
+            user_scan_ids = select(RoomScan.scan_id).where(RoomScan.user_id == user_id)
+            placement_counts = (
+                select(FurniturePlacement.scan_id, func.count().label("placement_count"))
+                .where(FurniturePlacement.scan_id.in_(user_scan_ids))
+                .group_by(FurniturePlacement.scan_id)
+                .subquery()
+            )
+            statement = (
+                select(RoomScan, func.coalesce(placement_counts.c.placement_count, 0))
+                .outerjoin(placement_counts, placement_counts.c.scan_id == RoomScan.scan_id)
+            )
+        else:
+            statement = select(RoomScan, literal(None))
 
-        scan_list = []
-        for scan in scans:
-            # Get placement count for each scan
-            placement_count = db.query(FurniturePlacement).filter(
-                FurniturePlacement.scan_id == scan.scan_id
-            ).count()
+        statement = paginate(
+            statement.options(load_only(*columns)).where(RoomScan.user_id == user_id),
+            RoomScan.created_at, RoomScan.scan_id, cursor, limit
+        )
+        result = await execute(db, statement)
+        rows, next_cursor = split_page(result.all(), limit, lambda row: (row[0].created_at, row[0].scan_id))
 
-            scan_list.append({
-                "scan_id": scan.scan_id,
-                "room_dimensions": scan.room_dimensions,
-                "scan_quality": scan.scan_quality,
-                "surfaces_detected": len(scan.detected_surfaces or []),
-                "placement_count": placement_count,
-                "created_at": scan.created_at
-            })
+        scan_list = [project(row, requested_fields, SCAN_FIELDS) for row in rows]
 
         return {
             "scans": scan_list,
             "count": len(scan_list),
+            "next_cursor": next_cursor,
             "status": "success"
         }
 
@@ -269,18 +384,38 @@ async def get_user_scans(
 @router.post("/validate-placement")
 async def validate_furniture_placement(
     placement_data: Dict,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_async_db)
 ):
-    """Validate if furniture placement is physically realistic"""
+    """Validate if furniture placement is physically realistic
+
+    Items are checked against each other as oriented footprints sized from their
+    GenericModel dimensions, rotation and scale: overlapping pairs make both items
+    invalid, and pairs closer than min_clearance feet (optional in the body) get a warning.
+    The floor is also rasterized with the scan's obstacles to report free area and
+    check that beds and desks can be reached from the door by a min_clearance walkway.
+    """
     try:
         scan_id = placement_data.get("scan_id")
         furniture_items = placement_data.get("furniture_items", [])
+        min_clearance = float(placement_data.get("min_clearance", PLACEMENT_MIN_CLEARANCE))
+        check_placement_limits(furniture_items, min_clearance)
 
         # Get room scan data
-        room_scan = db.query(RoomScan).filter(RoomScan.scan_id == scan_id).first()
+        result = await execute(db, select(RoomScan).where(RoomScan.scan_id == scan_id))
+        room_scan = result.scalars().first()
         if not room_scan:
             raise HTTPException(status_code=404, detail="Room scan not found")
 
+        # Overlap and clearance checks between items, using the in-memory model catalog for footprints
+        snapshot = await model_catalog.get(db)
+        spatial = await run_in_threadpool(
+            placement_report, furniture_items, snapshot.dimensions, room_scan.room_dimensions, min_clearance
+        )
+        floor_analysis = await run_in_threadpool(lambda: analyze_floor(
+            room_scan.room_dimensions, room_scan.detected_surfaces or [], furniture_items, snapshot.dimensions,
+            min_walkway=min_clearance
+        ))
+
         validation_results = []
         
         for item in furniture_items:
@@ -292,22 +427,136 @@ async def validate_furniture_placement(
                 "warnings": validation["warnings"],
                 "suggestions": validation["suggestions"]
             })
+        add_spatial_warnings(validation_results, spatial, floor_analysis)
 
         overall_valid = all(result["is_valid"] for result in validation_results)
+        item_ids = [item.get("item_id") for item in furniture_items]
 
         return {
             "overall_valid": overall_valid,
             "item_validations": validation_results,
-            "global_suggestions": generate_layout_suggestions(furniture_items, room_scan),
+            "collisions": [
+                {"item_ids": [item_ids[a], item_ids[b]], "overlap_ft": overlap}
+                for a, b, overlap in spatial["collisions"]
+            ],
+            "clearance_violations": [
+                {"item_ids": [item_ids[a], item_ids[b]], "clearance_ft": gap, "required_ft": min_clearance}
+                for a, b, gap in spatial["clearance_violations"]
+            ],
+            "floor_analysis": floor_analysis,
+            "global_suggestions": generate_layout_suggestions(furniture_items, room_scan, spatial, floor_analysis),
             "status": "success"
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Validation failed: {str(e)}")
 
-def generate_placement_suggestions(scan_data: RoomScanData) -> List[Dict]:
+@router.post("/layout/optimize")
+async def optimize_furniture_layout(
+    layout_request: LayoutOptimizeRequest,
+    db: Session = Depends(get_async_db)
+):
+    """Search for positions and rotations of the given models in a scanned room
+
+    Simulated annealing keeps items inside the walls, apart, min_clearance feet from
+    each other, off the scan's obstacles and out of the doorway, puts beds, desks and
+    storage against walls, and maximizes the largest free rectangle of floor. The best
+    layout found by the deadline (time_budget_ms) is returned with the same collision
+    and floor checks /validate-placement runs.
+    """
+    model_ids = layout_request.model_ids
+    if not model_ids:
+        raise HTTPException(status_code=400, detail="model_ids must not be empty")
+    if len(model_ids) > LAYOUT_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {LAYOUT_MAX_ITEMS} items can be placed at once")
+
+    try:
+        result = await execute(db, select(RoomScan).where(RoomScan.scan_id == layout_request.scan_id))
+        room_scan = result.scalars().first()
+        if not room_scan:
+            raise HTTPException(status_code=404, detail="Room scan not found")
+        room_dimensions = room_scan.room_dimensions or {}
+        if room_dimensions.get("width", 0) <= 0 or room_dimensions.get("depth", 0) <= 0:
+            raise HTTPException(status_code=400, detail="Room scan has no floor dimensions")
+
+        snapshot = await model_catalog.get(db)
+        unknown = sorted({
+            model_id for model_id in model_ids
+            if (snapshot.dimensions.get(model_id) or {}).get("width") is None
+            or (snapshot.dimensions.get(model_id) or {}).get("depth") is None
+        })
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown models or missing dimensions: {', '.join(unknown)}")
+
+        surfaces = room_scan.detected_surfaces or []
+        problem = LayoutProblem(model_ids, snapshot.dimensions, room_dimensions, surfaces, layout_request.min_clearance)
+        time_budget_ms = min(max(layout_request.time_budget_ms or LAYOUT_TIME_BUDGET_MS, 50), LAYOUT_MAX_TIME_BUDGET_MS)
+        restarts = min(max(layout_request.restarts, 1), LAYOUT_MAX_RESTARTS)
+        seed = layout_request.seed if layout_request.seed is not None else random.randrange(2 ** 31)
+
+        start = time.perf_counter()
+        layout = await optimize_layout(problem, time_budget_ms, restarts, seed)
+        if layout is None:
+            raise HTTPException(status_code=503, detail="Layout search did not finish in time")
+        layout["search"]["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+        items = layout["furniture_items"]
+        spatial = await run_in_threadpool(
+            placement_report, items, snapshot.dimensions, room_dimensions, layout_request.min_clearance
+        )
+        floor_analysis = await run_in_threadpool(lambda: analyze_floor(
+            room_dimensions, surfaces, items, snapshot.dimensions, min_walkway=layout_request.min_clearance
+        ))
+        item_ids = [item["item_id"] for item in items]
+
+        return {
+            "scan_id": layout_request.scan_id,
+            "furniture_items": items,
+            "cost": layout["cost"],
+            "collisions": [
+                {"item_ids": [item_ids[a], item_ids[b]], "overlap_ft": overlap}
+                for a, b, overlap in spatial["collisions"]
+            ],
+            "clearance_violations": [
+                {"item_ids": [item_ids[a], item_ids[b]], "clearance_ft": gap, "required_ft": layout_request.min_clearance}
+                for a, b, gap in spatial["clearance_violations"]
+            ],
+            "floor_analysis": floor_analysis,
+            "search": layout["search"],
+            "status": "success"
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Layout optimization failed: {str(e)}")
+
+def generate_placement_suggestions(scan_data: RoomScanData, floor_analysis: Optional[Dict] = None) -> List[Dict]:
     """Generate intelligent furniture placement suggestions based on room scan"""
     suggestions = []
+
+    # Where the open floor can take a bed, from the occupancy grid
+    if floor_analysis:
+        open_area = floor_analysis["largest_free_rectangle"]
+        short_side, long_side = sorted((open_area["width"], open_area["depth"]))
+        if short_side >= TWIN_BED_FOOTPRINT[0] and long_side >= TWIN_BED_FOOTPRINT[1]:
+            suggestions.append({
+                "item_type": "bed",
+                "suggestion": f"Largest open floor area is {open_area['width']:g} x {open_area['depth']:g} ft - room for the bed there",
+                "priority": "high",
+                "position_hint": "open_area",
+                "open_area": open_area
+            })
+        else:
+            suggestions.append({
+                "item_type": "bed",
+                "suggestion": "No open floor area fits a twin bed - consider a loft bed or clearing detected obstacles",
+                "priority": "high",
+                "position_hint": "loft",
+                "open_area": open_area
+            })
     
     room_area = scan_data.dimensions.width * scan_data.dimensions.depth
     
@@ -384,9 +633,70 @@ def validate_single_placement(item: Dict, room_scan: RoomScan) -> Dict:
         "suggestions": suggestions
     }
 
-def generate_layout_suggestions(furniture_items: List[Dict], room_scan: RoomScan) -> List[str]:
+def check_placement_limits(furniture_items: List[Dict], min_clearance: float):
+    """Reject item lists the collision and floor checks should not be run on, before any work is done"""
+    if not isinstance(furniture_items, list):
+        raise HTTPException(status_code=400, detail="furniture_items must be a list")
+    if len(furniture_items) > PLACEMENT_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {PLACEMENT_MAX_ITEMS} items can be validated at once")
+    if not math.isfinite(min_clearance) or min_clearance < 0:
+        raise HTTPException(status_code=400, detail="min_clearance must be a non-negative number")
+    for item in furniture_items:
+        if not isinstance(item, dict):
+            raise HTTPException(status_code=400, detail="Each furniture item must be an object")
+        try:
+            scale = [float((item.get("scale") or {}).get(axis, 1.0)) for axis in ("x", "y", "z")]
+            position = [float((item.get("position") or {}).get(axis, 0.0)) for axis in ("x", "y", "z")]
+        except (AttributeError, TypeError, ValueError):
+            raise HTTPException(status_code=400, detail=f"Item {item.get('item_id')}: position and scale must be numbers")
+        if any(not 0 < value <= PLACEMENT_MAX_SCALE for value in scale):
+            raise HTTPException(
+                status_code=400, detail=f"Item {item.get('item_id')}: scale must be above 0 and at most {PLACEMENT_MAX_SCALE:g}"
+            )
+        if not all(math.isfinite(value) for value in position):
+            raise HTTPException(status_code=400, detail=f"Item {item.get('item_id')}: position must be finite")
+
+def add_spatial_warnings(validation_results: List[Dict], spatial: Dict, floor_analysis: Optional[Dict] = None):
+    """Fold a placement_report and floor walkways into the per-item validations (same order as the items)"""
+    def label(index):
+        return validation_results[index]["item_id"] or validation_results[index]["model_id"]
+
+    for a, b, overlap in spatial["collisions"]:
+        for item, other in ((a, b), (b, a)):
+            validation_results[item]["is_valid"] = False
+            validation_results[item]["warnings"].append(f"Overlaps {label(other)} by {overlap:g} ft")
+            validation_results[item]["suggestions"].append(f"Move this item or {label(other)} so they no longer overlap")
+    for a, b, gap in spatial["clearance_violations"]:
+        for item, other in ((a, b), (b, a)):
+            validation_results[item]["warnings"].append(
+                f"Only {gap:g} ft from {label(other)} - leave {spatial['min_clearance']:g} ft for access"
+            )
+    for item in spatial["outside_room"]:
+        if validation_results[item]["is_valid"]:
+            validation_results[item]["is_valid"] = False
+            validation_results[item]["warnings"].append("Item extends past the room walls")
+    for item in spatial["unchecked"]:
+        validation_results[item]["warnings"].append("Model dimensions unknown - overlaps were not checked")
+    for walkway in (floor_analysis or {}).get("walkways", []):
+        if not walkway["reachable"]:
+            validation_results[walkway["index"]]["warnings"].append("Cannot be reached from the door")
+        elif not walkway["meets_minimum"]:
+            validation_results[walkway["index"]]["warnings"].append(
+                f"Walkway from the door narrows to {walkway['width_ft']:g} ft - leave {spatial['min_clearance']:g} ft"
+            )
+
+def generate_layout_suggestions(furniture_items: List[Dict], room_scan: RoomScan, spatial: Optional[Dict] = None,
+                                floor_analysis: Optional[Dict] = None) -> List[str]:
     """Generate overall layout suggestions"""
     suggestions = []
+
+    if spatial and spatial["collisions"]:
+        suggestions.append(f"{len(spatial['collisions'])} pair(s) of items overlap - move them apart")
+    if spatial and spatial["clearance_violations"]:
+        suggestions.append(
+            f"{len(spatial['clearance_violations'])} pair(s) of items are closer than {spatial['min_clearance']:g} ft - "
+            "leave room to walk between them"
+        )
     
     room_area = room_scan.room_dimensions.get("width", 0) * room_scan.room_dimensions.get("depth", 0)
     item_count = len(furniture_items)
@@ -398,6 +708,13 @@ def generate_layout_suggestions(furniture_items: List[Dict], room_scan: RoomScan
         suggestions.append("For small rooms, limit to 4 major furniture pieces")
     
     # Check for flow and accessibility
+    for walkway in (floor_analysis or {}).get("walkways", []):
+        if not walkway["reachable"]:
+            suggestions.append(f"The {walkway['target']} cannot be reached from the door - clear a path to it")
+        elif not walkway["meets_minimum"]:
+            suggestions.append(
+                f"The path from the door to the {walkway['target']} narrows to {walkway['width_ft']:g} ft - widen it"
+            )
     bed_count = sum(1 for item in furniture_items if "bed" in item.get("model_id", "").lower())
     if bed_count > 1:
         suggestions.append("Multiple beds detected - ensure adequate spacing between them")
@@ -0,0 +1,106 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select, func
+from sqlalchemy.orm import Session
+from typing import Optional
+from datetime import datetime, timedelta, timezone
+import os
+
+from src.database import get_async_db, execute
+from src.auth import require_scope
+from src.pagination import parse_fields
+from src.analytics import SearchRollup, bucket_start
+
+router = APIRouter(prefix="/api/v1/analytics", tags=["Analytics"])
+
+# Dimensions a series can be broken down by
+ROLLUP_DIMENSIONS = {
+    "category": SearchRollup.category,
+    "budget_bucket": SearchRollup.budget_bucket,
+    "room_size_bucket": SearchRollup.room_size_bucket,
+}
+BUCKET_SIZES = {"hour": timedelta(hours=1), "day": timedelta(days=1)}
+DEFAULT_RANGES = {"hour": timedelta(hours=24), "day": timedelta(days=30)}
+# Longest series one request may ask for, in buckets
+MAX_ROLLUP_BUCKETS = 744
+# Token scope (an Auth0 API permission) needed to read search analytics
+ANALYTICS_READ_SCOPE = os.getenv("ANALYTICS_READ_SCOPE", "read:analytics")
+
+def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Timezone-aware datetimes as naive UTC, the form rollup buckets are stored in"""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+@router.get("/searches")
+async def get_search_rollups(
+    granularity: str = Query("hour", pattern="^(hour|day)$"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    category: Optional[str] = None,
+    group_by: Optional[str] = None,
+    current_user: dict = Depends(require_scope(ANALYTICS_READ_SCOPE)),
+    db: Session = Depends(get_async_db)
+):
+    """Product search volume and zero-result rate per hour or day, read from pre-aggregated rollups
+
+    group_by is a comma-separated subset of category, budget_bucket and room_size_bucket.
+    start and end without a UTC offset are read as UTC. The cost depends on the number
+    of buckets in the range, not on raw search volume. Requires the ANALYTICS_READ_SCOPE scope.
+    """
+    dimensions = parse_fields(group_by, ROLLUP_DIMENSIONS) if group_by else []
+    start, end = naive_utc(start), naive_utc(end)
+    end = bucket_start(end or datetime.utcnow(), granularity) + BUCKET_SIZES[granularity]
+    start = bucket_start(start, granularity) if start else end - DEFAULT_RANGES[granularity]
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    if (end - start) / BUCKET_SIZES[granularity] > MAX_ROLLUP_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"Range covers more than {MAX_ROLLUP_BUCKETS} {granularity} buckets")
+
+    try:
+        columns = [ROLLUP_DIMENSIONS[name] for name in dimensions]
+        statement = (
+            select(
+                SearchRollup.bucket_start, *columns,
+                func.sum(SearchRollup.search_count), func.sum(SearchRollup.zero_result_count)
+            )
+            .where(
+                SearchRollup.granularity == granularity,
+                SearchRollup.bucket_start >= start,
+                SearchRollup.bucket_start < end
+            )
+            .group_by(SearchRollup.bucket_start, *columns)
+            .order_by(SearchRollup.bucket_start, *columns)
+        )
+        if category is not None:
+            statement = statement.where(SearchRollup.category == category)
+        result = await execute(db, statement)
+
+        series = []
+        total_searches = total_zero_results = 0
+        for row in result.all():
+            searches, zero_results = int(row[-2]), int(row[-1])
+            total_searches += searches
+            total_zero_results += zero_results
+            series.append({
+                "bucket_start": row[0].isoformat(),
+                **{name: row[i + 1] for i, name in enumerate(dimensions)},
+                "searches": searches,
+                "zero_results": zero_results,
+                "zero_result_rate": round(zero_results / searches, 4) if searches else 0.0
+            })
+
+        return {
+            "granularity": granularity,
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "group_by": dimensions,
+            "series": series,
+            "totals": {
+                "searches": total_searches,
+                "zero_results": total_zero_results,
+                "zero_result_rate": round(total_zero_results / total_searches, 4) if total_searches else 0.0
+            }
+        }
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get search analytics: {str(e)}")